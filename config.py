@@ -40,16 +40,25 @@ class Config:
                 "default": "tiling",
                 "master_ratio": 0.6,
                 "auto_tile": True,
+                "tab_height": 20,  # Chiều cao mỗi ô tiêu đề của layout tabbed/stacking
+                "tab_cache_size": 128,  # Số ô tiêu đề đã render giữ lại (LRU)
+                "gaps": 0,  # Khoảng trống (px) quanh mỗi cửa sổ của layout tiling/stack/grid/spiral
+                "vectorize": True,  # Dùng NumPy (nếu có) để tính geometry khi nhiều cửa sổ
+                "vector_threshold": 32,  # Số cửa sổ tối thiểu để dùng NumPy
             },
             
             # Window behavior
             "window": {
                 "auto_focus": True,
                 "focus_follows_mouse": False,
+                "focus_follows_mouse_delay": 0.03,  # Giây con trỏ phải dừng trên cửa sổ trước khi focus
                 "mouse_warping": True,
                 "floating_modifier": "Mod4",
                 "default_floating_size": [400, 300],
                 "default_floating_border": "normal",
+                "floating_move_step": 20,
+                "drag_fps": 60,  # Số lần áp dụng geometry tối đa mỗi giây khi kéo chuột
+                "close_timeout": 3.0,  # Giây chờ client tự đóng sau WM_DELETE_WINDOW trước khi KillClient
             },
             
             # Keybinds
@@ -61,11 +70,22 @@ class Config:
                 "Mod4+q": "kill_focused",
                 "Mod4+f": "toggle_fullscreen",
                 "Mod4+Shift+Space": "toggle_floating",
+                "Mod4+Tab": "window_explorer",
+                "Mod4+n": "minimize",
+                "Mod4+Shift+n": "restore",
+                "Mod4+m": "scratchpad_show",
+                "Mod4+Shift+m": "move_to_scratchpad",
                 
                 # Layout
                 "Mod4+s": "layout_stack",
                 "Mod4+w": "layout_tiling", 
                 "Mod4+e": "layout_monocle",
+                "Mod4+t": "layout_tabbed",
+                "Mod4+Shift+t": "layout_stacking",
+                "Mod4+y": "layout_tree",
+                "Mod4+b": "split_horizontal",
+                "Mod4+v": "split_vertical",
+                "Mod4+Shift+y": "toggle_split",
                 "Mod4+Shift+e": "cycle_layout",
                 
                 # Window focus (vim-like)
@@ -81,8 +101,8 @@ class Config:
                 "Mod4+Shift+l": "move_right",
                 
                 # Master area adjustment
-                "Mod4+Shift+h": "master_grow_left",
-                "Mod4+Shift+l": "master_grow_right",
+                "Mod4+Control+h": "master_grow_left",
+                "Mod4+Control+l": "master_grow_right",
                 
                 # Exit
                 "Mod4+Shift+q": "quit",
@@ -117,6 +137,7 @@ class Config:
                     "background": 0xff000000,
                     "statusline": 0xff333333,
                     "separator": 0xff666666,
+                    "text": 0xffdddddd,
                     "focused_workspace": 0xff005577,
                     "active_workspace": 0xff333333,
                     "inactive_workspace": 0xff222222,
@@ -124,6 +145,94 @@ class Config:
                 }
             },
             
+            # Reparent client vào frame của WM (thanh tiêu đề), frame được tái sử dụng qua pool
+            "frame": {
+                "enabled": False,
+                "title_height": 18,
+                "pool_size": 16,  # Số frame rảnh giữ lại để dùng cho cửa sổ mới
+                "colors": {
+                    "focused": 0xff005577,
+                    "unfocused": 0xff333333,
+                    "text": 0xffffffff,
+                    "text_unfocused": 0xffaaaaaa,
+                },
+            },
+            
+            # Kích thước cửa sổ scratchpad (tỷ lệ vùng màn hình) khi lần đầu được hiện
+            "scratchpad": {
+                "width": 0.5,
+                "height": 0.6,
+            },
+            
+            # Window explorer (switcher)
+            "explorer": {
+                "enabled": True,
+                "max_results": 12,
+            },
+            
+            # Log có cấu trúc: ring buffer trong bộ nhớ, thread nền ghi ra file JSON xoay vòng
+            "log": {
+                "path": None,  # None = $XDG_STATE_HOME/iarde/iarde.log, "" = không ghi file
+                "level": "info",  # debug, info, warning, error
+                "console_level": "warning",  # Mức tối thiểu được in ra stderr
+                "ring_size": 4096,  # Số record giữ trong bộ nhớ (dump khi cần hoặc khi crash)
+                "rate_limit": 10,  # Số record tối đa mỗi key trong rate_window giây
+                "rate_window": 10.0,
+                "max_bytes": 1048576,  # Xoay file khi vượt kích thước này
+                "backups": 3,
+                "flush_interval": 1.0,
+                "crash_dump": True,  # Exception không được bắt: ghi ring ra <path>.crash
+                "ipc_records": 200,  # Số record trả về cho iarde_msg.py -t log
+            },
+            
+            # Đọc icon (_NET_WM_ICON), _NET_WM_PID và tiêu đề dài trên kết nối X thứ hai ở background
+            "prefetch": {
+                "enabled": True,
+                "queue_size": 256,  # Job vượt quá bị bỏ
+                "title_limit": 256,  # Số byte tiêu đề đọc trên main loop, phần còn lại đọc ở background
+                "icon_size": 32,
+                "icon_limit": 1048576,  # Số byte _NET_WM_ICON tối đa được đọc
+            },
+            
+            # Plugin: module chỉ được import khi một hook/action đã khai báo được gọi lần đầu
+            # Ví dụ: "clock": {"module": "plugins.clock", "hooks": ["focus"],
+            #                  "actions": ["show_clock"], "keybinds": {"Mod4+c": "show_clock"}}
+            "plugins": {
+                "budget_ms": 5.0,  # Thời gian tối đa mỗi lần gọi plugin (ghi đè bằng budget_ms của plugin)
+                "budget_action": "warn",  # "warn" hoặc "disable" (tắt sau max_violations lần vượt/lỗi)
+                "max_violations": 3,
+                "modules": {},
+            },
+            
+            "ipc": {
+                "enabled": True,
+                "socket_path": None,  # None = $XDG_RUNTIME_DIR/iarde-ipc<DISPLAY>.sock
+                "max_client_buffer": 1048576,
+            },
+            
+            # Đo latency theo event/keybind và đếm request X (có chi phí nhỏ cho mỗi request)
+            "metrics": {
+                "enabled": False,
+                "summary_interval": 60,  # Giây giữa hai lần ghi tóm tắt vào log, 0 = tắt
+                "summary_top": 10,
+                # Strict mode (dev/test): số round-trip tối đa mỗi scope, "log" hoặc "raise" khi vượt
+                "strict": False,
+                "strict_action": "log",
+                "budgets": {
+                    "event:MotionNotifyEvent": 0,
+                    "event:EnterNotifyEvent": 0,
+                    "event:ExposeEvent": 0,
+                    "event:ConfigureNotifyEvent": 0,
+                    "event:MapRequestEvent": 1,
+                    "layout": 0,
+                },
+            },
+            
+            # Ghi trace event X để replay (iarde_replay.py), "" = tắt
+            "trace": {
+                "record": "",
+            },
+            
             # Advanced settings
             "advanced": {
                 "disable_randr": False,
@@ -222,6 +331,10 @@ class Config:
         """Kiểm tra auto focus"""
         return self.get("window.auto_focus", True)
         
+    def is_focus_follows_mouse_enabled(self) -> bool:
+        """Kiểm tra focus theo chuột"""
+        return self.get("window.focus_follows_mouse", False)
+        
     def get_workspace_names(self) -> list:
         """Lấy danh sách tên workspace"""
         return self.get("workspaces.names", ["1", "2", "3", "4", "5"])
@@ -1,23 +1,56 @@
 import xcffib
 import xcffib.xproto as xproto
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
+class Backend:
+    """Nguồn kết nối X cho XConnection (X server thật hoặc server giả trong bộ nhớ)"""
+    
+    def connect(self):
+        """Trả về đối tượng có cùng giao diện với xcffib.Connection"""
+        raise NotImplementedError
+        
+class XcffibBackend(Backend):
+    """Kết nối tới X server thật qua xcffib (mặc định dùng $DISPLAY)"""
+    
+    def __init__(self, display: Optional[str] = None):
+        self.display = display
+        
+    def connect(self):
+        return xcffib.connect(display=self.display)
+        
 class XConnection:
     """Quản lý kết nối đến X server và thông tin màn hình"""
     
-    def __init__(self):
-        self.conn = xcffib.connect()
+    def __init__(self, backend: Optional[Backend] = None):
+        self.backend = backend or XcffibBackend()
+        self.conn = self.backend.connect()
         self.setup = self.conn.get_setup()
         self.screen = self.setup.roots[self.conn.pref_screen]
         self.root = self.screen.root
         self.screen_width = self.screen.width_in_pixels
         self.screen_height = self.screen.height_in_pixels
         self.screen_depth = self.screen.root_depth
+        self.atoms: Dict[str, int] = {}
+        # ID của resource đã hủy (DestroyWindow/FreePixmap), cấp lại trước khi xin ID mới
+        self.free_ids: List[int] = []
+        # Sequence của request gần nhất có thể đổi cửa sổ dưới con trỏ (configure/map/unmap/restack)
+        self.crossing_sequence = 0
         
     def flush(self):
         """Gửi tất cả các request đang chờ đến X server"""
         self.conn.flush()
         
+    def note_crossing(self, cookie):
+        """Ghi lại request của WM có thể sinh EnterNotify khi con trỏ đứng yên"""
+        if cookie is not None and cookie.sequence is not None:
+            self.crossing_sequence = cookie.sequence
+            
+    def caused_by_wm(self, sequence: Optional[int]) -> bool:
+        """Event (sequence 16 bit) được sinh không muộn hơn request cuối cùng ghi bởi note_crossing"""
+        if sequence is None or not self.crossing_sequence:
+            return False
+        return (self.crossing_sequence - sequence) & 0xffff < 0x8000
+        
     def get_screen_geometry(self) -> Tuple[int, int]:
         """Trả về kích thước màn hình (width, height)"""
         return self.screen_width, self.screen_height
@@ -26,14 +59,46 @@ class XConnection:
         """Trả về root window"""
         return self.root
         
+    def intern_atoms(self, names: List[str]):
+        """Intern nhiều atom cùng lúc (gửi hết request rồi mới chờ reply)"""
+        pending = [name for name in names if name not in self.atoms]
+        cookies = [
+            self.conn.core.InternAtom(False, len(name), name)
+            for name in pending
+        ]
+        for name, cookie in zip(pending, cookies):
+            self.atoms[name] = cookie.reply().atom
+            
+    def get_atom(self, name: str) -> int:
+        """Lấy atom theo tên (có cache, chỉ round-trip lần đầu)"""
+        atom = self.atoms.get(name)
+        if atom is None:
+            atom = self.conn.core.InternAtom(False, len(name), name).reply().atom
+            self.atoms[name] = atom
+        return atom
+        
     def generate_id(self) -> int:
-        """Tạo ID mới cho window/pixmap/gc"""
+        """Tạo ID mới cho window/pixmap/gc (dùng lại ID đã giải phóng nếu có)"""
+        if self.free_ids:
+            return self.free_ids.pop()
         return self.conn.generate_id()
         
+    def release_id(self, resource_id: int):
+        """Trả lại ID sau khi đã gửi request hủy resource tương ứng"""
+        self.free_ids.append(resource_id)
+        
     def wait_for_event(self):
         """Chờ sự kiện từ X server"""
         return self.conn.wait_for_event()
         
+    def poll_for_event(self):
+        """Lấy sự kiện tiếp theo trong hàng đợi, trả về None nếu không có"""
+        return self.conn.poll_for_event()
+        
+    def get_file_descriptor(self) -> int:
+        """File descriptor của kết nối X (dùng cho event loop)"""
+        return self.conn.get_file_descriptor()
+        
     def grab_key(self, window, mod_mask: int, keycode: int) -> bool:
         """Grab một key combination"""
         try:
@@ -56,7 +121,7 @@ class XConnection:
         self.conn.core.GrabButton(
             True, window, xproto.EventMask.ButtonPress | xproto.EventMask.ButtonRelease,
             xproto.GrabMode.Async, xproto.GrabMode.Async,
-            xproto.Atom._NONE, xproto.Atom._NONE, button, mod_mask
+            xproto.Window._None, xproto.Cursor._None, button, mod_mask
         )
         self.flush()
 
@@ -0,0 +1,130 @@
+import time
+import xcffib.xproto as xproto
+from typing import Optional, Tuple
+from .window import Window
+
+class DragManager:
+    """Mod+kéo chuột để di chuyển (Button1) hoặc đổi kích thước (Button3) cửa sổ floating"""
+    
+    MOVE_BUTTON = 1
+    RESIZE_BUTTON = 3
+    MIN_SIZE = 32
+    GRAB_MASK = xproto.EventMask.PointerMotion | xproto.EventMask.ButtonRelease
+    
+    def __init__(self, wm):
+        self.wm = wm
+        modifier = wm.config.get("window.floating_modifier", "Mod4")
+        self.modifier = wm.keybind_manager.modifier_masks.get(modifier, xproto.ModMask._4)
+        # Áp dụng geometry tối đa một lần mỗi khung hình
+        self.frame_interval = 1.0 / max(1, wm.config.get("window.drag_fps", 60))
+        
+        self.window: Optional[Window] = None
+        self.resizing = False
+        self.origin: Tuple[int, int] = (0, 0)  # Vị trí con trỏ lúc bắt đầu kéo
+        self.start_geometry: Tuple[int, int, int, int] = (0, 0, 0, 0)
+        self.pending: Optional[Tuple[int, int]] = None  # Vị trí con trỏ mới nhất chưa áp dụng
+        self.last_apply = 0.0
+        self.timer = None
+        self.compressed = 0  # Số MotionNotify bị gộp (không sinh ConfigureWindow riêng)
+        
+    def setup(self):
+        """Grab Mod+Button1/Button3 trên root, cửa sổ dưới con trỏ nằm trong event.child"""
+        for button in (self.MOVE_BUTTON, self.RESIZE_BUTTON):
+            self.wm.xconn.grab_button(self.wm.xconn.root, button, self.modifier)
+            
+    @property
+    def active(self) -> bool:
+        return self.window is not None
+        
+    def handle_button_press(self, event: xproto.ButtonPressEvent) -> bool:
+        """Bắt đầu kéo nếu là Mod+click trên cửa sổ floating"""
+        if self.active:
+            return True
+        if event.detail not in (self.MOVE_BUTTON, self.RESIZE_BUTTON) or not event.state & self.modifier:
+            return False
+        window = self.wm.event_handler.find_window(event.child)
+        if not window or not window.is_floating:
+            return False
+        geometry = window.geometry or window.get_geometry()
+        if not geometry:
+            return False
+            
+        self.window = window
+        self.resizing = event.detail == self.RESIZE_BUTTON
+        self.origin = (event.root_x, event.root_y)
+        self.start_geometry = geometry
+        self.pending = None
+        # Grab chủ động để nhận MotionNotify (grab thụ động chỉ có ButtonPress/Release)
+        self.wm.xconn.conn.core.GrabPointerUnchecked(
+            False, self.wm.xconn.root, self.GRAB_MASK,
+            xproto.GrabMode.Async, xproto.GrabMode.Async,
+            xproto.Window._None, xproto.Cursor._None, xproto.Time.CurrentTime
+        ).discard_reply()
+        self.wm.raise_window(window)
+        if self.wm.event_handler.get_focused_window() is not window:
+            self.wm.event_handler.set_focused_window(window)
+        return True
+        
+    def handle_motion(self, event: xproto.MotionNotifyEvent) -> bool:
+        """Chỉ ghi lại vị trí mới nhất; geometry được áp dụng ở cuối batch (gộp motion)"""
+        if not self.active:
+            return False
+        if self.pending is not None:
+            self.compressed += 1
+        self.pending = (event.root_x, event.root_y)
+        return True
+        
+    def handle_button_release(self, event: xproto.ButtonReleaseEvent) -> bool:
+        """Kết thúc kéo: áp dụng vị trí cuối cùng rồi nhả grab"""
+        if not self.active:
+            return False
+        self.pending = (event.root_x, event.root_y)
+        self._apply()
+        self.cancel()
+        return True
+        
+    def cancel(self):
+        """Nhả grab và bỏ trạng thái kéo"""
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        self.window = None
+        self.pending = None
+        self.wm.xconn.conn.core.UngrabPointer(xproto.Time.CurrentTime)
+        self.wm.xconn.flush()
+        
+    def on_batch_end(self):
+        """Cuối batch: áp dụng nếu đã qua một khung hình, không thì hẹn giờ cho khung kế tiếp"""
+        if self.pending is None or self.timer:
+            return
+        due = self.last_apply + self.frame_interval
+        if time.monotonic() >= due:
+            self._apply()
+        else:
+            self.timer = self.wm.loop.call_at(due, self._on_timer)
+            
+    def _on_timer(self):
+        self.timer = None
+        self._apply()
+        
+    def _apply(self):
+        """Gửi một ConfigureWindow cho vị trí con trỏ mới nhất"""
+        if self.pending is None or not self.active:
+            return
+        if not self.wm.event_handler.get_window(self.window.window_id):
+            # Cửa sổ bị đóng trong lúc kéo
+            self.cancel()
+            return
+        dx = self.pending[0] - self.origin[0]
+        dy = self.pending[1] - self.origin[1]
+        x, y, width, height = self.start_geometry
+        if self.resizing:
+            width = max(self.MIN_SIZE, width + dx)
+            height = max(self.MIN_SIZE, height + dy)
+        else:
+            x += dx
+            y += dy
+        self.pending = None
+        self.last_apply = time.monotonic()
+        if (x, y, width, height) != self.window.geometry:
+            self.window.set_geometry(x, y, width, height)
@@ -0,0 +1,95 @@
+import xcffib.xproto as xproto
+from typing import Dict, Tuple
+from .conn import XConnection
+from .hooks import Hooks
+
+class EventMaskManager:
+    """Event mask tối thiểu cho root và cửa sổ client, tính từ các tính năng đang bật"""
+    
+    # Luôn cần: quản lý cửa sổ (MapRequest/ConfigureRequest) và theo dõi map/unmap/destroy
+    ROOT_BASE = xproto.EventMask.SubstructureRedirect | xproto.EventMask.SubstructureNotify
+    # Cache tiêu đề (frame, tab), WM_PROTOCOLS và icon cập nhật theo PropertyNotify
+    CLIENT_BASE = xproto.EventMask.PropertyChange
+    
+    def __init__(self, xconn: XConnection, hooks: Hooks):
+        self.xconn = xconn
+        self.hooks = hooks
+        self.event_handler = None  # Được WindowManager gán sau khi khởi tạo
+        # Tên tính năng -> (bit cần trên root, bit cần trên mỗi client)
+        self.features: Dict[str, Tuple[int, int]] = {}
+        self.root_mask = self.ROOT_BASE
+        self.client_mask = self.CLIENT_BASE
+        self.root_selected = False
+        self.hooks.subscribe('window', self._on_window)
+        
+    def start(self):
+        """Chọn mask trên root; lỗi BadAccess (đã có WM khác) được raise cho caller"""
+        self.root_mask = self._compute()[0]
+        self.xconn.conn.core.ChangeWindowAttributesChecked(
+            self.xconn.root, xproto.CW.EventMask, [self.root_mask]
+        ).check()
+        self.root_selected = True
+        
+    def set_feature(self, name: str, root: int = 0, client: int = 0):
+        """Bật/cập nhật một tính năng cần thêm event (root=0 và client=0 tương đương tắt)"""
+        if root or client:
+            if self.features.get(name) == (root, client):
+                return
+            self.features[name] = (root, client)
+        elif self.features.pop(name, None) is None:
+            return
+        self.update()
+        
+    def clear_feature(self, name: str):
+        self.set_feature(name)
+        
+    def configure(self, config):
+        """Đồng bộ các tính năng phụ thuộc config (gọi khi khởi động và khi reload)"""
+        if config.get("window.focus_follows_mouse", False):
+            self.set_feature('focus_follows_mouse', client=xproto.EventMask.EnterWindow)
+        else:
+            self.clear_feature('focus_follows_mouse')
+            
+    def _compute(self) -> Tuple[int, int]:
+        root, client = self.ROOT_BASE, self.CLIENT_BASE
+        for root_bits, client_bits in self.features.values():
+            root |= root_bits
+            client |= client_bits
+        return root, client
+        
+    def update(self):
+        """Tính lại mask, chỉ gửi ChangeWindowAttributes cho những gì thay đổi"""
+        root, client = self._compute()
+        core = self.xconn.conn.core
+        if root != self.root_mask:
+            self.root_mask = root
+            if self.root_selected:
+                core.ChangeWindowAttributes(self.xconn.root, xproto.CW.EventMask, [root])
+        if client != self.client_mask:
+            self.client_mask = client
+            if self.event_handler:
+                for window in self.event_handler.get_all_windows():
+                    self.select_client(window)
+        self.xconn.flush()
+        
+    def select_client(self, window):
+        """Đặt event mask cho cửa sổ client đang được quản lý"""
+        self.xconn.conn.core.ChangeWindowAttributes(
+            window.window_id, xproto.CW.EventMask, [self.client_mask]
+        )
+        if window.frame:
+            # Con trỏ đi vào frame (thanh tiêu đề) trước khi vào client
+            window.frame.select_input(self.client_mask & xproto.EventMask.EnterWindow)
+        
+    def _on_window(self, change: str, window):
+        # Client đã được chọn mask trong MapRequest (trước load_hints), ở đây chỉ còn frame
+        if change == 'new' and window.frame:
+            window.frame.select_input(self.client_mask & xproto.EventMask.EnterWindow)
+            
+    def get_info(self) -> dict:
+        """Mask hiện tại và các tính năng đang yêu cầu (dùng cho IPC/debug)"""
+        return {
+            'root_mask': self.root_mask,
+            'client_mask': self.client_mask,
+            'features': {name: list(masks) for name, masks in sorted(self.features.items())},
+        }
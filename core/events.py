@@ -2,15 +2,32 @@ import xcffib.xproto as xproto
 from typing import Dict, Callable, List, Optional
 from .window import Window
 from .conn import XConnection
+from .hooks import Hooks
+from .focus import FocusHistory
+from .metrics import RoundTripBudgetExceeded
+from .prefetch import ICON
+from .log import logger
 
 class EventHandler:
     """Xử lý các sự kiện từ X server"""
     
-    def __init__(self, xconn: XConnection):
+    def __init__(self, xconn: XConnection, hooks: Optional[Hooks] = None):
         self.xconn = xconn
+        self.hooks = hooks or Hooks()
         self.event_handlers: Dict[int, Callable] = {}
         self.windows: Dict[int, Window] = {}
         self.focused_window: Optional[Window] = None
+        self.focus_history = FocusHistory()
+        self.workspace_manager = None  # Được WindowManager gán sau khi khởi tạo
+        self.metrics = None  # Được WindowManager gán nếu bật metrics
+        self.drag_manager = None  # Được WindowManager gán (Mod+kéo cửa sổ floating)
+        self.pointer_focus = None  # Được WindowManager gán (focus theo chuột)
+        self.ewmh = None  # Được WindowManager gán (công bố/nhận yêu cầu EWMH)
+        self.frames = None  # Được WindowManager gán (reparent client vào frame)
+        self.prefetch = None  # Được WindowManager gán (icon, PID, tiêu đề dài đọc ở background)
+        self.event_masks = None  # Được WindowManager gán (event mask của client)
+        # Cửa sổ do chính WM tạo ra (bar...) -> object xử lý Expose/ButtonPress
+        self.internal_windows: Dict[int, object] = {}
         
         # Đăng ký các event handler mặc định
         self._register_default_handlers()
@@ -34,6 +51,7 @@ class EventHandler:
             xproto.FocusOutEvent: self._handle_focusout,
             xproto.PropertyNotifyEvent: self._handle_propertynotify,
             xproto.ClientMessageEvent: self._handle_clientmessage,
+            xproto.ExposeEvent: self._handle_expose,
         })
         
     def handle_event(self, event) -> bool:
@@ -41,30 +59,71 @@ class EventHandler:
         event_type = type(event)
         
         if event_type in self.event_handlers:
+            scope = f"event:{event_type.__name__}"
+            start = self.metrics.begin(scope) if self.metrics else None
             try:
                 return self.event_handlers[event_type](event)
+            except RoundTripBudgetExceeded:
+                raise
             except Exception as e:
-                print(f"Error handling event {event_type.__name__}: {e}")
+                logger.exception(scope, f"Error handling event {event_type.__name__}: {e}")
+            finally:
+                if start:
+                    self.metrics.end(scope, start)
                 
         return False
         
     def register_window(self, window: Window):
         """Đăng ký một cửa sổ để theo dõi"""
         self.windows[window.window_id] = window
+        self.focus_history.add(window)
         
     def unregister_window(self, window_id: int):
         """Hủy đăng ký một cửa sổ"""
         if window_id in self.windows:
-            del self.windows[window_id]
+            window = self.windows.pop(window_id)
+            self.focus_history.remove(window)
             if self.focused_window and self.focused_window.window_id == window_id:
+                # Trả focus cho cửa sổ được dùng gần nhất trên cùng workspace (O(1))
                 self.focused_window = None
+                self.set_focused_window(self.focus_history.most_recent(window.workspace))
+            self.hooks.emit('window', 'close', window)
                 
+    def register_internal_window(self, window_id: int, owner):
+        """Đăng ký cửa sổ nội bộ của WM (owner có handle_expose/handle_button)"""
+        self.internal_windows[window_id] = owner
+        
+    def unregister_internal_window(self, window_id: int):
+        """Hủy đăng ký cửa sổ nội bộ"""
+        self.internal_windows.pop(window_id, None)
+        
+    def swap_windows(self, first: Window, second: Window):
+        """Đổi chỗ hai cửa sổ trong thứ tự quản lý (thứ tự này quyết định vị trí tiling)"""
+        if first.window_id not in self.windows or second.window_id not in self.windows:
+            return
+        order = list(self.windows.values())
+        i, j = order.index(first), order.index(second)
+        order[i], order[j] = order[j], order[i]
+        self.windows = {w.window_id: w for w in order}
+        
     def get_window(self, window_id: int) -> Optional[Window]:
         """Lấy window theo ID"""
         return self.windows.get(window_id)
         
-    def set_focused_window(self, window: Optional[Window]):
-        """Đặt cửa sổ được focus"""
+    def find_window(self, window_id: int) -> Optional[Window]:
+        """Lấy window theo ID của client hoặc của frame bọc nó (cho event con trỏ)"""
+        window = self.windows.get(window_id)
+        if window is None and self.frames:
+            window = self.frames.client_of(window_id)
+        return window
+        
+    def set_focused_window(self, window: Optional[Window], record: bool = True):
+        """Đặt cửa sổ được focus (record=False: không cập nhật MRU, dùng khi alt-tab)"""
+        if window is not None and window is self.focused_window:
+            # Không đổi focus: không gửi SetInputFocus/đổi màu border
+            if record:
+                self.focus_history.touch(window)
+            return
         if self.focused_window:
             self.focused_window.is_focused = False
             # Cập nhật border color
@@ -72,11 +131,15 @@ class EventHandler:
             
         self.focused_window = window
         if window:
+            if record:
+                self.focus_history.touch(window)
             window.is_focused = True
             window.focus()
             # Cập nhật border color
             window.set_border_color(0xff005577)
             
+        self.hooks.emit('focus', window)
+            
     def get_focused_window(self) -> Optional[Window]:
         """Lấy cửa sổ đang được focus"""
         return self.focused_window
@@ -89,26 +152,34 @@ class EventHandler:
         
     def _handle_buttonpress(self, event: xproto.ButtonPressEvent) -> bool:
         """Xử lý mouse button press"""
-        window = self.get_window(event.child)
+        owner = self.internal_windows.get(event.event)
+        if owner:
+            owner.handle_button(event)
+            return True
+        if self.drag_manager and self.drag_manager.handle_button_press(event):
+            return True
+            
+        window = self.find_window(event.child)
         if window:
             self.set_focused_window(window)
         return True
         
     def _handle_buttonrelease(self, event: xproto.ButtonReleaseEvent) -> bool:
         """Xử lý mouse button release"""
+        if self.drag_manager:
+            self.drag_manager.handle_button_release(event)
         return True
         
     def _handle_motionnotify(self, event: xproto.MotionNotifyEvent) -> bool:
-        """Xử lý mouse motion"""
-        # TODO: Implement window dragging
+        """Xử lý mouse motion (đang kéo thì chỉ ghi lại vị trí mới nhất)"""
+        if self.drag_manager:
+            self.drag_manager.handle_motion(event)
         return True
         
     def _handle_enternotify(self, event: xproto.EnterNotifyEvent) -> bool:
-        """Xử lý mouse enter window"""
-        window = self.get_window(event.window)
-        from config import config
-        if window and config.is_auto_focus_enabled():
-            self.set_focused_window(window)
+        """Xử lý mouse enter window (focus theo chuột, có debounce)"""
+        if self.pointer_focus:
+            self.pointer_focus.handle_enter(event)
         return True
         
     def _handle_leavenotify(self, event: xproto.LeaveNotifyEvent) -> bool:
@@ -122,14 +193,35 @@ class EventHandler:
         
     def _handle_destroynotify(self, event: xproto.DestroyNotifyEvent) -> bool:
         """Xử lý window destroy"""
+        window = self.get_window(event.window)
+        if window:
+            window.is_destroyed = True
+        elif self.frames:
+            self.frames.handle_destroy(event.window)
         self.unregister_window(event.window)
         return True
         
     def _handle_maprequest(self, event: xproto.MapRequestEvent) -> bool:
         """Xử lý window map request"""
         # Tạo Window object mới và đăng ký
+        window = self.get_window(event.window)
+        if window:
+            # Cửa sổ đã được quản lý (ví dụ đang ẩn ở workspace khác)
+            if not self.workspace_manager or self.workspace_manager.is_visible(window.workspace):
+                window.map()
+            return True
+            
         window = Window(self.xconn, event.window)
+        window.workspace = self.workspace_manager.current if self.workspace_manager else 0
         self.register_window(window)
+        if self.event_masks:
+            # Chọn PropertyChange trước khi đọc hint: thay đổi xảy ra sau lần đọc vẫn có PropertyNotify
+            self.event_masks.select_client(window)
+        if self.prefetch:
+            self.prefetch.attach(window)
+        window.load_hints()
+        if self.frames:
+            self.frames.attach(window)
         
         # Set border
         from config import config
@@ -143,20 +235,27 @@ class EventHandler:
         if not self.focused_window:
             self.set_focused_window(window)
             
+        self.hooks.emit('window', 'new', window)
         return True
         
     def _handle_unmapnotify(self, event: xproto.UnmapNotifyEvent) -> bool:
         """Xử lý window unmap"""
         window = self.get_window(event.window)
         if window:
-            window.unmap()
+            if window.ignore_unmaps > 0:
+                # Unmap do chính WM gây ra (chuyển workspace, monocle...)
+                window.ignore_unmaps -= 1
+            else:
+                # Client tự unmap (withdrawn) - ngừng quản lý cửa sổ
+                window.is_mapped = False
+                self.unregister_window(window.window_id)
         return True
         
     def _handle_configurerequest(self, event: xproto.ConfigureRequestEvent) -> bool:
         """Xử lý window configure request"""
         window = self.get_window(event.window)
-        if window and not window.is_floating:
-            # Từ chối configure request cho tiling windows
+        if window and (not window.is_floating or window.is_fullscreen or window.is_hidden):
+            # Từ chối configure request cho tiling/fullscreen/đang ẩn windows
             # WM sẽ quản lý geometry
             return True
         else:
@@ -166,9 +265,12 @@ class EventHandler:
     def _handle_configurenotify(self, event: xproto.ConfigureNotifyEvent) -> bool:
         """Xử lý window configure notify"""
         window = self.get_window(event.window)
-        if window:
-            # Cập nhật geometry
-            window.geometry = (event.x, event.y, event.width, event.height)
+        if window and not window.frame and not window.is_hidden:
+            # Cập nhật geometry (cửa sổ có frame: geometry là của frame, do WM đặt)
+            geometry = (event.x, event.y, event.width, event.height)
+            if geometry != window.geometry:
+                window.geometry = geometry
+                self.hooks.emit('geometry', window)
         return True
         
     def _handle_focusin(self, event: xproto.FocusInEvent) -> bool:
@@ -187,14 +289,29 @@ class EventHandler:
         window = self.get_window(event.window)
         if window:
             # Xử lý các property thay đổi như WM_NAME, _NET_WM_NAME, etc.
-            if event.atom == xproto.Atom.WM_NAME or event.atom == xproto.Atom._NET_WM_NAME:
-                # Window title thay đổi, có thể cập nhật status bar
-                pass
+            if event.atom == xproto.Atom.WM_NAME or event.atom == self.xconn.get_atom('_NET_WM_NAME'):
+                # Window title thay đổi: cập nhật cache, bar chỉ vẽ lại phần title
+                if window.refresh_title():
+                    self.hooks.emit('window', 'title', window)
+            elif event.atom == self.xconn.get_atom('WM_PROTOCOLS'):
+                window.refresh_protocols()
+            elif event.atom == self.xconn.get_atom('_NET_WM_ICON') and self.prefetch:
+                # Icon có thể lớn hàng trăm KB: đọc và decode ở background
+                self.prefetch.request(window, ICON)
         return True
         
     def _handle_clientmessage(self, event: xproto.ClientMessageEvent) -> bool:
         """Xử lý client message"""
-        # Xử lý các message như _NET_WM_STATE, _NET_CURRENT_DESKTOP, etc.
+        # _NET_ACTIVE_WINDOW, _NET_CLOSE_WINDOW, _NET_WM_STATE, _NET_CURRENT_DESKTOP
+        if self.ewmh:
+            self.ewmh.handle_client_message(event)
+        return True
+        
+    def _handle_expose(self, event: xproto.ExposeEvent) -> bool:
+        """Xử lý expose của các cửa sổ nội bộ (bar...)"""
+        owner = self.internal_windows.get(event.window)
+        if owner:
+            owner.handle_expose(event)
         return True
         
     def get_all_windows(self) -> List[Window]:
@@ -203,12 +320,12 @@ class EventHandler:
         
     def get_visible_windows(self) -> List[Window]:
         """Lấy tất cả windows đang hiển thị"""
-        return [w for w in self.windows.values() if w.is_mapped]
+        return [w for w in self.windows.values() if w.is_mapped and not w.is_hidden]
         
     def get_tiling_windows(self) -> List[Window]:
         """Lấy tất cả tiling windows"""
-        return [w for w in self.windows.values() if w.is_mapped and not w.is_floating]
+        return [w for w in self.windows.values() if w.is_mapped and not w.is_floating and not w.is_hidden]
         
     def get_floating_windows(self) -> List[Window]:
         """Lấy tất cả floating windows"""
-        return [w for w in self.windows.values() if w.is_mapped and w.is_floating]
+        return [w for w in self.windows.values() if w.is_mapped and w.is_floating and not w.is_hidden]
@@ -0,0 +1,222 @@
+import struct
+import xcffib.xproto as xproto
+from typing import Dict, List, Optional, Set
+from .window import Window
+
+# Các atom EWMH mà WM hỗ trợ (công bố trong _NET_SUPPORTED)
+SUPPORTED = [
+    '_NET_SUPPORTED', '_NET_SUPPORTING_WM_CHECK', '_NET_WM_NAME',
+    '_NET_CLIENT_LIST', '_NET_CLIENT_LIST_STACKING', '_NET_ACTIVE_WINDOW',
+    '_NET_NUMBER_OF_DESKTOPS', '_NET_CURRENT_DESKTOP', '_NET_DESKTOP_NAMES',
+    '_NET_WORKAREA', '_NET_WM_DESKTOP', '_NET_CLOSE_WINDOW',
+    '_NET_WM_STATE', '_NET_WM_STATE_FULLSCREEN', '_NET_WM_STATE_HIDDEN',
+]
+ATOMS = SUPPORTED + ['UTF8_STRING', 'WM_PROTOCOLS', 'WM_DELETE_WINDOW', 'WM_STATE', 'WM_CHANGE_STATE']
+
+# WM_CHANGE_STATE: client tự yêu cầu minimize (ICCCM 4.1.4)
+ICONIC_STATE = 3
+
+# Hành động trong ClientMessage _NET_WM_STATE
+STATE_REMOVE = 0
+STATE_ADD = 1
+STATE_TOGGLE = 2
+
+class EWMHPublisher:
+    """Công bố trạng thái WM lên property của root theo EWMH, ghi mỗi property tối đa một lần mỗi batch"""
+    
+    def __init__(self, wm):
+        self.wm = wm
+        self.xconn = wm.xconn
+        self.atoms: Dict[str, int] = {}
+        self.check_window: Optional[int] = None
+        
+        # Danh sách đã ghi lên server (để biết chỉ cần PropModeAppend hay phải ghi lại)
+        self.published_clients: List[int] = []
+        self.published_stacking: List[int] = []
+        self.clients: List[int] = []  # Thứ tự quản lý
+        self.stacking: List[int] = []  # Dưới cùng trước
+        self.dirty: Set[str] = set()
+        self.dirty_desktops: Set[int] = set()  # Cửa sổ cần ghi lại _NET_WM_DESKTOP
+        self.dirty_states: Set[int] = set()  # Cửa sổ cần ghi lại _NET_WM_STATE
+        
+    def start(self):
+        """Intern atom (một round-trip), tạo cửa sổ kiểm tra và ghi trạng thái ban đầu"""
+        self.xconn.intern_atoms(ATOMS)
+        self.atoms = {name: self.xconn.atoms[name] for name in ATOMS}
+        core = self.xconn.conn.core
+        root = self.xconn.root
+        
+        # Cửa sổ _NET_SUPPORTING_WM_CHECK (không bao giờ map)
+        self.check_window = self.xconn.generate_id()
+        core.CreateWindow(
+            0, self.check_window, root, -1, -1, 1, 1, 0,
+            xproto.WindowClass.InputOnly, 0, 0, []
+        )
+        for window in (root, self.check_window):
+            self._set_atoms(window, '_NET_SUPPORTING_WM_CHECK', xproto.Atom.WINDOW, [self.check_window])
+        name = b"IArDE"
+        core.ChangeProperty(xproto.PropMode.Replace, self.check_window, self.atoms['_NET_WM_NAME'],
+                            self.atoms['UTF8_STRING'], 8, len(name), name)
+        self._set_atoms(root, '_NET_SUPPORTED', xproto.Atom.ATOM, [self.atoms[n] for n in SUPPORTED])
+        
+        hooks = self.wm.hooks
+        hooks.subscribe('window', self._on_window)
+        hooks.subscribe('focus', lambda window: self.dirty.add('_NET_ACTIVE_WINDOW'))
+        hooks.subscribe('workspace', lambda *args: self.dirty.add('_NET_CURRENT_DESKTOP'))
+        hooks.subscribe('monitor', lambda *args: self.dirty.add('_NET_WORKAREA'))
+        hooks.subscribe('stack', self._on_stack)
+        hooks.subscribe('batch_end', self.flush)
+        
+        self.dirty.update(('_NET_CLIENT_LIST', '_NET_CLIENT_LIST_STACKING', '_NET_ACTIVE_WINDOW',
+                           '_NET_NUMBER_OF_DESKTOPS', '_NET_CURRENT_DESKTOP',
+                           '_NET_DESKTOP_NAMES', '_NET_WORKAREA'))
+        for window in self.wm.event_handler.get_all_windows():
+            self._on_window('new', window)
+        self.flush()
+        
+    def stop(self):
+        """Xóa cửa sổ kiểm tra (các property trên root mất hiệu lực theo EWMH)"""
+        if self.check_window:
+            self.xconn.conn.core.DestroyWindow(self.check_window)
+            self.check_window = None
+            
+    def _set_atoms(self, window: int, name: str, type_: int, values: List[int],
+                   mode: int = xproto.PropMode.Replace):
+        data = struct.pack(f'={len(values)}I', *values)
+        self.xconn.conn.core.ChangeProperty(mode, window, self.atoms[name], type_, 32, len(values), data)
+        
+    def _on_window(self, change: str, window: Window):
+        wid = window.window_id
+        if change == 'new':
+            if self.atoms and self.atoms['_NET_WM_STATE_FULLSCREEN'] in window.net_state:
+                # Client yêu cầu fullscreen từ trước khi map
+                self.wm.set_fullscreen(window, True)
+            if wid not in self.clients:
+                self.clients.append(wid)
+                self.stacking.append(wid)
+                self.dirty.update(('_NET_CLIENT_LIST', '_NET_CLIENT_LIST_STACKING'))
+            self.dirty_desktops.add(wid)
+        elif change == 'close':
+            if wid in self.clients:
+                self.clients.remove(wid)
+                self.stacking.remove(wid)
+                self.dirty.update(('_NET_CLIENT_LIST', '_NET_CLIENT_LIST_STACKING'))
+            self.dirty_desktops.discard(wid)
+            self.dirty_states.discard(wid)
+        elif change == 'move':
+            self.dirty_desktops.add(wid)
+        elif change == 'state':
+            self.dirty_states.add(wid)
+            
+    def _on_stack(self, window: Window):
+        """Cửa sổ được raise lên trên cùng"""
+        wid = window.window_id
+        if wid in self.stacking and self.stacking[-1] != wid:
+            self.stacking.remove(wid)
+            self.stacking.append(wid)
+            self.dirty.add('_NET_CLIENT_LIST_STACKING')
+            
+    def _publish_list(self, name: str, current: List[int], published: List[int]) -> List[int]:
+        """Ghi danh sách cửa sổ: chỉ Append khi danh sách cũ là tiền tố của danh sách mới"""
+        root = self.xconn.root
+        if published and len(current) > len(published) and current[:len(published)] == published:
+            self._set_atoms(root, name, xproto.Atom.WINDOW, current[len(published):], xproto.PropMode.Append)
+        elif current != published or not published:
+            self._set_atoms(root, name, xproto.Atom.WINDOW, current)
+        return list(current)
+        
+    def flush(self):
+        """Ghi các property đã thay đổi trong batch (mỗi property một request)"""
+        if not (self.dirty or self.dirty_desktops or self.dirty_states) or not self.atoms:
+            return
+        core = self.xconn.conn.core
+        root = self.xconn.root
+        dirty, self.dirty = self.dirty, set()
+        workspaces = self.wm.workspace_manager
+        
+        if '_NET_CLIENT_LIST' in dirty:
+            self.published_clients = self._publish_list('_NET_CLIENT_LIST', self.clients,
+                                                        self.published_clients)
+        if '_NET_CLIENT_LIST_STACKING' in dirty:
+            self.published_stacking = self._publish_list('_NET_CLIENT_LIST_STACKING', self.stacking,
+                                                         self.published_stacking)
+        if '_NET_ACTIVE_WINDOW' in dirty:
+            focused = self.wm.event_handler.get_focused_window()
+            self._set_atoms(root, '_NET_ACTIVE_WINDOW', xproto.Atom.WINDOW,
+                            [focused.window_id if focused else xproto.Window._None])
+        if '_NET_NUMBER_OF_DESKTOPS' in dirty:
+            self._set_atoms(root, '_NET_NUMBER_OF_DESKTOPS', xproto.Atom.CARDINAL,
+                            [len(workspaces.workspaces)])
+        if '_NET_CURRENT_DESKTOP' in dirty:
+            self._set_atoms(root, '_NET_CURRENT_DESKTOP', xproto.Atom.CARDINAL, [workspaces.current])
+        if '_NET_DESKTOP_NAMES' in dirty:
+            names = b''.join(w.name.encode('utf-8') + b'\0' for w in workspaces.workspaces)
+            core.ChangeProperty(xproto.PropMode.Replace, root, self.atoms['_NET_DESKTOP_NAMES'],
+                                self.atoms['UTF8_STRING'], 8, len(names), names)
+        if '_NET_WORKAREA' in dirty:
+            # Vùng làm việc của màn hình primary (trừ bar), giống nhau cho mọi desktop
+            area = list(self.wm.layout_manager.get_layout_area(self.wm.monitor_manager.get_primary()))
+            self._set_atoms(root, '_NET_WORKAREA', xproto.Atom.CARDINAL, area * len(workspaces.workspaces))
+            
+        for wid in self.dirty_desktops:
+            window = self.wm.event_handler.get_window(wid)
+            if window and window.workspace is not None:
+                self._set_atoms(wid, '_NET_WM_DESKTOP', xproto.Atom.CARDINAL, [window.workspace])
+        self.dirty_desktops.clear()
+        for wid in self.dirty_states:
+            window = self.wm.event_handler.get_window(wid)
+            if window:
+                self._set_atoms(wid, '_NET_WM_STATE', xproto.Atom.ATOM, sorted(window.net_state))
+        self.dirty_states.clear()
+        
+    def handle_client_message(self, event: xproto.ClientMessageEvent) -> bool:
+        """Yêu cầu EWMH từ client/pager (chỉ dùng cache, không round-trip)"""
+        atoms = self.atoms
+        if not atoms:
+            return False
+        data = event.data.data32
+        if event.type == atoms['_NET_CURRENT_DESKTOP']:
+            if self.wm.workspace_manager.get_workspace(data[0]):
+                self.wm.switch_workspace(data[0])
+            return True
+            
+        window = self.wm.event_handler.get_window(event.window)
+        if window is None:
+            return False
+        if event.type == atoms['_NET_ACTIVE_WINDOW']:
+            self.wm.focus_window(window)
+        elif event.type == atoms['_NET_CLOSE_WINDOW']:
+            self.wm.close_window(window)
+        elif event.type == atoms['WM_CHANGE_STATE']:
+            if data[0] == ICONIC_STATE:
+                self.wm.scratchpad.hide(window)
+        elif event.type == atoms['_NET_WM_STATE']:
+            action = data[0]
+            for atom in (data[1], data[2]):
+                if atom:
+                    enabled = atom not in window.net_state if action == STATE_TOGGLE else action == STATE_ADD
+                    self.set_state(window, atom, enabled)
+        else:
+            return False
+        return True
+        
+    def set_state(self, window: Window, atom: int, enabled: bool):
+        """Bật/tắt một trạng thái _NET_WM_STATE, ghi lại property ở cuối batch"""
+        if atom == self.atoms['_NET_WM_STATE_FULLSCREEN']:
+            # Fullscreen là trạng thái layout của WM, WM cập nhật net_state
+            self.wm.set_fullscreen(window, enabled)
+            return
+        if atom == self.atoms['_NET_WM_STATE_HIDDEN']:
+            # Ẩn/hiện do scratchpad quản lý (đẩy ra ngoài màn hình, không unmap)
+            if enabled:
+                self.wm.scratchpad.hide(window)
+            else:
+                self.wm.scratchpad.show(window)
+            return
+        if (atom in window.net_state) == enabled:
+            return
+        if enabled:
+            window.net_state.add(atom)
+        else:
+            window.net_state.discard(atom)
+        self.wm.hooks.emit('window', 'state', window)
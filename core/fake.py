@@ -0,0 +1,742 @@
+import socket
+import struct
+import xcffib
+import xcffib.xproto as xproto
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from .conn import Backend
+from .keybinds import DEFAULT_KEYCODES, keysym_of
+
+ROOT_WINDOW = 0x100
+ROOT_VISUAL = 0x21
+FIRST_CLIENT_ID = 0x400000  # ID cho cửa sổ của client giả
+FIRST_WM_ID = 0x200000  # ID do generate_id() cấp cho WM
+MIN_KEYCODE = 8
+MAX_KEYCODE = 255
+CLIENT_MESSAGE = 33  # Mã event ClientMessage trên wire
+
+# Thứ tự giá trị trong value_list theo bit của mask (giống wire protocol)
+CW_FIELDS = sorted((value, name) for name, value in vars(xproto.CW).items() if not name.startswith('_'))
+CONFIG_FIELDS = sorted(
+    (value, name) for name, value in vars(xproto.ConfigWindow).items() if not name.startswith('_')
+)
+
+class FakeReply:
+    """Reply giả, các field truyền vào dạng keyword"""
+    
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+class FakeCookie:
+    """Cookie giả: reply có sẵn ngay, hoặc lỗi X raise khi reply()/check()"""
+    __slots__ = ('value', 'error', 'sequence')
+    
+    def __init__(self, value=None, error: Optional[Exception] = None):
+        self.value = value
+        self.error = error
+        self.sequence = None  # Server gán khi nhận request
+        
+    def reply(self):
+        if self.error:
+            raise self.error
+        return self.value
+        
+    def check(self):
+        if self.error:
+            raise self.error
+            
+    def discard_reply(self):
+        pass
+
+def make_list(data: bytes) -> xcffib.List:
+    """Tạo xcffib.List kiểu char (giống field value của GetPropertyReply)"""
+    return xcffib.List(xcffib.MemoryUnpacker(data), 'c', len(data))
+
+def make_error(error_class, exception_class, code: int, bad_value: int, major_opcode: int = 0):
+    """Tạo exception lỗi X giống lỗi xcffib raise (BadWindow, BadAccess...)"""
+    data = struct.pack('=BBHIHB21x', 0, code, 0, bad_value, 0, major_opcode)
+    return exception_class(error_class(xcffib.MemoryUnpacker(data)))
+
+def bad_window(window: int):
+    return make_error(xproto.WindowError, xproto.BadWindow, 3, window)
+
+def bad_access(window: int):
+    return make_error(xproto.AccessError, xproto.BadAccess, 10, window)
+
+class FakeWindow:
+    """Cửa sổ trong server giả"""
+    
+    def __init__(self, wid: int, parent: int, x: int, y: int, width: int, height: int,
+                 border_width: int = 0, override_redirect: bool = False, wm_owned: bool = False):
+        self.wid = wid
+        self.parent = parent
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.border_width = border_width
+        self.override_redirect = override_redirect
+        self.wm_owned = wm_owned  # Do WM tạo (bar, explorer...) hay do client tạo
+        self.mapped = False
+        self.event_mask = 0  # Mask do WM chọn trên cửa sổ này
+        self.attributes: Dict[str, int] = {}
+        self.properties: Dict[int, Tuple[int, int, bytes]] = {}  # atom -> (type, format, data)
+        self.children: List[int] = []  # Thứ tự stacking, cuối danh sách là trên cùng
+        self.received: List[xproto.ClientMessageEvent] = []  # ClientMessage nhận qua SendEvent
+        self.closes_on_delete = True  # Client tự đóng khi nhận WM_DELETE_WINDOW
+        
+    @property
+    def geometry(self) -> Tuple[int, int, int, int]:
+        return (self.x, self.y, self.width, self.height)
+        
+    def contains(self, x: int, y: int) -> bool:
+        return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
+
+class FakeServer:
+    """X server giả trong bộ nhớ: cửa sổ, geometry, property, map, focus và hàng đợi event"""
+    
+    def __init__(self, width: int = 1920, height: int = 1080, depth: int = 24, record: bool = True,
+                 root: int = ROOT_WINDOW):
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.root = root
+        root_window = FakeWindow(root, 0, 0, 0, width, height)
+        root_window.mapped = True
+        self.windows: Dict[int, FakeWindow] = {root: root_window}
+        
+        self.atoms: Dict[str, int] = {
+            name: value for name, value in vars(xproto.Atom).items()
+            if not name.startswith('_') and name != 'Any'
+        }
+        self.atom_names: Dict[int, str] = {value: name for name, value in self.atoms.items()}
+        self.focus = xproto.InputFocus.PointerRoot
+        self.pointer = (0, 0)
+        self.pointer_window = ROOT_WINDOW
+        self.keyboard_grabbed = False
+        self.time = 0
+        
+        # Ghi lại mọi request: số lượng theo tên và (nếu record) danh sách đầy đủ
+        self.record = record
+        self.requests: List[Tuple[str, tuple]] = []
+        self.request_counts: Dict[str, int] = {}
+        self.flushes = 0
+        # Sequence của request cuối cùng đã xử lý, event mang 16 bit thấp như X thật
+        self.sequence = 0
+        
+        self.events = deque()
+        self.next_client_id = FIRST_CLIENT_ID
+        # Cặp socket để event loop select() được trên server giả
+        self._reader, self._writer = socket.socketpair()
+        self._reader.setblocking(False)
+        self._writer.setblocking(False)
+        self._signaled = False
+        
+    # Hàng đợi event
+    def fileno(self) -> int:
+        return self._reader.fileno()
+        
+    def queue_event(self, event):
+        """Đưa event (hoặc lỗi X) vào hàng đợi của WM"""
+        if not isinstance(event, Exception):
+            event.sequence = self.sequence & 0xffff
+        self.events.append(event)
+        if not self._signaled:
+            self._signaled = True
+            try:
+                self._writer.send(b'\0')
+            except BlockingIOError:
+                pass
+                
+    def next_event(self):
+        """Lấy event kế tiếp (lỗi X được raise giống poll_for_event của xcffib)"""
+        if not self.events:
+            if self._signaled:
+                self._signaled = False
+                try:
+                    self._reader.recv(4096)
+                except BlockingIOError:
+                    pass
+            return None
+        event = self.events.popleft()
+        if isinstance(event, Exception):
+            raise event
+        return event
+        
+    def close(self):
+        self._reader.close()
+        self._writer.close()
+        
+    # Request
+    def handle_request(self, name: str, args: tuple, kwargs: dict) -> FakeCookie:
+        """Ghi lại request và chuyển cho handler tương ứng (nếu có)"""
+        base = name[:-len('Unchecked')] if name.endswith('Unchecked') else name
+        base = base[:-len('Checked')] if base.endswith('Checked') else base
+        self.sequence += 1
+        cookie = self._dispatch(name, base, args, kwargs)
+        cookie.sequence = self.sequence
+        if base in self.CROSSING_REQUESTS:
+            self._update_pointer()
+        return cookie
+        
+    def _dispatch(self, name: str, base: str, args: tuple, kwargs: dict) -> FakeCookie:
+        self.request_counts[base] = self.request_counts.get(base, 0) + 1
+        if self.record:
+            self.requests.append((base, args))
+        handler = getattr(self, f'_req_{base}', None)
+        if handler is None:
+            return FakeCookie()
+        try:
+            return handler(*args, **kwargs) or FakeCookie()
+        except xcffib.Error as error:
+            if name.endswith('Checked') or base in self.REPLY_REQUESTS:
+                return FakeCookie(error=error)
+            # Lỗi của request không có reply đến sau qua hàng đợi event
+            self.queue_event(error)
+            return FakeCookie()
+            
+    # Request có thể đổi cửa sổ dưới con trỏ (sinh Leave/Enter khi con trỏ đứng yên)
+    CROSSING_REQUESTS = {'MapWindow', 'UnmapWindow', 'ConfigureWindow', 'DestroyWindow', 'ReparentWindow'}
+    
+    REPLY_REQUESTS = {
+        'GetGeometry', 'GetWindowAttributes', 'QueryTree', 'GetProperty', 'InternAtom',
+        'GetAtomName', 'GetInputFocus', 'QueryPointer', 'QueryExtension', 'QueryFont',
+        'GrabKeyboard', 'GrabPointer', 'GetKeyboardMapping',
+    }
+    
+    def clear_requests(self):
+        self.requests.clear()
+        self.request_counts.clear()
+        self.flushes = 0
+        
+    def count_requests(self, name: Optional[str] = None) -> int:
+        """Số request đã nhận (theo tên, hoặc tất cả)"""
+        if name is None:
+            return sum(self.request_counts.values())
+        return self.request_counts.get(name, 0)
+        
+    def _window(self, wid: int) -> FakeWindow:
+        window = self.windows.get(wid)
+        if window is None:
+            raise bad_window(wid)
+        return window
+        
+    def _tick(self) -> int:
+        self.time += 1
+        return self.time
+        
+    def _apply_attributes(self, window: FakeWindow, value_mask: int, value_list: list):
+        values = iter(value_list)
+        for bit, name in CW_FIELDS:
+            if int(value_mask) & bit:
+                value = next(values)
+                if name == 'EventMask':
+                    window.event_mask = value
+                elif name == 'OverrideRedirect':
+                    window.override_redirect = bool(value)
+                else:
+                    window.attributes[name] = value
+                    
+    def _structure_event(self, window: FakeWindow, make: Callable[[int], object]):
+        """Gửi event cấu trúc (Map/Unmap/Configure/Destroy) theo StructureNotify/SubstructureNotify"""
+        if window.event_mask & xproto.EventMask.StructureNotify:
+            self.queue_event(make(window.wid))
+        parent = self.windows.get(window.parent)
+        if parent and parent.event_mask & xproto.EventMask.SubstructureNotify:
+            self.queue_event(make(parent.wid))
+            
+    def _redirected(self, window: FakeWindow) -> bool:
+        """Request của client trên cửa sổ này có bị chuyển cho WM không"""
+        parent = self.windows.get(window.parent)
+        return (not window.override_redirect and parent is not None and
+                bool(parent.event_mask & xproto.EventMask.SubstructureRedirect))
+                
+    def _map(self, window: FakeWindow):
+        if window.mapped:
+            return
+        window.mapped = True
+        self._structure_event(window, lambda event: xproto.MapNotifyEvent.synthetic(
+            event, window.wid, window.override_redirect))
+        if window.event_mask & xproto.EventMask.Exposure:
+            self.queue_event(xproto.ExposeEvent.synthetic(window.wid, 0, 0, window.width, window.height, 0))
+            
+    def _unmap(self, window: FakeWindow):
+        if not window.mapped:
+            return
+        window.mapped = False
+        if self.focus == window.wid:
+            self.focus = xproto.InputFocus.PointerRoot
+        self._structure_event(window, lambda event: xproto.UnmapNotifyEvent.synthetic(
+            event, window.wid, False))
+            
+    def _destroy(self, window: FakeWindow):
+        for child in list(window.children):
+            if child in self.windows:
+                self._destroy(self.windows[child])
+        self._unmap(window)
+        self._structure_event(window, lambda event: xproto.DestroyNotifyEvent.synthetic(event, window.wid))
+        parent = self.windows.get(window.parent)
+        if parent and window.wid in parent.children:
+            parent.children.remove(window.wid)
+        del self.windows[window.wid]
+        
+    def _configure(self, window: FakeWindow, changes: Dict[str, int]):
+        window.x = changes.get('X', window.x)
+        window.y = changes.get('Y', window.y)
+        window.width = changes.get('Width', window.width)
+        window.height = changes.get('Height', window.height)
+        window.border_width = changes.get('BorderWidth', window.border_width)
+        parent = self.windows.get(window.parent)
+        if 'StackMode' in changes and parent:
+            parent.children.remove(window.wid)
+            if changes['StackMode'] == xproto.StackMode.Above:
+                parent.children.append(window.wid)
+            else:
+                parent.children.insert(0, window.wid)
+        self._structure_event(window, lambda event: xproto.ConfigureNotifyEvent.synthetic(
+            event, window.wid, 0, window.x, window.y, window.width, window.height,
+            window.border_width, window.override_redirect))
+            
+    def _set_property(self, window: FakeWindow, atom: int, type_: int, format_: int, data: bytes, mode: int):
+        old = window.properties.get(atom)
+        if old and mode != xproto.PropMode.Replace:
+            data = old[2] + data if mode == xproto.PropMode.Append else data + old[2]
+        window.properties[atom] = (type_, format_, data)
+        if window.event_mask & xproto.EventMask.PropertyChange:
+            self.queue_event(xproto.PropertyNotifyEvent.synthetic(
+                window.wid, atom, self._tick(), xproto.Property.NewValue))
+                
+    # Handler cho các request của WM (tên giống method của xcffib)
+    def _req_CreateWindow(self, depth, wid, parent, x, y, width, height, border_width,
+                          _class, visual, value_mask, value_list):
+        parent_window = self._window(parent)
+        window = FakeWindow(wid, parent, x, y, width, height, border_width, wm_owned=True)
+        self._apply_attributes(window, value_mask, value_list)
+        self.windows[wid] = window
+        parent_window.children.append(wid)
+        if parent_window.event_mask & xproto.EventMask.SubstructureNotify:
+            self.queue_event(xproto.CreateNotifyEvent.synthetic(
+                parent, wid, x, y, width, height, border_width, window.override_redirect))
+                
+    def _req_ChangeWindowAttributes(self, window, value_mask, value_list):
+        target = self._window(window)
+        if int(value_mask) & xproto.CW.EventMask and target.wid == self.root:
+            # Chỉ một client được chọn SubstructureRedirect trên root
+            index = [bit for bit, _ in CW_FIELDS if int(value_mask) & bit].index(xproto.CW.EventMask)
+            if (value_list[index] & xproto.EventMask.SubstructureRedirect and
+                    getattr(self, 'other_wm', False)):
+                raise bad_access(window)
+        self._apply_attributes(target, value_mask, value_list)
+        
+    def _req_DestroyWindow(self, window):
+        self._destroy(self._window(window))
+        
+    def _req_MapWindow(self, window):
+        self._map(self._window(window))
+        
+    def _req_UnmapWindow(self, window):
+        self._unmap(self._window(window))
+        
+    def _req_ReparentWindow(self, window, parent, x, y):
+        target = self._window(window)
+        new_parent = self._window(parent)
+        was_mapped = target.mapped
+        self._unmap(target)
+        old_parent = self.windows.get(target.parent)
+        if old_parent and target.wid in old_parent.children:
+            old_parent.children.remove(target.wid)
+        make = lambda event: xproto.ReparentNotifyEvent.synthetic(
+            event, target.wid, parent, x, y, target.override_redirect)
+        if target.event_mask & xproto.EventMask.StructureNotify:
+            self.queue_event(make(target.wid))
+        for notified in (old_parent, new_parent):
+            if notified and notified.event_mask & xproto.EventMask.SubstructureNotify:
+                self.queue_event(make(notified.wid))
+        target.parent = parent
+        target.x, target.y = x, y
+        new_parent.children.append(target.wid)
+        if was_mapped:
+            self._map(target)
+            
+    def _req_ConfigureWindow(self, window, value_mask, value_list):
+        target = self._window(window)
+        values = iter(value_list)
+        changes = {name: next(values) for bit, name in CONFIG_FIELDS if int(value_mask) & bit}
+        self._configure(target, changes)
+        
+    def _req_GetGeometry(self, drawable):
+        window = self._window(drawable)
+        return FakeCookie(FakeReply(
+            depth=self.depth, root=self.root, x=window.x, y=window.y,
+            width=window.width, height=window.height, border_width=window.border_width,
+        ))
+        
+    def _req_GetWindowAttributes(self, window):
+        target = self._window(window)
+        return FakeCookie(FakeReply(
+            map_state=xproto.MapState.Viewable if target.mapped else xproto.MapState.Unmapped,
+            override_redirect=target.override_redirect, _class=xproto.WindowClass.InputOutput,
+            your_event_mask=target.event_mask, all_event_masks=target.event_mask,
+            visual=ROOT_VISUAL,
+        ))
+        
+    def _req_QueryTree(self, window):
+        target = self._window(window)
+        return FakeCookie(FakeReply(
+            root=self.root, parent=target.parent,
+            children_len=len(target.children), children=list(target.children),
+        ))
+        
+    def _req_GetProperty(self, delete, window, property, type, long_offset, long_length):
+        target = self._window(window)
+        stored = target.properties.get(property)
+        if stored is None:
+            return FakeCookie(FakeReply(format=0, type=0, bytes_after=0, value_len=0, value=make_list(b'')))
+        prop_type, prop_format, data = stored
+        if type not in (xproto.GetPropertyType.Any, prop_type):
+            return FakeCookie(FakeReply(
+                format=prop_format, type=prop_type, bytes_after=len(data), value_len=0, value=make_list(b'')
+            ))
+        chunk = data[4 * long_offset:4 * (long_offset + long_length)]
+        bytes_after = max(0, len(data) - 4 * long_offset - len(chunk))
+        if delete and not bytes_after:
+            del target.properties[property]
+        return FakeCookie(FakeReply(
+            format=prop_format, type=prop_type, bytes_after=bytes_after,
+            value_len=len(chunk) // max(1, prop_format // 8), value=make_list(chunk),
+        ))
+        
+    def _req_ChangeProperty(self, mode, window, property, type, format, data_len, data):
+        self._set_property(self._window(window), property, type, format, xcffib.pack_list(data, "c"), mode)
+        
+    def _req_DeleteProperty(self, window, property):
+        target = self._window(window)
+        if target.properties.pop(property, None) and target.event_mask & xproto.EventMask.PropertyChange:
+            self.queue_event(xproto.PropertyNotifyEvent.synthetic(
+                window, property, self._tick(), xproto.Property.Delete))
+                
+    def _req_InternAtom(self, only_if_exists, name_len, name):
+        if isinstance(name, bytes):
+            name = name.decode('latin-1')
+        atom = self.atoms.get(name)
+        if atom is None and not only_if_exists:
+            atom = max(self.atom_names) + 1
+            self.atoms[name] = atom
+            self.atom_names[atom] = name
+        return FakeCookie(FakeReply(atom=atom or 0))
+        
+    def _req_GetAtomName(self, atom):
+        name = self.atom_names.get(atom, '').encode('latin-1')
+        return FakeCookie(FakeReply(name_len=len(name), name=make_list(name)))
+        
+    def _req_GetKeyboardMapping(self, first_keycode, count):
+        # Layout US: cột 0 không Shift, cột 1 có Shift (chữ hoa)
+        keysyms = [0] * (2 * count)
+        for name, keycode in DEFAULT_KEYCODES.items():
+            index = keycode - first_keycode
+            if 0 <= index < count:
+                keysym = keysym_of(name)
+                keysyms[2 * index] = keysym
+                keysyms[2 * index + 1] = ord(name.upper()) if name.isalpha() and len(name) == 1 else keysym
+        return FakeCookie(FakeReply(keysyms_per_keycode=2, keysyms=keysyms))
+        
+    def _req_SetInputFocus(self, revert_to, focus, time):
+        if focus not in (xproto.InputFocus._None, xproto.InputFocus.PointerRoot):
+            self._window(focus)
+        self.focus = focus
+        
+    def _req_GetInputFocus(self):
+        return FakeCookie(FakeReply(revert_to=xproto.InputFocus.PointerRoot, focus=self.focus))
+        
+    def _req_QueryPointer(self, window):
+        x, y = self.pointer
+        child = self.toplevel_at(x, y)
+        return FakeCookie(FakeReply(
+            same_screen=True, root=self.root, child=child or 0,
+            root_x=x, root_y=y, win_x=x, win_y=y, mask=0,
+        ))
+        
+    def _req_QueryExtension(self, name_len, name):
+        # Server giả không có extension nào (RandR... dùng đường fallback)
+        return FakeCookie(FakeReply(present=False, major_opcode=0, first_event=0, first_error=0))
+        
+    def _req_QueryFont(self, font):
+        return FakeCookie(FakeReply(
+            max_bounds=FakeReply(character_width=6), min_bounds=FakeReply(character_width=6),
+            font_ascent=10, font_descent=3,
+        ))
+        
+    def _req_GrabKeyboard(self, owner_events, grab_window, time, pointer_mode, keyboard_mode):
+        self.keyboard_grabbed = True
+        return FakeCookie(FakeReply(status=xproto.GrabStatus.Success))
+        
+    def _req_UngrabKeyboard(self, time):
+        self.keyboard_grabbed = False
+        
+    def _req_GrabPointer(self, *args):
+        return FakeCookie(FakeReply(status=xproto.GrabStatus.Success))
+        
+    def _req_KillClient(self, resource):
+        window = self.windows.get(resource)
+        if window and not window.wm_owned:
+            self._destroy(window)
+            
+    def _req_SendEvent(self, propagate, destination, event_mask, event):
+        data = xcffib.pack_list(event, "c")
+        if len(data) != 32:
+            raise make_error(xproto.LengthError, xproto.BadLength, 16, 0, 25)
+        target = self._window(destination)
+        if data[0] & 0x7f != CLIENT_MESSAGE:
+            return
+        message = xproto.ClientMessageEvent(xcffib.MemoryUnpacker(data))
+        target.received.append(message)
+        delete = self.atoms.get('WM_DELETE_WINDOW')
+        if (message.type == self.atoms.get('WM_PROTOCOLS') and delete is not None and
+                message.data.data32[0] == delete and target.closes_on_delete):
+            # Client lịch sự: tự hủy cửa sổ khi được yêu cầu đóng
+            self._destroy(target)
+            
+    # Phía client: mô phỏng ứng dụng và thiết bị nhập
+    def intern(self, name: str) -> int:
+        """Atom theo tên (tạo mới nếu chưa có)"""
+        return self._req_InternAtom(False, len(name), name).reply().atom
+        
+    def create_client(self, x: int = 0, y: int = 0, width: int = 640, height: int = 480,
+                      title: Optional[str] = None, wm_class: Optional[str] = None,
+                      override_redirect: bool = False, closes_on_delete: bool = True,
+                      wid: Optional[int] = None, protocols: Sequence[str] = ('WM_DELETE_WINDOW',)) -> int:
+        """Client tạo một cửa sổ top-level (chưa map), wid cho trước khi dựng lại từ trace"""
+        if wid is None:
+            wid = self.next_client_id
+            self.next_client_id += 1
+        root = self.windows[self.root]
+        window = FakeWindow(wid, self.root, x, y, width, height, override_redirect=override_redirect)
+        window.closes_on_delete = closes_on_delete
+        self.windows[wid] = window
+        root.children.append(wid)
+        if root.event_mask & xproto.EventMask.SubstructureNotify:
+            self.queue_event(xproto.CreateNotifyEvent.synthetic(
+                self.root, wid, x, y, width, height, 0, override_redirect))
+        if title is not None:
+            self.set_title(wid, title)
+        if wm_class is not None:
+            data = f"{wm_class.lower()}\0{wm_class}\0".encode('latin-1')
+            self._set_property(window, xproto.Atom.WM_CLASS, xproto.Atom.STRING, 8, data, xproto.PropMode.Replace)
+        if protocols:
+            atoms = struct.pack(f'={len(protocols)}I', *(self.intern(name) for name in protocols))
+            self._set_property(window, self.intern('WM_PROTOCOLS'), xproto.Atom.ATOM, 32, atoms,
+                               xproto.PropMode.Replace)
+        return wid
+        
+    def map_client(self, wid: int):
+        """Client map cửa sổ (thành MapRequest nếu có WM)"""
+        window = self._window(wid)
+        if self._redirected(window):
+            self.queue_event(xproto.MapRequestEvent.synthetic(window.parent, wid))
+        else:
+            self._map(window)
+            self._update_pointer()
+            
+    def unmap_client(self, wid: int):
+        """Client tự unmap cửa sổ (withdraw)"""
+        self._unmap(self._window(wid))
+        self._update_pointer()
+        
+    def destroy_client(self, wid: int):
+        """Client hủy cửa sổ"""
+        self._destroy(self._window(wid))
+        self._update_pointer()
+        
+    def configure_client(self, wid: int, **changes: int):
+        """Client đổi geometry (thành ConfigureRequest nếu có WM), ví dụ configure_client(w, x=10, width=300)"""
+        window = self._window(wid)
+        fields = {name.lower(): (bit, name) for bit, name in CONFIG_FIELDS}
+        changes = {fields[key][1]: value for key, value in changes.items()}
+        if self._redirected(window):
+            mask = 0
+            for bit, name in CONFIG_FIELDS:
+                if name in changes:
+                    mask |= bit
+            self.queue_event(xproto.ConfigureRequestEvent.synthetic(
+                changes.get('StackMode', 0), window.parent, wid, changes.get('Sibling', 0),
+                changes.get('X', window.x), changes.get('Y', window.y),
+                changes.get('Width', window.width), changes.get('Height', window.height),
+                changes.get('BorderWidth', window.border_width), mask,
+            ))
+        else:
+            self._configure(window, changes)
+            self._update_pointer()
+            
+    def set_property(self, wid: int, name: str, type_name: str, format_: int, data,
+                     mode: int = xproto.PropMode.Replace):
+        """Client đặt property (data là bytes, str hoặc list int)"""
+        self._set_property(self._window(wid), self.intern(name), self.intern(type_name),
+                           format_, xcffib.pack_list(data, "c"), mode)
+                           
+    def set_title(self, wid: int, title: str):
+        """Client đặt tiêu đề (_NET_WM_NAME và WM_NAME)"""
+        self.set_property(wid, '_NET_WM_NAME', 'UTF8_STRING', 8, title.encode('utf-8'))
+        self.set_property(wid, 'WM_NAME', 'STRING', 8, title.encode('latin-1', 'replace'))
+        
+    def toplevel_at(self, x: int, y: int) -> Optional[int]:
+        """Cửa sổ top-level đang map ở điểm (x, y), trên cùng trước"""
+        for wid in reversed(self.windows[self.root].children):
+            window = self.windows[wid]
+            if window.mapped and window.contains(x, y):
+                return wid
+        return None
+        
+    def _deliver_input(self, mask: int, make: Callable[[int, int], object], start: Optional[int] = None):
+        """Gửi event nhập cho cửa sổ đầu tiên chọn mask, đi từ cửa sổ dưới con trỏ lên root"""
+        wid = start if start is not None else (self.toplevel_at(*self.pointer) or self.root)
+        child = 0
+        while wid:
+            window = self.windows.get(wid)
+            if window is None:
+                return
+            if window.event_mask & mask:
+                self.queue_event(make(wid, child))
+                return
+            child, wid = wid, window.parent
+            
+    def _pointer_event(self, event_class, detail: int, state: int, event: int, child: int):
+        x, y = self.pointer
+        window = self.windows[event]
+        return event_class.synthetic(
+            detail, self._tick(), self.root, event, child, x, y,
+            x - window.x if event != self.root else x, y - window.y if event != self.root else y,
+            state, True,
+        )
+        
+    def key_press(self, keycode: int, state: int = 0, release: bool = True):
+        """Nhấn (và nhả) một phím; WM grab phím trên root nên event đến root"""
+        child = self.toplevel_at(*self.pointer) or 0
+        self.queue_event(self._pointer_event(xproto.KeyPressEvent, keycode, state, self.root, child))
+        if release:
+            self.queue_event(self._pointer_event(xproto.KeyReleaseEvent, keycode, state, self.root, child))
+            
+    def key_release(self, keycode: int, state: int = 0):
+        child = self.toplevel_at(*self.pointer) or 0
+        self.queue_event(self._pointer_event(xproto.KeyReleaseEvent, keycode, state, self.root, child))
+        
+    def button_press(self, button: int, x: int, y: int, state: int = 0, release: bool = True):
+        """Click chuột tại (x, y)"""
+        self.motion(x, y)
+        self._deliver_input(xproto.EventMask.ButtonPress, lambda event, child: self._pointer_event(
+            xproto.ButtonPressEvent, button, state, event, child))
+        if release:
+            self._deliver_input(xproto.EventMask.ButtonRelease, lambda event, child: self._pointer_event(
+                xproto.ButtonReleaseEvent, button, state, event, child))
+                
+    def motion(self, x: int, y: int, state: int = 0):
+        """Di chuyển con trỏ, sinh Leave/Enter khi đổi cửa sổ top-level"""
+        self.pointer = (x, y)
+        self._update_pointer(state)
+        self._deliver_input(xproto.EventMask.PointerMotion, lambda event, child: self._pointer_event(
+            xproto.MotionNotifyEvent, xproto.Motion.Normal, state, event, child))
+            
+    def _update_pointer(self, state: int = 0):
+        """Sinh Leave/Enter nếu cửa sổ top-level dưới con trỏ đã đổi (con trỏ di chuyển hoặc cửa sổ đổi chỗ)"""
+        target = self.toplevel_at(*self.pointer) or self.root
+        if target == self.pointer_window:
+            return
+        old = self.windows.get(self.pointer_window)
+        if old and old.event_mask & xproto.EventMask.LeaveWindow:
+            self.queue_event(self._crossing_event(xproto.LeaveNotifyEvent, old.wid, state))
+        self.pointer_window = target
+        if self.windows[target].event_mask & xproto.EventMask.EnterWindow:
+            self.queue_event(self._crossing_event(xproto.EnterNotifyEvent, target, state))
+            
+    def _crossing_event(self, event_class, wid: int, state: int):
+        x, y = self.pointer
+        window = self.windows[wid]
+        return event_class.synthetic(
+            xproto.NotifyDetail.Nonlinear, self._tick(), self.root, wid, 0, x, y,
+            x - window.x, y - window.y, state, xproto.NotifyMode.Normal, 1,
+        )
+        
+    def client_message(self, wid: int, type_name: str, data32: List[int], to_root: bool = True):
+        """Client gửi ClientMessage (ví dụ yêu cầu EWMH) lên root cho WM"""
+        data = xproto.ClientMessageData.synthetic((list(data32) + [0] * 5)[:5], "5I")
+        event = xproto.ClientMessageEvent.synthetic(32, wid, self.intern(type_name), data)
+        destination = self.windows[self.root if to_root else wid]
+        mask = xproto.EventMask.SubstructureRedirect | xproto.EventMask.SubstructureNotify
+        if destination.event_mask & mask or not to_root:
+            self.queue_event(event)
+            
+    def inject(self, event):
+        """Đưa trực tiếp một event bất kỳ vào hàng đợi"""
+        self.queue_event(event)
+
+class FakeExtension:
+    """Core protocol giả: mọi request đi qua server để được ghi lại"""
+    
+    def __init__(self, server: FakeServer):
+        self.server = server
+        
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        server = self.server
+        
+        def request(*args, **kwargs):
+            kwargs.pop('is_checked', None)
+            return server.handle_request(name, args, kwargs)
+            
+        self.__dict__[name] = request
+        return request
+
+class FakeConnection:
+    """Thay thế xcffib.Connection, nối tới FakeServer"""
+    
+    def __init__(self, server: FakeServer):
+        self.server = server
+        self.core = FakeExtension(server)
+        self.pref_screen = 0
+        self.next_id = FIRST_WM_ID
+        screen = FakeReply(
+            root=server.root, width_in_pixels=server.width, height_in_pixels=server.height,
+            root_depth=server.depth, root_visual=ROOT_VISUAL,
+            white_pixel=0xffffff, black_pixel=0,
+        )
+        self.setup = FakeReply(roots=[screen], min_keycode=MIN_KEYCODE, max_keycode=MAX_KEYCODE)
+        
+    def __call__(self, key):
+        raise xcffib.ExtensionException(f"Extension not available on fake server: {key}")
+        
+    def get_setup(self):
+        return self.setup
+        
+    def generate_id(self) -> int:
+        self.next_id += 1
+        return self.next_id
+        
+    def flush(self):
+        self.server.flushes += 1
+        
+    def poll_for_event(self):
+        return self.server.next_event()
+        
+    def wait_for_event(self):
+        event = self.server.next_event()
+        if event is None:
+            raise xcffib.ConnectionException()
+        return event
+        
+    def get_file_descriptor(self) -> int:
+        return self.server.fileno()
+        
+    def has_error(self) -> bool:
+        return False
+        
+    def disconnect(self):
+        pass
+
+class FakeBackend(Backend):
+    """Backend chạy WM không cần X server (test, benchmark)"""
+    
+    def __init__(self, server: Optional[FakeServer] = None):
+        self.server = server or FakeServer()
+        
+    def connect(self) -> FakeConnection:
+        return FakeConnection(self.server)
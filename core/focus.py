@@ -0,0 +1,241 @@
+import xcffib.xproto as xproto
+from typing import Dict, Iterator, List, Optional
+from .window import Window
+
+class FocusNode:
+    """Node trong danh sách MRU liên kết đôi"""
+    __slots__ = ('window', 'prev', 'next')
+    
+    def __init__(self, window: Optional[Window]):
+        self.window = window
+        self.prev: 'FocusNode' = self
+        self.next: 'FocusNode' = self
+
+class FocusHistory:
+    """Lịch sử focus MRU theo workspace (danh sách liên kết đôi, mọi thao tác O(1))"""
+    
+    def __init__(self):
+        self.nodes: Dict[int, FocusNode] = {}
+        self.sentinels: Dict[int, FocusNode] = {}
+        self.workspaces: Dict[int, int] = {}  # window_id -> workspace của node
+        
+    def _sentinel(self, workspace: int) -> FocusNode:
+        sentinel = self.sentinels.get(workspace)
+        if sentinel is None:
+            sentinel = FocusNode(None)
+            self.sentinels[workspace] = sentinel
+        return sentinel
+        
+    @staticmethod
+    def _unlink(node: FocusNode):
+        node.prev.next = node.next
+        node.next.prev = node.prev
+        node.prev = node.next = node
+        
+    @staticmethod
+    def _insert_after(anchor: FocusNode, node: FocusNode):
+        node.prev = anchor
+        node.next = anchor.next
+        anchor.next.prev = node
+        anchor.next = node
+        
+    def add(self, window: Window):
+        """Thêm cửa sổ mới vào cuối danh sách của workspace"""
+        if window.window_id in self.nodes:
+            return
+        node = FocusNode(window)
+        self.nodes[window.window_id] = node
+        self.workspaces[window.window_id] = window.workspace
+        sentinel = self._sentinel(window.workspace)
+        self._insert_after(sentinel.prev, node)
+        
+    def touch(self, window: Window):
+        """Đưa cửa sổ lên đầu danh sách MRU của workspace"""
+        node = self.nodes.get(window.window_id)
+        if node is None:
+            self.add(window)
+            node = self.nodes[window.window_id]
+        elif self.workspaces[window.window_id] != window.workspace:
+            self.move(window)
+        self._unlink(node)
+        self._insert_after(self._sentinel(window.workspace), node)
+        
+    def remove(self, window: Window):
+        """Xóa cửa sổ khỏi lịch sử"""
+        node = self.nodes.pop(window.window_id, None)
+        if node:
+            self.workspaces.pop(window.window_id, None)
+            self._unlink(node)
+            
+    def move(self, window: Window):
+        """Chuyển node sang danh sách của workspace mới (window.workspace)"""
+        node = self.nodes.get(window.window_id)
+        if node is None:
+            self.add(window)
+            return
+        self._unlink(node)
+        self.workspaces[window.window_id] = window.workspace
+        self._insert_after(self._sentinel(window.workspace), node)
+        
+    def most_recent(self, workspace: int, exclude: Optional[Window] = None) -> Optional[Window]:
+        """Cửa sổ được focus gần nhất của workspace (bỏ qua `exclude` và cửa sổ đang ẩn)"""
+        sentinel = self.sentinels.get(workspace)
+        if sentinel is None:
+            return None
+        node = sentinel.next
+        while node is not sentinel and (node.window is exclude or node.window.is_hidden):
+            node = node.next
+        return node.window
+        
+    def step(self, window: Window, direction: int = 1) -> Optional[Window]:
+        """Cửa sổ kế tiếp (direction=1, cũ hơn) hoặc trước đó (-1) trong MRU, có vòng lại"""
+        node = self.nodes.get(window.window_id)
+        if node is None:
+            return None
+        nxt = node.next if direction > 0 else node.prev
+        # Bỏ qua sentinel (vòng lại đầu/cuối danh sách) và cửa sổ đang ẩn
+        while nxt is not node and (nxt.window is None or nxt.window.is_hidden):
+            nxt = nxt.next if direction > 0 else nxt.prev
+        return nxt.window if nxt is not node else None
+        
+    def iter_workspace(self, workspace: int) -> Iterator[Window]:
+        """Duyệt các cửa sổ của workspace theo thứ tự MRU"""
+        sentinel = self.sentinels.get(workspace)
+        if sentinel is None:
+            return
+        node = sentinel.next
+        while node is not sentinel:
+            # Lấy next trước để caller có thể xóa node đang duyệt
+            nxt = node.next
+            yield node.window
+            node = nxt
+            
+    def get_windows(self, workspace: int) -> List[Window]:
+        """Danh sách cửa sổ của workspace theo thứ tự MRU"""
+        return list(self.iter_workspace(workspace))
+
+class FocusCycler:
+    """Alt-tab: duyệt MRU khi giữ modifier, chỉ cập nhật MRU khi nhả modifier"""
+    
+    def __init__(self, wm):
+        self.wm = wm
+        self.active = False
+        self.origin: Optional[Window] = None
+        self.cursor: Optional[Window] = None
+        
+    def step(self, direction: int = 1):
+        """Chuyển focus sang cửa sổ kế tiếp trong MRU (bắt đầu chu kỳ nếu chưa)"""
+        event_handler = self.wm.event_handler
+        history = event_handler.focus_history
+        
+        if not self.active:
+            self.origin = event_handler.get_focused_window()
+            self.cursor = self.origin
+            if self.cursor is None:
+                self.cursor = history.most_recent(self.wm.workspace_manager.current)
+                if self.cursor is None:
+                    return
+                event_handler.set_focused_window(self.cursor, record=False)
+                self.origin = self.cursor
+            self.active = True
+            # Grab bàn phím để nhận KeyRelease của modifier
+            self.wm.xconn.conn.core.GrabKeyboardUnchecked(
+                False, self.wm.xconn.root, xproto.Time.CurrentTime,
+                xproto.GrabMode.Async, xproto.GrabMode.Async
+            ).discard_reply()
+            self.wm.key_grabber = self
+            
+        nxt = history.step(self.cursor, direction)
+        if nxt:
+            self.cursor = nxt
+            self.wm.raise_window(nxt)
+            event_handler.set_focused_window(nxt, record=False)
+            
+    def _finish(self):
+        self.active = False
+        self.wm.xconn.conn.core.UngrabKeyboard(xproto.Time.CurrentTime)
+        if self.wm.key_grabber is self:
+            self.wm.key_grabber = None
+            
+    def commit(self):
+        """Kết thúc chu kỳ, cửa sổ đang chọn lên đầu MRU"""
+        if not self.active:
+            return
+        self._finish()
+        if self.cursor and self.wm.event_handler.get_window(self.cursor.window_id):
+            self.wm.event_handler.focus_history.touch(self.cursor)
+            
+    def cancel(self):
+        """Hủy chu kỳ, trả focus về cửa sổ ban đầu"""
+        if not self.active:
+            return
+        self._finish()
+        if self.origin and self.wm.event_handler.get_window(self.origin.window_id):
+            self.wm.raise_window(self.origin)
+            self.wm.event_handler.set_focused_window(self.origin)
+            
+    def handle_key(self, event: xproto.KeyPressEvent):
+        """Tab (hoặc Shift+Tab) tiếp tục duyệt, Escape hủy"""
+        keys = self.wm.keybind_manager.key_symbols
+        if event.detail == keys['Tab']:
+            self.step(-1 if event.state & xproto.ModMask.Shift else 1)
+        elif event.detail == keys['Escape']:
+            self.cancel()
+            
+    def handle_key_release(self, event: xproto.KeyReleaseEvent):
+        """Nhả Alt thì chốt lựa chọn"""
+        keys = self.wm.keybind_manager.key_symbols
+        # Alt có thể được nhả trước khi GrabKeyboard có hiệu lực (KeyRelease của Alt đi tới client):
+        # phím nào được nhả mà state không còn Mod1 cũng kết thúc chu kỳ
+        if (event.detail in (keys.get('Alt_L'), keys.get('Alt_R')) or
+                not event.state & xproto.ModMask._1):
+            self.commit()
+
+class FocusFollowsMouse:
+    """Focus theo chuột: bỏ crossing do WM gây ra, chỉ focus cửa sổ con trỏ dừng lại cuối cùng"""
+    
+    def __init__(self, wm):
+        self.wm = wm
+        self.pending: Optional[Window] = None
+        self.timer = None
+        self.suppressed = 0  # Số EnterNotify bị bỏ qua hoặc gộp
+        
+    @property
+    def enabled(self) -> bool:
+        return self.wm.config.is_focus_follows_mouse_enabled()
+        
+    def handle_enter(self, event: xproto.EnterNotifyEvent) -> bool:
+        """Ghi nhận cửa sổ con trỏ vừa vào, focus sau khi con trỏ dừng đủ lâu"""
+        if not self.enabled:
+            return False
+        window = self.wm.event_handler.find_window(event.event)
+        if (window is None or event.mode != xproto.NotifyMode.Normal or
+                event.detail == xproto.NotifyDetail.Inferior):
+            # Crossing do grab/ungrab (kéo cửa sổ, alt-tab...) hoặc từ cửa sổ con
+            self.suppressed += 1
+            return False
+        if (self.wm.xconn.caused_by_wm(event.sequence) or self.wm.key_grabber or
+                self.wm.drag_manager.active):
+            # Sinh trước khi X xử lý xong configure/map/unmap/restack cuối cùng của WM:
+            # cửa sổ di chuyển tới dưới con trỏ chứ không phải người dùng di chuột
+            self.suppressed += 1
+            return False
+            
+        if self.timer:
+            self.timer.cancel()
+            self.suppressed += 1
+        self.pending = window
+        delay = self.wm.config.get("window.focus_follows_mouse_delay", 0.03)
+        self.timer = self.wm.loop.call_later(delay, self._apply)
+        return True
+        
+    def _apply(self):
+        """Hết thời gian debounce: focus cửa sổ cuối cùng (nếu còn và chưa được focus)"""
+        self.timer = None
+        window, self.pending = self.pending, None
+        event_handler = self.wm.event_handler
+        if (window is None or event_handler.get_window(window.window_id) is not window or
+                not window.is_mapped or event_handler.get_focused_window() is window):
+            return
+        event_handler.set_focused_window(window)
+        self.wm.xconn.flush()
@@ -0,0 +1,295 @@
+import xcffib.xproto as xproto
+from typing import Dict, List, Optional, Set
+from .window import Window
+
+class Frame:
+    """Cửa sổ khung do WM sở hữu, bọc một client và có pixmap cho thanh tiêu đề"""
+    
+    EVENT_MASK = (xproto.EventMask.SubstructureRedirect | xproto.EventMask.SubstructureNotify |
+                  xproto.EventMask.Exposure | xproto.EventMask.ButtonPress)
+                  
+    def __init__(self, manager: 'FrameManager', window_id: int, pixmap: int):
+        self.manager = manager
+        self.xconn = manager.xconn
+        self.window_id = window_id
+        self.pixmap = pixmap
+        self.pixmap_width = 0  # 0 = pixmap chưa được tạo trên server
+        self.client: Optional[Window] = None
+        self.event_mask = self.EVENT_MASK
+        
+    @property
+    def title_height(self) -> int:
+        """Chiều cao thanh tiêu đề hiện tại (ẩn khi fullscreen)"""
+        if self.client and self.client.is_fullscreen:
+            return 0
+        return self.manager.title_height
+        
+    def configure(self, x: int, y: int, width: int, height: int):
+        """Configure frame và client thành một cặp request liền nhau"""
+        core = self.xconn.conn.core
+        title = self.title_height
+        client_height = max(1, height - title)
+        old = self.client.geometry
+        self.xconn.note_crossing(core.ConfigureWindow(
+            self.window_id,
+            xproto.ConfigWindow.X | xproto.ConfigWindow.Y |
+            xproto.ConfigWindow.Width | xproto.ConfigWindow.Height,
+            [x, y, width, height]
+        ))
+        core.ConfigureWindow(
+            self.client.window_id,
+            xproto.ConfigWindow.X | xproto.ConfigWindow.Y |
+            xproto.ConfigWindow.Width | xproto.ConfigWindow.Height,
+            [0, title, width, client_height]
+        )
+        if old and old[2:] == (width, height):
+            # Chỉ di chuyển: client không nhận ConfigureNotify thật, gửi bản synthetic (ICCCM 4.1.5)
+            event = xproto.ConfigureNotifyEvent.synthetic(
+                self.client.window_id, self.client.window_id, xproto.Window._None,
+                x + self.client.border_width, y + title + self.client.border_width,
+                width, client_height, 0, False
+            )
+            core.SendEvent(False, self.client.window_id, xproto.EventMask.StructureNotify, event.pack())
+        if width > self.pixmap_width:
+            self.manager.dirty.add(self)
+            
+    def select_input(self, extra: int):
+        """Thêm event (ví dụ EnterWindow cho focus theo chuột) vào mask của frame"""
+        mask = self.EVENT_MASK | extra
+        if mask != self.event_mask:
+            self.event_mask = mask
+            self.xconn.conn.core.ChangeWindowAttributes(self.window_id, xproto.CW.EventMask, [mask])
+            
+    def draw(self):
+        """Vẽ tiêu đề vào pixmap rồi copy lên frame"""
+        client = self.client
+        title = self.title_height
+        if client is None or not title or not client.geometry:
+            return
+        manager = self.manager
+        core = self.xconn.conn.core
+        width = client.geometry[2]
+        if width > self.pixmap_width:
+            # Pixmap nhỏ hơn frame: tạo lại với cùng ID
+            if self.pixmap_width:
+                core.FreePixmap(self.pixmap)
+            core.CreatePixmap(self.xconn.screen_depth, self.pixmap, self.window_id, width, manager.title_height)
+            self.pixmap_width = width
+            
+        focused = client.is_focused
+        bg = manager.colors['focused' if focused else 'unfocused']
+        fg = manager.colors['text' if focused else 'text_unfocused']
+        core.ChangeGC(manager.gc, xproto.GC.Foreground, [bg])
+        core.PolyFillRectangle(self.pixmap, manager.gc, 1, [xproto.RECTANGLE.synthetic(0, 0, width, title)])
+        text = client.get_title()
+        capacity = max(0, (width - 2 * manager.PADDING) // manager.char_width)
+        if len(text) > capacity:
+            text = text[:max(0, capacity - 1)] + '~' if capacity else ''
+        data = text[:255].encode('latin-1', 'replace')
+        if data:
+            core.ChangeGC(manager.gc, xproto.GC.Foreground | xproto.GC.Background, [fg, bg])
+            baseline = (title + manager.font_ascent - manager.font_descent) // 2
+            core.ImageText8(len(data), self.pixmap, manager.gc, manager.PADDING, baseline, data)
+        core.CopyArea(self.pixmap, self.window_id, manager.gc, 0, 0, 0, 0, width, title)
+
+class FrameManager:
+    """Reparent client vào frame của WM; frame (ID và pixmap) được lấy từ pool và tái sử dụng"""
+    
+    PADDING = 4
+    FONT = "fixed"
+    
+    def __init__(self, wm):
+        self.wm = wm
+        self.xconn = wm.xconn
+        self.enabled = wm.config.get("frame.enabled", False)
+        self.title_height = wm.config.get("frame.title_height", 18)
+        self.pool_size = wm.config.get("frame.pool_size", 16)
+        self.colors = {
+            name: wm.config.get(f"frame.colors.{name}", default) & 0xffffff
+            for name, default in (('focused', 0xff005577), ('unfocused', 0xff333333),
+                                  ('text', 0xffffffff), ('text_unfocused', 0xffaaaaaa))
+        }
+        self.pool: List[Frame] = []  # Frame rảnh (đã unmap, không có client)
+        self.frames: Dict[int, Frame] = {}  # ID frame -> frame đang dùng
+        self.dirty: Set[Frame] = set()  # Frame cần vẽ lại tiêu đề ở cuối batch
+        self.focused: Optional[Frame] = None
+        # Client tự unmap (withdraw) trong batch: chỉ reparent về root ở cuối batch nếu chưa bị hủy
+        self.withdrawn: Dict[int, Window] = {}
+        self.created = 0
+        self.reused = 0
+        
+        self.gc = None
+        self.font = None
+        self.char_width = 6
+        self.font_ascent = 10
+        self.font_descent = 3
+        
+    def start(self):
+        """Mở font, tạo GC dùng chung và đăng ký hook"""
+        if not self.enabled:
+            return
+        core = self.xconn.conn.core
+        self.font = self.xconn.generate_id()
+        core.OpenFont(self.font, len(self.FONT), self.FONT)
+        font_info = core.QueryFont(self.font).reply()
+        self.char_width = font_info.max_bounds.character_width or self.char_width
+        self.font_ascent = font_info.font_ascent
+        self.font_descent = font_info.font_descent
+        self.gc = self.xconn.generate_id()
+        core.CreateGC(
+            self.gc, self.xconn.root,
+            xproto.GC.Foreground | xproto.GC.Background | xproto.GC.Font | xproto.GC.GraphicsExposures,
+            [0, 0, self.font, 0]
+        )
+        hooks = self.wm.hooks
+        hooks.subscribe('window', self._on_window)
+        hooks.subscribe('focus', self._on_focus)
+        hooks.subscribe('batch_end', self.render)
+        
+    def stop(self):
+        """Trả client về root (để chúng sống sót khi WM thoát) và giải phóng mọi frame"""
+        if not self.gc:
+            return
+        for frame in list(self.frames.values()):
+            client = frame.client
+            self.detach(client)
+            client.map()
+        core = self.xconn.conn.core
+        for frame in self.pool:
+            self._destroy(frame)
+        self.pool.clear()
+        core.FreeGC(self.gc)
+        core.CloseFont(self.font)
+        self.gc = None
+        
+    def client_of(self, frame_id: int) -> Optional[Window]:
+        """Client nằm trong frame có ID này"""
+        frame = self.frames.get(frame_id)
+        return frame.client if frame else None
+        
+    def _acquire(self) -> Frame:
+        """Lấy frame từ pool, chỉ tạo cửa sổ mới khi pool rỗng"""
+        if self.pool:
+            self.reused += 1
+            return self.pool.pop()
+        core = self.xconn.conn.core
+        window_id = self.xconn.generate_id()
+        core.CreateWindow(
+            self.xconn.screen_depth, window_id, self.xconn.root, 0, 0, 1, 1, 0,
+            xproto.WindowClass.InputOutput, self.xconn.screen.root_visual,
+            xproto.CW.BackPixel | xproto.CW.EventMask,
+            [self.colors['unfocused'], Frame.EVENT_MASK]
+        )
+        self.created += 1
+        return Frame(self, window_id, self.xconn.generate_id())
+        
+    def _destroy(self, frame: Frame):
+        core = self.xconn.conn.core
+        if frame.pixmap_width:
+            core.FreePixmap(frame.pixmap)
+        core.DestroyWindow(frame.window_id)
+        self.xconn.release_id(frame.pixmap)
+        self.xconn.release_id(frame.window_id)
+        
+    def attach(self, window: Window):
+        """Reparent client (chưa map) vào một frame, gọi trước khi map lần đầu"""
+        if not self.gc or window.frame:
+            return
+        frame = self._acquire()
+        frame.client = window
+        window.frame = frame
+        self.frames[frame.window_id] = frame
+        self.wm.event_handler.register_internal_window(frame.window_id, self)
+        core = self.xconn.conn.core
+        # Client đi ra khỏi cây cửa sổ khi WM thoát bất thường thay vì bị hủy cùng frame
+        core.ChangeSaveSet(xproto.SetMode.Insert, window.window_id)
+        core.ReparentWindow(window.window_id, frame.window_id, 0, frame.title_height)
+        core.ConfigureWindow(window.window_id, xproto.ConfigWindow.BorderWidth, [0])
+        core.MapWindow(window.window_id)
+        masks = self.wm.event_masks
+        frame.select_input(masks.client_mask & xproto.EventMask.EnterWindow)
+        self.dirty.add(frame)
+        
+    def detach(self, window: Window, unmap: bool = True):
+        """Tách client khỏi frame và trả frame về pool (hoặc hủy nếu pool đã đầy)"""
+        frame = window.frame
+        if frame is None:
+            return
+        core = self.xconn.conn.core
+        if unmap:
+            self.xconn.note_crossing(core.UnmapWindow(frame.window_id))
+        if not window.is_destroyed:
+            # Client tự withdraw: trả về root ở vị trí hiện tại
+            x, y = window.geometry[:2] if window.geometry else (0, 0)
+            core.ReparentWindow(window.window_id, self.xconn.root, x, y)
+            core.ChangeSaveSet(xproto.SetMode.Delete, window.window_id)
+        window.frame = None
+        frame.client = None
+        self.frames.pop(frame.window_id, None)
+        self.dirty.discard(frame)
+        self.wm.event_handler.unregister_internal_window(frame.window_id)
+        if len(self.pool) < self.pool_size:
+            self.pool.append(frame)
+        else:
+            self._destroy(frame)
+            
+    def handle_destroy(self, window_id: int):
+        """DestroyNotify của client đã withdraw trong cùng batch: không cần reparent về root"""
+        window = self.withdrawn.get(window_id)
+        if window:
+            window.is_destroyed = True
+            
+    def _on_window(self, change: str, window: Window):
+        if change == 'close':
+            if window.is_destroyed or not window.frame:
+                self.detach(window)
+            else:
+                # UnmapNotify đến trước DestroyNotify khi client hủy cửa sổ: chờ hết batch
+                self.xconn.note_crossing(self.xconn.conn.core.UnmapWindow(window.frame.window_id))
+                self.withdrawn[window.window_id] = window
+        elif change in ('title', 'state') and window.frame:
+            self.dirty.add(window.frame)
+            
+    def _on_focus(self, window: Optional[Window]):
+        # Đổi focus: chỉ vẽ lại tiêu đề của frame cũ và mới
+        if self.focused in self.frames.values():
+            self.dirty.add(self.focused)
+        self.focused = window.frame if window else None
+        if self.focused:
+            self.dirty.add(self.focused)
+            
+    def render(self):
+        """Trả frame của client đã withdraw về pool, vẽ lại tiêu đề của các frame đã thay đổi"""
+        if self.withdrawn:
+            withdrawn, self.withdrawn = self.withdrawn, {}
+            for window in withdrawn.values():
+                self.detach(window, unmap=False)
+        if not self.dirty:
+            return
+        dirty, self.dirty = self.dirty, set()
+        for frame in dirty:
+            if frame.client and frame.client.is_mapped:
+                frame.draw()
+                
+    def handle_expose(self, event):
+        """Expose: copy lại thanh tiêu đề từ pixmap"""
+        frame = self.frames.get(event.window)
+        if frame is None:
+            return
+        if frame.pixmap_width:
+            self.xconn.conn.core.CopyArea(
+                frame.pixmap, frame.window_id, self.gc,
+                event.x, event.y, event.x, event.y, event.width, event.height
+            )
+        else:
+            self.dirty.add(frame)
+            
+    def handle_button(self, event):
+        """Click vào thanh tiêu đề: focus client"""
+        window = self.client_of(event.event)
+        if window:
+            self.wm.focus_window(window)
+            
+    def get_info(self) -> dict:
+        return {'active': len(self.frames), 'pooled': len(self.pool),
+                'created': self.created, 'reused': self.reused}
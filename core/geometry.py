@@ -0,0 +1,217 @@
+import math
+from array import array
+from itertools import chain
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+Rect = Tuple[int, int, int, int]
+# Cửa sổ chưa có geometry: không trùng với rect hợp lệ nào
+NO_RECT = (-1, -1, 0, 0)
+
+def spiral_rects(n: int, area: Rect, ratio: float = 0.5) -> List[Rect]:
+    """Layout spiral: mỗi cửa sổ lấy `ratio` phần còn lại, lần lượt trái/trên/phải/dưới (tuần tự nên dùng chung)"""
+    x, y, width, height = area
+    rects = []
+    for i in range(n):
+        if i == n - 1:
+            rects.append((x, y, width, height))
+            break
+        side = i % 4
+        if side in (0, 2):
+            part = max(1, int(width * ratio))
+            rest = max(1, width - part)
+            if side == 0:
+                rects.append((x, y, part, height))
+                x += part
+            else:
+                rects.append((x + rest, y, part, height))
+            width = rest
+        else:
+            part = max(1, int(height * ratio))
+            rest = max(1, height - part)
+            if side == 1:
+                rects.append((x, y, width, part))
+                y += part
+            else:
+                rects.append((x, y + rest, width, part))
+            height = rest
+    return rects
+
+def inset_rect(rect: Rect, gap: int, border: int) -> Rect:
+    """Một rect: chừa gap xung quanh và trừ viền như kernel inset (cho layout không dùng kernel)"""
+    x, y, width, height = rect
+    shrink = 2 * (gap + border)
+    return (x + gap, y + gap, max(1, width - shrink), max(1, height - shrink))
+
+def grid_shape(n: int) -> Tuple[int, int]:
+    """(số cột, số hàng) gần vuông nhất cho n cửa sổ"""
+    cols = math.ceil(math.sqrt(n))
+    return cols, math.ceil(n / cols)
+
+class PythonKernels:
+    """Kernel thuần Python: rect lưu phẳng trong array('i') (x, y, w, h liên tiếp)"""
+    
+    name = 'python'
+    
+    @staticmethod
+    def tiling(n: int, area: Rect, ratio: float) -> array:
+        x, y, width, height = area
+        if n == 1:
+            return array('i', area)
+        master = int(width * ratio)
+        row = height // (n - 1)
+        rects = [x, y, master, height]
+        for i in range(n - 1):
+            top = y + i * row
+            rects += (x + master, top, width - master, row if i < n - 2 else y + height - top)
+        return array('i', rects)
+        
+    @staticmethod
+    def stack(n: int, area: Rect) -> array:
+        x, y, width, height = area
+        column = width // n
+        rects = []
+        for i in range(n):
+            left = x + i * column
+            rects += (left, y, column if i < n - 1 else x + width - left, height)
+        return array('i', rects)
+        
+    @staticmethod
+    def grid(n: int, area: Rect) -> array:
+        x, y, width, height = area
+        cols, rows = grid_shape(n)
+        row_height = height // rows
+        rects = []
+        for r in range(rows):
+            count = cols if r < rows - 1 else n - cols * (rows - 1)
+            column = width // count
+            top = y + r * row_height
+            cell_height = row_height if r < rows - 1 else y + height - top
+            for c in range(count):
+                left = x + c * column
+                rects += (left, top, column if c < count - 1 else x + width - left, cell_height)
+        return array('i', rects)
+        
+    @staticmethod
+    def spiral(n: int, area: Rect, ratio: float = 0.5) -> array:
+        return array('i', chain.from_iterable(spiral_rects(n, area, ratio)))
+        
+    @staticmethod
+    def inset(rects: array, gap: int, border: int) -> array:
+        """Chừa khoảng gap quanh mỗi cửa sổ và trừ viền (X không tính viền vào width/height)"""
+        if not gap and not border:
+            return rects
+        shrink = 2 * (gap + border)
+        out = array('i', rects)
+        for i in range(0, len(out), 4):
+            out[i] += gap
+            out[i + 1] += gap
+            out[i + 2] = max(1, out[i + 2] - shrink)
+            out[i + 3] = max(1, out[i + 3] - shrink)
+        return out
+        
+    @staticmethod
+    def pack(geometries: Sequence[Optional[Rect]]) -> array:
+        return array('i', chain.from_iterable(g or NO_RECT for g in geometries))
+        
+    @staticmethod
+    def changed(new: array, old: array) -> List[int]:
+        """Index các rect khác nhau (so sánh cả mảng trước, giống hệt thì không duyệt)"""
+        if new == old:
+            return []
+        if len(new) != len(old):
+            return list(range(len(new) // 4))
+        return [i // 4 for i in range(0, len(new), 4) if new[i:i + 4] != old[i:i + 4]]
+        
+    @staticmethod
+    def rect(rects: array, index: int) -> Rect:
+        return tuple(rects[4 * index:4 * index + 4])
+
+class NumpyKernels:
+    """Kernel NumPy: rect là mảng int32 liên tục dạng (n, 4), mỗi bước là một phép toán trên cả mảng"""
+    
+    name = 'numpy'
+    
+    @staticmethod
+    def tiling(n: int, area: Rect, ratio: float):
+        x, y, width, height = area
+        out = numpy.empty((n, 4), dtype=numpy.int32)
+        out[0] = area
+        if n == 1:
+            return out
+        master = int(width * ratio)
+        row = height // (n - 1)
+        out[0, 2] = master
+        stack = out[1:]
+        stack[:, 0] = x + master
+        stack[:, 1] = y + numpy.arange(n - 1, dtype=numpy.int32) * row
+        stack[:, 2] = width - master
+        stack[:, 3] = row
+        stack[-1, 3] = y + height - stack[-1, 1]
+        return out
+        
+    @staticmethod
+    def stack(n: int, area: Rect):
+        x, y, width, height = area
+        column = width // n
+        out = numpy.empty((n, 4), dtype=numpy.int32)
+        out[:, 0] = x + numpy.arange(n, dtype=numpy.int32) * column
+        out[:, 1] = y
+        out[:, 2] = column
+        out[:, 3] = height
+        out[-1, 2] = x + width - out[-1, 0]
+        return out
+        
+    @staticmethod
+    def grid(n: int, area: Rect):
+        x, y, width, height = area
+        cols, rows = grid_shape(n)
+        index = numpy.arange(n, dtype=numpy.int32)
+        r, c = index // cols, index % cols
+        last_row = r == rows - 1
+        count = numpy.where(last_row, n - cols * (rows - 1), cols)
+        column = width // count
+        row_height = height // rows
+        out = numpy.empty((n, 4), dtype=numpy.int32)
+        out[:, 0] = x + c * column
+        out[:, 1] = y + r * row_height
+        out[:, 2] = numpy.where(c == count - 1, x + width - out[:, 0], column)
+        out[:, 3] = numpy.where(last_row, y + height - out[:, 1], row_height)
+        return out
+        
+    @staticmethod
+    def spiral(n: int, area: Rect, ratio: float = 0.5):
+        return numpy.array(spiral_rects(n, area, ratio), dtype=numpy.int32).reshape(n, 4)
+        
+    @staticmethod
+    def inset(rects, gap: int, border: int):
+        if not gap and not border:
+            return rects
+        out = rects.copy()
+        out[:, :2] += gap
+        numpy.maximum(out[:, 2:] - 2 * (gap + border), 1, out=out[:, 2:])
+        return out
+        
+    @staticmethod
+    def pack(geometries: Sequence[Optional[Rect]]):
+        return numpy.array([g or NO_RECT for g in geometries], dtype=numpy.int32).reshape(-1, 4)
+        
+    @staticmethod
+    def changed(new, old) -> List[int]:
+        if new.shape != old.shape:
+            return list(range(len(new)))
+        return numpy.flatnonzero((new != old).any(axis=1)).tolist()
+        
+    @staticmethod
+    def rect(rects, index: int) -> Rect:
+        return tuple(rects[index].tolist())
+
+def select_kernels(n: int, threshold: int, enabled: bool = True):
+    """Kernel NumPy khi có numpy và đủ nhiều cửa sổ (ít cửa sổ thì Python nhanh hơn overhead của numpy)"""
+    if enabled and numpy is not None and n >= threshold:
+        return NumpyKernels
+    return PythonKernels
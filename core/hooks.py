@@ -0,0 +1,30 @@
+from typing import Callable, Dict, List
+from .log import logger
+
+class Hooks:
+    """Bus sự kiện nội bộ của WM (focus, window, layout, workspace...)"""
+    
+    def __init__(self):
+        self.listeners: Dict[str, List[Callable]] = {}
+        
+    def subscribe(self, name: str, callback: Callable):
+        """Đăng ký callback cho một loại sự kiện"""
+        self.listeners.setdefault(name, []).append(callback)
+        
+    def unsubscribe(self, name: str, callback: Callable):
+        """Hủy đăng ký callback"""
+        callbacks = self.listeners.get(name)
+        if callbacks and callback in callbacks:
+            callbacks.remove(callback)
+            
+    def has_listeners(self, name: str) -> bool:
+        """Kiểm tra có callback nào đang nghe sự kiện không"""
+        return bool(self.listeners.get(name))
+        
+    def emit(self, name: str, *args):
+        """Phát sự kiện đến tất cả callback đã đăng ký"""
+        for callback in self.listeners.get(name, ()):
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.exception(f"hook:{name}", f"Error in hook '{name}': {e}")
@@ -0,0 +1,516 @@
+import json
+import os
+import socket
+import struct
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from .log import logger
+
+# Header của mỗi message: magic, codec, type, độ dài payload
+MAGIC = b'iarde'
+HEADER = struct.Struct('<5sBBI')
+MAX_MESSAGE_SIZE = 1 << 20
+EVENT_BIT = 0x80
+
+class Codec:
+    """Kiểu mã hóa payload"""
+    JSON = 0
+    BINARY = 1
+
+class MessageType:
+    """Các loại message client gửi lên server"""
+    COMMAND = 0
+    GET_TREE = 1
+    GET_WORKSPACES = 2
+    GET_WINDOWS = 3
+    GET_STATUS = 4
+    SUBSCRIBE = 5
+    GET_OUTPUTS = 6
+    GET_METRICS = 7
+    GET_LOG = 8
+
+class EventType:
+    """Các loại event server đẩy xuống subscriber (type | EVENT_BIT)"""
+    FOCUS = 0
+    WINDOW = 1
+    LAYOUT = 2
+    WORKSPACE = 3
+
+EVENT_NAMES = {
+    'focus': EventType.FOCUS,
+    'window': EventType.WINDOW,
+    'layout': EventType.LAYOUT,
+    'workspace': EventType.WORKSPACE,
+}
+
+QUERY_NAMES = {
+    'tree': MessageType.GET_TREE,
+    'workspaces': MessageType.GET_WORKSPACES,
+    'windows': MessageType.GET_WINDOWS,
+    'status': MessageType.GET_STATUS,
+    'outputs': MessageType.GET_OUTPUTS,
+    'metrics': MessageType.GET_METRICS,
+    'log': MessageType.GET_LOG,
+}
+
+class ProtocolError(Exception):
+    """Message IPC không hợp lệ"""
+
+# Tag của encoding nhị phân (tương tự msgpack nhưng tối giản)
+_NONE, _FALSE, _TRUE = 0x00, 0x01, 0x02
+_INT8, _INT32, _INT64, _FLOAT = 0x03, 0x04, 0x05, 0x06
+_STR8, _STR32, _LIST, _DICT = 0x07, 0x08, 0x09, 0x0a
+
+_I8 = struct.Struct('<b')
+_I32 = struct.Struct('<i')
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+_U8 = struct.Struct('<B')
+_U32 = struct.Struct('<I')
+
+def _encode_binary(obj: Any, out: bytearray):
+    """Mã hóa đệ quy một giá trị vào buffer"""
+    if obj is None:
+        out.append(_NONE)
+    elif obj is True:
+        out.append(_TRUE)
+    elif obj is False:
+        out.append(_FALSE)
+    elif isinstance(obj, int):
+        if -128 <= obj < 128:
+            out.append(_INT8)
+            out += _I8.pack(obj)
+        elif -(1 << 31) <= obj < (1 << 31):
+            out.append(_INT32)
+            out += _I32.pack(obj)
+        else:
+            out.append(_INT64)
+            out += _I64.pack(obj)
+    elif isinstance(obj, float):
+        out.append(_FLOAT)
+        out += _F64.pack(obj)
+    elif isinstance(obj, str):
+        data = obj.encode('utf-8')
+        if len(data) < 256:
+            out.append(_STR8)
+            out += _U8.pack(len(data))
+        else:
+            out.append(_STR32)
+            out += _U32.pack(len(data))
+        out += data
+    elif isinstance(obj, (list, tuple)):
+        out.append(_LIST)
+        out += _U32.pack(len(obj))
+        for item in obj:
+            _encode_binary(item, out)
+    elif isinstance(obj, dict):
+        out.append(_DICT)
+        out += _U32.pack(len(obj))
+        for key, value in obj.items():
+            _encode_binary(str(key), out)
+            _encode_binary(value, out)
+    else:
+        raise ProtocolError(f"Cannot encode {type(obj).__name__}")
+
+def _decode_binary(data: bytes, offset: int) -> Tuple[Any, int]:
+    """Giải mã một giá trị, trả về (value, offset mới)"""
+    tag = data[offset]
+    offset += 1
+    if tag == _NONE:
+        return None, offset
+    if tag == _TRUE:
+        return True, offset
+    if tag == _FALSE:
+        return False, offset
+    if tag == _INT8:
+        return _I8.unpack_from(data, offset)[0], offset + 1
+    if tag == _INT32:
+        return _I32.unpack_from(data, offset)[0], offset + 4
+    if tag == _INT64:
+        return _I64.unpack_from(data, offset)[0], offset + 8
+    if tag == _FLOAT:
+        return _F64.unpack_from(data, offset)[0], offset + 8
+    if tag in (_STR8, _STR32):
+        if tag == _STR8:
+            length, offset = data[offset], offset + 1
+        else:
+            length, offset = _U32.unpack_from(data, offset)[0], offset + 4
+        end = offset + length
+        if end > len(data):
+            raise ProtocolError("Truncated string")
+        return bytes(data[offset:end]).decode('utf-8'), end
+    if tag == _LIST:
+        count = _U32.unpack_from(data, offset)[0]
+        offset += 4
+        items = []
+        for _ in range(count):
+            item, offset = _decode_binary(data, offset)
+            items.append(item)
+        return items, offset
+    if tag == _DICT:
+        count = _U32.unpack_from(data, offset)[0]
+        offset += 4
+        result = {}
+        for _ in range(count):
+            key, offset = _decode_binary(data, offset)
+            value, offset = _decode_binary(data, offset)
+            result[key] = value
+        return result, offset
+    raise ProtocolError(f"Unknown binary tag 0x{tag:02x}")
+
+def encode_payload(codec: int, obj: Any) -> bytes:
+    """Mã hóa payload theo codec"""
+    if codec == Codec.JSON:
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+    if codec == Codec.BINARY:
+        out = bytearray()
+        _encode_binary(obj, out)
+        return bytes(out)
+    raise ProtocolError(f"Unknown codec {codec}")
+
+def decode_payload(codec: int, data: bytes) -> Any:
+    """Giải mã payload theo codec"""
+    if not data:
+        return None
+    try:
+        if codec == Codec.JSON:
+            return json.loads(bytes(data).decode('utf-8'))
+        if codec == Codec.BINARY:
+            value, offset = _decode_binary(data, 0)
+            if offset != len(data):
+                raise ProtocolError("Trailing bytes in binary payload")
+            return value
+    except (ValueError, IndexError, TypeError, struct.error) as e:
+        # TypeError: key của dict nhị phân không hash được (list, dict)
+        raise ProtocolError(f"Malformed payload: {e}")
+    except RecursionError:
+        raise ProtocolError("Payload nested too deeply")
+    raise ProtocolError(f"Unknown codec {codec}")
+
+def pack_message(codec: int, msg_type: int, obj: Any) -> bytes:
+    """Đóng gói một message hoàn chỉnh (header + payload)"""
+    payload = encode_payload(codec, obj)
+    return HEADER.pack(MAGIC, codec, msg_type, len(payload)) + payload
+
+def unpack_messages(buffer: bytearray) -> List[Tuple[int, int, bytes]]:
+    """Tách các message hoàn chỉnh ra khỏi buffer (buffer bị cắt bớt tại chỗ)"""
+    messages = []
+    offset = 0
+    while len(buffer) - offset >= HEADER.size:
+        magic, codec, msg_type, length = HEADER.unpack_from(buffer, offset)
+        if magic != MAGIC:
+            raise ProtocolError("Bad magic")
+        if length > MAX_MESSAGE_SIZE:
+            raise ProtocolError(f"Message too large ({length} bytes)")
+        end = offset + HEADER.size + length
+        if len(buffer) < end:
+            break
+        messages.append((codec, msg_type, bytes(buffer[offset + HEADER.size:end])))
+        offset = end
+    if offset:
+        del buffer[:offset]
+    return messages
+
+def get_default_socket_path() -> str:
+    """Đường dẫn socket mặc định theo DISPLAY hiện tại"""
+    display = os.environ.get('DISPLAY', ':0').replace('/', '_')
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or f"/tmp/iarde-{os.getuid()}"
+    return os.path.join(runtime_dir, f"iarde-ipc{display}.sock")
+
+class IPCClientConnection:
+    """Trạng thái của một client IPC phía server"""
+    
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.fd = sock.fileno()
+        self.inbuf = bytearray()
+        self.outbuf = bytearray()
+        self.subscriptions: Set[int] = set()
+        self.event_codec = Codec.JSON
+        self.closed = False
+
+class IPCServer:
+    """IPC server qua Unix domain socket, chạy trong EventLoop của WM"""
+    
+    def __init__(self, wm, loop, socket_path: Optional[str] = None,
+                 max_client_buffer: int = 1 << 20):
+        self.wm = wm
+        self.loop = loop
+        self.socket_path = socket_path or get_default_socket_path()
+        self.max_client_buffer = max_client_buffer
+        self.sock: Optional[socket.socket] = None
+        self.clients: Dict[int, IPCClientConnection] = {}
+        self.subscriber_counts = {event_type: 0 for event_type in EVENT_NAMES.values()}
+        
+    def start(self):
+        """Mở socket và đăng ký vào event loop"""
+        os.makedirs(os.path.dirname(self.socket_path), mode=0o700, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+            
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(self.socket_path)
+        self.sock.listen(16)
+        self.sock.setblocking(False)
+        self.loop.add_reader(self.sock.fileno(), self._accept)
+        
+        # Các tiến trình con (bar, script) tìm socket qua biến môi trường
+        os.environ['IARDE_SOCK'] = self.socket_path
+        
+        hooks = self.wm.hooks
+        hooks.subscribe('focus', self._on_focus)
+        hooks.subscribe('window', self._on_window)
+        hooks.subscribe('layout', self._on_layout)
+        hooks.subscribe('workspace', self._on_workspace)
+        
+    def stop(self):
+        """Đóng tất cả kết nối và xóa socket"""
+        for client in list(self.clients.values()):
+            self._close(client)
+        if self.sock:
+            self.loop.remove_reader(self.sock.fileno())
+            self.sock.close()
+            self.sock = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+                
+    def _accept(self):
+        """Chấp nhận client mới"""
+        while True:
+            try:
+                sock, _ = self.sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.error('ipc_accept', f"IPC accept failed: {e}")
+                return
+            sock.setblocking(False)
+            client = IPCClientConnection(sock)
+            self.clients[client.fd] = client
+            self.loop.add_reader(client.fd, lambda c=client: self._on_readable(c))
+            
+    def _on_readable(self, client: IPCClientConnection):
+        """Đọc dữ liệu từ client và xử lý các message hoàn chỉnh"""
+        try:
+            data = client.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+            
+        if not data:
+            self._close(client)
+            return
+            
+        client.inbuf += data
+        try:
+            messages = unpack_messages(client.inbuf)
+        except ProtocolError as e:
+            logger.warning('ipc_protocol', f"IPC protocol error: {e}", client=client.fd)
+            self._close(client)
+            return
+            
+        for codec, msg_type, payload in messages:
+            if client.closed:
+                return
+            try:
+                request = decode_payload(codec, payload)
+                reply = self._handle_message(client, codec, msg_type, request)
+                data = pack_message(codec, msg_type, reply)
+            except Exception as e:
+                if not isinstance(e, ProtocolError):
+                    # Lỗi trong WM (get_tree, get_metrics...): client vẫn phải nhận reply
+                    logger.exception('ipc', f"Error handling IPC message {msg_type}: {e}", client=client.fd)
+                if codec not in (Codec.JSON, Codec.BINARY):
+                    codec = Codec.JSON
+                data = pack_message(codec, msg_type, {'success': False, 'error': str(e)})
+            self.send(client, data)
+            
+    def _handle_message(self, client: IPCClientConnection, codec: int, msg_type: int, request: Any) -> Any:
+        """Xử lý một message, trả về payload trả lời"""
+        if msg_type == MessageType.COMMAND:
+            if not isinstance(request, str):
+                raise ProtocolError("Command payload must be a string")
+            return self.wm.run_command(request)
+        if msg_type == MessageType.GET_TREE:
+            return self.wm.get_tree()
+        if msg_type == MessageType.GET_WORKSPACES:
+            return self.wm.get_workspaces()
+        if msg_type == MessageType.GET_WINDOWS:
+            return self.wm.get_windows()
+        if msg_type == MessageType.GET_STATUS:
+            return self.wm.get_status_info()
+        if msg_type == MessageType.GET_OUTPUTS:
+            return self.wm.get_outputs()
+        if msg_type == MessageType.GET_METRICS:
+            return self.wm.get_metrics()
+        if msg_type == MessageType.GET_LOG:
+            return self.wm.get_log()
+        if msg_type == MessageType.SUBSCRIBE:
+            if not isinstance(request, list) or not all(isinstance(name, str) for name in request):
+                raise ProtocolError("Subscribe payload must be a list of event names")
+            unknown = [name for name in request if name not in EVENT_NAMES]
+            if unknown:
+                raise ProtocolError(f"Unknown events: {', '.join(map(str, unknown))}")
+            for name in request:
+                event_type = EVENT_NAMES[name]
+                if event_type not in client.subscriptions:
+                    client.subscriptions.add(event_type)
+                    self.subscriber_counts[event_type] += 1
+            client.event_codec = codec
+            return {'success': True}
+        raise ProtocolError(f"Unknown message type {msg_type}")
+        
+    def send(self, client: IPCClientConnection, data: bytes):
+        """Ghi dữ liệu cho client, phần còn lại được buffer lại"""
+        if client.closed:
+            return
+        if not client.outbuf:
+            try:
+                sent = client.sock.send(data)
+            except (BlockingIOError, InterruptedError):
+                sent = 0
+            except OSError:
+                self._close(client)
+                return
+            if sent == len(data):
+                return
+            data = data[sent:]
+            self.loop.add_writer(client.fd, lambda c=client: self._on_writable(c))
+            
+        client.outbuf += data
+        if len(client.outbuf) > self.max_client_buffer:
+            # Client quá chậm: ngắt kết nối thay vì để buffer tăng vô hạn
+            logger.warning('ipc_slow', f"IPC client {client.fd} too slow, dropping connection")
+            self._close(client)
+            
+    def _on_writable(self, client: IPCClientConnection):
+        """Đẩy tiếp dữ liệu còn trong buffer khi socket ghi được"""
+        try:
+            sent = client.sock.send(client.outbuf)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self._close(client)
+            return
+        del client.outbuf[:sent]
+        if not client.outbuf:
+            self.loop.remove_writer(client.fd)
+            
+    def _close(self, client: IPCClientConnection):
+        """Đóng kết nối client"""
+        if client.closed:
+            return
+        client.closed = True
+        for event_type in client.subscriptions:
+            self.subscriber_counts[event_type] -= 1
+        client.subscriptions.clear()
+        self.loop.remove_reader(client.fd)
+        self.loop.remove_writer(client.fd)
+        self.clients.pop(client.fd, None)
+        client.sock.close()
+        
+    def broadcast(self, event_type: int, payload: Any):
+        """Gửi event cho tất cả client đã subscribe"""
+        if not self.subscriber_counts[event_type]:
+            return
+        encoded = {}
+        for client in list(self.clients.values()):
+            if event_type not in client.subscriptions:
+                continue
+            codec = client.event_codec
+            if codec not in encoded:
+                encoded[codec] = pack_message(codec, EVENT_BIT | event_type, payload)
+            self.send(client, encoded[codec])
+            
+    # Hook listeners
+    def _on_focus(self, window):
+        if self.subscriber_counts[EventType.FOCUS]:
+            self.broadcast(EventType.FOCUS, {
+                'change': 'focus',
+                'window': window.get_info() if window else None,
+            })
+            
+    def _on_window(self, change: str, window):
+        if self.subscriber_counts[EventType.WINDOW]:
+            self.broadcast(EventType.WINDOW, {'change': change, 'window': window.get_info()})
+            
+    def _on_layout(self, layout_name: str):
+        if self.subscriber_counts[EventType.LAYOUT]:
+            self.broadcast(EventType.LAYOUT, {'change': 'layout', 'layout': layout_name})
+            
+    def _on_workspace(self, change: str, current, old):
+        if self.subscriber_counts[EventType.WORKSPACE]:
+            self.broadcast(EventType.WORKSPACE, {
+                'change': change,
+                'current': current.get_info() if current else None,
+                'old': old.get_info() if old else None,
+            })
+
+class IPCClient:
+    """Client IPC đồng bộ dùng cho script và status bar"""
+    
+    def __init__(self, socket_path: Optional[str] = None, codec: int = Codec.JSON):
+        self.socket_path = socket_path or os.environ.get('IARDE_SOCK') or get_default_socket_path()
+        self.codec = codec
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+        self.buffer = bytearray()
+        self.messages: Deque[Tuple[int, int, bytes]] = deque()
+        self.pending_events: Deque[Tuple[int, Any]] = deque()
+        
+    def close(self):
+        """Đóng kết nối"""
+        self.sock.close()
+        
+    def _read_message(self) -> Tuple[int, Any]:
+        """Đọc message tiếp theo (blocking)"""
+        while not self.messages:
+            data = self.sock.recv(65536)
+            if not data:
+                raise ConnectionError("IPC server closed the connection")
+            self.buffer += data
+            self.messages.extend(unpack_messages(self.buffer))
+        codec, msg_type, payload = self.messages.popleft()
+        return msg_type, decode_payload(codec, payload)
+        
+    def request(self, msg_type: int, payload: Any = None) -> Any:
+        """Gửi request và chờ trả lời (event đến trước được giữ lại)"""
+        self.sock.sendall(pack_message(self.codec, msg_type, payload))
+        while True:
+            reply_type, reply = self._read_message()
+            if reply_type & EVENT_BIT:
+                self.pending_events.append((reply_type & ~EVENT_BIT, reply))
+                continue
+            return reply
+            
+    def command(self, command: str) -> Any:
+        """Chạy một lệnh WM"""
+        return self.request(MessageType.COMMAND, command)
+        
+    def query(self, what: str) -> Any:
+        """Truy vấn tree/workspaces/windows/status"""
+        if what not in QUERY_NAMES:
+            raise ValueError(f"Unknown query: {what}")
+        return self.request(QUERY_NAMES[what])
+        
+    def subscribe(self, events: List[str]) -> Any:
+        """Đăng ký nhận event"""
+        return self.request(MessageType.SUBSCRIBE, list(events))
+        
+    def read_event(self) -> Tuple[str, Any]:
+        """Chờ event tiếp theo, trả về (tên event, payload)"""
+        if self.pending_events:
+            event_type, payload = self.pending_events.popleft()
+        else:
+            while True:
+                msg_type, payload = self._read_message()
+                if msg_type & EVENT_BIT:
+                    event_type = msg_type & ~EVENT_BIT
+                    break
+        for name, value in EVENT_NAMES.items():
+            if value == event_type:
+                return name, payload
+        return str(event_type), payload
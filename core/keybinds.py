@@ -1,6 +1,36 @@
 import xcffib.xproto as xproto
 from typing import Dict, Callable, Tuple, List
 from .conn import XConnection
+from .metrics import RoundTripBudgetExceeded
+from .log import logger
+
+# Keysym của các phím có tên (keysymdef.h); chữ, số và dấu dùng mã Latin-1 của chính ký tự
+NAMED_KEYSYMS = {
+    'Return': 0xff0d, 'Tab': 0xff09, 'Space': 0x20, 'Escape': 0xff1b,
+    'BackSpace': 0xff08, 'Delete': 0xffff,
+    'Up': 0xff52, 'Down': 0xff54, 'Left': 0xff51, 'Right': 0xff53,
+    'Home': 0xff50, 'End': 0xff57, 'Page_Up': 0xff55, 'Page_Down': 0xff56,
+    'Alt_L': 0xffe9, 'Alt_R': 0xffea,
+}
+NAMED_KEYSYMS.update({f'F{i}': 0xffbe + i - 1 for i in range(1, 13)})
+
+# Keycode evdev của layout US: dùng khi không đọc được keyboard mapping từ server
+DEFAULT_KEYCODES = {
+    'Return': 36, 'Tab': 23, 'Space': 65, 'Escape': 9, 'BackSpace': 22, 'Delete': 119,
+    'Up': 111, 'Down': 116, 'Left': 113, 'Right': 114,
+    'Home': 110, 'End': 115, 'Page_Up': 112, 'Page_Down': 117,
+    'Alt_L': 64, 'Alt_R': 108,
+    'F11': 95, 'F12': 96,
+    '-': 20, '=': 21, '[': 34, ']': 35, ';': 47, "'": 48, '`': 49, '\\': 51,
+    ',': 59, '.': 60, '/': 61,
+}
+DEFAULT_KEYCODES.update({f'F{i}': 66 + i for i in range(1, 11)})
+for _row, _first in (('1234567890', 10), ('qwertyuiop', 24), ('asdfghjkl', 38), ('zxcvbnm', 52)):
+    DEFAULT_KEYCODES.update({key: _first + i for i, key in enumerate(_row)})
+
+def keysym_of(name: str) -> int:
+    """Keysym của một tên phím trong keybind ("Return", "h", "4"...)"""
+    return NAMED_KEYSYMS.get(name) or ord(name)
 
 class KeybindManager:
     """Quản lý keybind và thực thi các action"""
@@ -8,6 +38,8 @@ class KeybindManager:
     def __init__(self, xconn: XConnection):
         self.xconn = xconn
         self.keybinds: Dict[Tuple[int, int], Callable] = {}
+        self.keybind_names: Dict[Tuple[int, int], str] = {}  # Dùng làm tên scope khi đo latency
+        self.metrics = None  # Được WindowManager gán nếu bật metrics
         self.modifier_masks = {
             'Shift': xproto.ModMask.Shift,
             'Lock': xproto.ModMask.Lock,
@@ -19,42 +51,47 @@ class KeybindManager:
             'Mod5': xproto.ModMask._5,
         }
         
-        # Key symbols mapping (một số key phổ biến)
-        self.key_symbols = {
-            'Return': 36,
-            'Tab': 23,
-            'Space': 65,
-            'Escape': 9,
-            'BackSpace': 22,
-            'Delete': 119,
-            'Up': 111,
-            'Down': 116,
-            'Left': 113,
-            'Right': 114,
-            'Home': 110,
-            'End': 115,
-            'Page_Up': 112,
-            'Page_Down': 117,
-            'F1': 67,
-            'F2': 68,
-            'F3': 69,
-            'F4': 70,
-            'F5': 71,
-            'F6': 72,
-            'F7': 73,
-            'F8': 74,
-            'F9': 75,
-            'F10': 76,
-            'F11': 95,
-            'F12': 96,
-        }
+        # Keysym -> keycode theo keyboard mapping của server (rỗng nếu không đọc được)
+        self.keysyms: Dict[int, int] = self.load_keymap()
+        # Tên phím -> keycode và keycode -> ký tự gõ được (explorer)
+        self.key_symbols: Dict[str, int] = {}
+        self.key_chars: Dict[int, str] = {}
+        for name, default in DEFAULT_KEYCODES.items():
+            keycode = self.keysyms.get(keysym_of(name)) if self.keysyms else default
+            if keycode is not None:  # None: layout hiện tại không có phím này
+                self.key_symbols[name] = keycode
+        if self.keysyms:
+            # Keysym Latin-1 in được; cột không Shift đứng trước nên được giữ
+            for keysym, keycode in self.keysyms.items():
+                if 0x20 <= keysym < 0x7f or 0xa0 <= keysym <= 0xff:
+                    self.key_chars.setdefault(keycode, chr(keysym))
+        else:
+            for name, keycode in self.key_symbols.items():
+                if len(name) == 1 or name == 'Space':
+                    self.key_chars[keycode] = ' ' if name == 'Space' else name
+                
+    def load_keymap(self) -> Dict[int, int]:
+        """Đọc bảng keysym -> keycode bằng GetKeyboardMapping (ưu tiên cột không Shift)"""
+        if self.xconn is None:
+            return {}
+        setup = self.xconn.setup
+        first = setup.min_keycode
+        count = setup.max_keycode - first + 1
+        try:
+            reply = self.xconn.conn.core.GetKeyboardMapping(first, count).reply()
+            per = reply.keysyms_per_keycode
+            keysyms = list(reply.keysyms)
+        except Exception as e:
+            logger.warning('keymap', f"Cannot read keyboard mapping, using US layout: {e}")
+            return {}
+        mapping: Dict[int, int] = {}
+        for column in range(per):
+            for index in range(count):
+                keysym = keysyms[index * per + column] if index * per + column < len(keysyms) else 0
+                if keysym and keysym not in mapping:
+                    mapping[keysym] = first + index
+        return mapping
         
-        # Thêm các chữ cái và số
-        for i in range(26):
-            self.key_symbols[chr(ord('a') + i)] = 38 + i
-        for i in range(10):
-            self.key_symbols[str(i)] = 19 + i
-            
     def parse_keybind(self, keybind_str: str) -> Tuple[int, int]:
         """Parse keybind string thành (modifier_mask, keycode)"""
         parts = keybind_str.split('+')
@@ -76,6 +113,8 @@ class KeybindManager:
         # Parse key
         if key in self.key_symbols:
             keycode = self.key_symbols[key]
+        elif len(key) == 1 and ord(key) in self.keysyms:
+            keycode = self.keysyms[ord(key)]
         else:
             # Thử parse như một số
             try:
@@ -86,16 +125,21 @@ class KeybindManager:
         return mod_mask, keycode
         
     def add_keybind(self, keybind_str: str, action: Callable):
-        """Thêm keybind mới"""
+        """Thêm keybind mới (không ghi đè tổ hợp phím đã được gán)"""
         try:
             mod_mask, keycode = self.parse_keybind(keybind_str)
+            existing = self.keybind_names.get((mod_mask, keycode))
+            if existing is not None:
+                logger.warning('keybind', f"Keybind {keybind_str} conflicts with {existing}, skipped")
+                return False
             self.keybinds[(mod_mask, keycode)] = action
+            self.keybind_names[(mod_mask, keycode)] = keybind_str
             
             # Grab key trên root window
             self.xconn.grab_key(self.xconn.root, mod_mask, keycode)
             return True
         except Exception as e:
-            print(f"Failed to add keybind {keybind_str}: {e}")
+            logger.warning('keybind', f"Failed to add keybind {keybind_str}: {e}")
             return False
             
     def remove_keybind(self, keybind_str: str):
@@ -104,10 +148,11 @@ class KeybindManager:
             mod_mask, keycode = self.parse_keybind(keybind_str)
             if (mod_mask, keycode) in self.keybinds:
                 del self.keybinds[(mod_mask, keycode)]
+                self.keybind_names.pop((mod_mask, keycode), None)
                 self.xconn.ungrab_key(self.xconn.root, mod_mask, keycode)
                 return True
         except Exception as e:
-            print(f"Failed to remove keybind {keybind_str}: {e}")
+            logger.warning('keybind', f"Failed to remove keybind {keybind_str}: {e}")
         return False
         
     def handle_keypress(self, event: xproto.KeyPressEvent):
@@ -117,11 +162,18 @@ class KeybindManager:
         
         keybind = (mod_mask, keycode)
         if keybind in self.keybinds:
+            scope = f"key:{self.keybind_names.get(keybind)}"
+            start = self.metrics.begin(scope) if self.metrics else None
             try:
                 self.keybinds[keybind]()
                 return True
+            except RoundTripBudgetExceeded:
+                raise
             except Exception as e:
-                print(f"Error executing keybind action: {e}")
+                logger.exception(scope, f"Error executing keybind action: {e}")
+            finally:
+                if start:
+                    self.metrics.end(scope, start)
         return False
         
     def setup_default_keybinds(self, wm):
@@ -134,11 +186,26 @@ class KeybindManager:
             "Mod4+q": lambda: wm.kill_focused_window(),
             "Mod4+f": lambda: wm.toggle_fullscreen(),
             "Mod4+Shift+Space": lambda: wm.toggle_floating(),
+            "Mod4+Tab": lambda: wm.toggle_explorer(),
+            "Mod4+n": lambda: wm.minimize_window(),
+            "Mod4+Shift+n": lambda: wm.restore_window(),
+            "Mod4+m": lambda: wm.toggle_scratchpad(),
+            "Mod4+Shift+m": lambda: wm.move_to_scratchpad(),
+            
+            # Alt-tab theo thứ tự MRU
+            "Mod1+Tab": lambda: wm.cycle_focus(1),
+            "Mod1+Shift+Tab": lambda: wm.cycle_focus(-1),
             
             # Layout
             "Mod4+s": lambda: wm.set_layout('stack'),
             "Mod4+w": lambda: wm.set_layout('tiling'),
             "Mod4+e": lambda: wm.set_layout('monocle'),
+            "Mod4+t": lambda: wm.set_layout('tabbed'),
+            "Mod4+Shift+t": lambda: wm.set_layout('stacking'),
+            "Mod4+y": lambda: wm.set_layout('tree'),
+            "Mod4+b": lambda: wm.split_horizontal(),
+            "Mod4+v": lambda: wm.split_vertical(),
+            "Mod4+Shift+y": lambda: wm.toggle_split(),
             "Mod4+Shift+e": lambda: wm.cycle_layout(),
             
             # Window focus
@@ -154,13 +221,19 @@ class KeybindManager:
             "Mod4+Shift+l": lambda: wm.move_right(),
             
             # Master area adjustment
-            "Mod4+Shift+h": lambda: wm.adjust_master_ratio(-0.05),
-            "Mod4+Shift+l": lambda: wm.adjust_master_ratio(0.05),
+            "Mod4+Control+h": lambda: wm.adjust_master_ratio(-0.05),
+            "Mod4+Control+l": lambda: wm.adjust_master_ratio(0.05),
             
             # Exit
             "Mod4+Shift+q": lambda: wm.quit(),
         }
         
+        # Workspace 1-10 (phím 1..9, 0)
+        for i in range(10):
+            key = str((i + 1) % 10)
+            default_keybinds[f"Mod4+{key}"] = lambda i=i: wm.switch_workspace(i)
+            default_keybinds[f"Mod4+Shift+{key}"] = lambda i=i: wm.move_to_workspace(i)
+            
         for keybind_str, action in default_keybinds.items():
             self.add_keybind(keybind_str, action)
             
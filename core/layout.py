@@ -1,136 +1,427 @@
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from .window import Window
 from .conn import XConnection
+from .tabs import TabRenderer
+from .tree import ContainerTree
+from .geometry import inset_rect, select_kernels
 
 class Layout:
     """Base class cho các layout algorithm"""
     
     def __init__(self, xconn: XConnection):
         self.xconn = xconn
+        self.gap = 0  # Khoảng trống quanh mỗi cửa sổ
+        self.border = 0  # Độ dày viền, trừ vào width/height
+        
+    def configure(self, gap: int, border: int, **options):
+        self.gap, self.border = gap, border
         
     def arrange(self, windows: List[Window], screen_geometry: Tuple[int, int, int, int]):
         """Sắp xếp các cửa sổ theo layout"""
         raise NotImplementedError
+        
+    def on_focus(self, window: Optional[Window]):
+        """Focus đổi mà không cần arrange lại (layout chồng cửa sổ dùng để restack)"""
+        
+    def on_title(self, window: Window):
+        """Tiêu đề cửa sổ thay đổi"""
+        
+    def on_stack(self, window: Window):
+        """Cửa sổ đã được WM raise lên trên cùng"""
+        
+    def deactivate(self):
+        """Layout không còn được dùng trên màn hình (ẩn phần trang trí riêng)"""
+        
+    def signature_key(self, windows: List[Window]):
+        """Trạng thái riêng của layout ảnh hưởng tới kết quả arrange (đưa vào signature)"""
+        return (self.gap, self.border)
 
-class TilingLayout(Layout):
+class KernelLayout(Layout):
+    """Layout tính geometry của mọi cửa sổ bằng một kernel trên mảng, chỉ configure cửa sổ có rect đổi"""
+    
+    def __init__(self, xconn: XConnection):
+        super().__init__(xconn)
+        self.threshold = 32  # Số cửa sổ tối thiểu để dùng kernel NumPy
+        self.vectorize = True
+        self.applied = 0  # Số cửa sổ được configure trong lần arrange gần nhất
+        
+    def configure(self, gap: int, border: int, threshold: int, vectorize: bool):
+        super().configure(gap, border)
+        self.threshold, self.vectorize = threshold, vectorize
+        
+    def compute(self, kernels, n: int, area: Tuple[int, int, int, int]):
+        """Rect của n cửa sổ (trước khi trừ gap/viền) dưới dạng mảng của kernels"""
+        raise NotImplementedError
+        
+    def arrange(self, windows: List[Window], screen_geometry: Tuple[int, int, int, int]):
+        """Tính rect cho cả danh sách, so với geometry hiện tại trong một lần và chỉ gửi phần khác"""
+        self.applied = 0
+        if not windows:
+            return
+        kernels = select_kernels(len(windows), self.threshold, self.vectorize)
+        rects = kernels.inset(self.compute(kernels, len(windows), screen_geometry), self.gap, self.border)
+        changed = kernels.changed(rects, kernels.pack([w.geometry for w in windows]))
+        for index in changed:
+            windows[index].set_geometry(*kernels.rect(rects, index))
+        self.applied = len(changed)
+
+class TilingLayout(KernelLayout):
     """Layout tiling giống i3 - chia màn hình thành master và stack area"""
     
     def __init__(self, xconn: XConnection, master_ratio: float = 0.6):
         super().__init__(xconn)
         self.master_ratio = master_ratio  # Tỷ lệ master area
         
+    def signature_key(self, windows: List[Window]):
+        return (self.master_ratio, self.gap, self.border)
+        
+    def compute(self, kernels, n: int, area: Tuple[int, int, int, int]):
+        """Cửa sổ đầu tiên là master bên trái, các cửa sổ còn lại chia đều cột bên phải"""
+        return kernels.tiling(n, area, self.master_ratio)
+
+class StackLayout(KernelLayout):
+    """Layout stack - tất cả cửa sổ chia đều theo chiều ngang"""
+    
+    def compute(self, kernels, n: int, area: Tuple[int, int, int, int]):
+        return kernels.stack(n, area)
+
+class GridLayout(KernelLayout):
+    """Layout grid - lưới gần vuông, hàng cuối chia đều phần còn thiếu"""
+    
+    def compute(self, kernels, n: int, area: Tuple[int, int, int, int]):
+        return kernels.grid(n, area)
+
+class SpiralLayout(KernelLayout):
+    """Layout spiral - mỗi cửa sổ lấy một nửa phần còn lại, xoay vòng theo chiều kim đồng hồ"""
+    
+    def compute(self, kernels, n: int, area: Tuple[int, int, int, int]):
+        return kernels.spiral(n, area)
+
+class MonocleLayout(Layout):
+    """Layout monocle - mọi cửa sổ phủ toàn vùng, chỉ cửa sổ phía trước được raise (không unmap)"""
+    
+    def __init__(self, xconn: XConnection):
+        super().__init__(xconn)
+        self.windows: List[Window] = []
+        self.front: Optional[Window] = None
+        
     def arrange(self, windows: List[Window], screen_geometry: Tuple[int, int, int, int]):
-        """Sắp xếp cửa sổ theo tiling layout"""
+        """Sắp xếp cửa sổ theo monocle layout"""
+        self.windows = list(windows)
         if not windows:
+            self.front = None
             return
             
-        screen_x, screen_y, screen_width, screen_height = screen_geometry
-        n = len(windows)
+        rect = inset_rect(screen_geometry, self.gap, self.border)
+        for window in windows:
+            window.set_geometry(*rect)
+        # Cửa sổ mới được X map lên trên cùng: luôn raise lại cửa sổ phía trước
+        self.front = self._pick_front()
+        self.front.raise_to_top()
         
-        if n == 1:
-            # Chỉ có 1 cửa sổ, chiếm toàn bộ màn hình
-            windows[0].set_geometry(screen_x, screen_y, screen_width, screen_height)
-        else:
-            # Có nhiều cửa sổ, chia thành master và stack
-            master_width = int(screen_width * self.master_ratio)
-            stack_width = screen_width - master_width
-            
-            # Master window (cửa sổ đầu tiên)
-            master_window = windows[0]
-            master_window.set_geometry(
-                screen_x, screen_y, 
-                master_width, screen_height
-            )
+    def _pick_front(self) -> Window:
+        """Cửa sổ đang focus, không thì cửa sổ phía trước lần trước, không thì cửa sổ đầu tiên"""
+        for window in self.windows:
+            if window.is_focused:
+                return window
+        return self.front if self.front in self.windows else self.windows[0]
+        
+    def on_focus(self, window: Optional[Window]):
+        """Đổi cửa sổ phía trước chỉ cần một request restack"""
+        if window is not None and window is not self.front and window in self.windows:
+            self.front = window
+            window.raise_to_top()
             
-            # Stack windows (các cửa sổ còn lại)
-            if n > 1:
-                stack_height = screen_height // (n - 1)
-                for i, window in enumerate(windows[1:], 1):
-                    y_pos = screen_y + (i - 1) * stack_height
-                    height = stack_height if i < n - 1 else screen_height - y_pos
-                    window.set_geometry(
-                        screen_x + master_width, y_pos,
-                        stack_width, height
-                    )
+    def on_stack(self, window: Window):
+        # WM đã raise (focus_window, kéo chuột): không cần restack lần nữa
+        if window in self.windows:
+            self.front = window
 
-class MonocleLayout(Layout):
-    """Layout monocle - chỉ hiển thị 1 cửa sổ tại một thời điểm"""
+class TabbedLayout(MonocleLayout):
+    """Layout tabbed/stacking - như monocle, thêm thanh tiêu đề của mọi cửa sổ (ngang hoặc xếp dọc)"""
     
+    def __init__(self, xconn: XConnection, renderer: TabRenderer, vertical: bool = False):
+        super().__init__(xconn)
+        self.renderer = renderer
+        self.vertical = vertical
+        self.strip = None
+        
     def arrange(self, windows: List[Window], screen_geometry: Tuple[int, int, int, int]):
-        """Sắp xếp cửa sổ theo monocle layout"""
+        """Thanh tab ở trên, các cửa sổ chồng lên nhau trong phần còn lại"""
         if not windows:
+            super().arrange(windows, screen_geometry)
+            self.deactivate()
             return
             
         screen_x, screen_y, screen_width, screen_height = screen_geometry
+        rows = len(windows) if self.vertical else 1
+        strip_height = min(rows * self.renderer.height, screen_height // 2)
+        super().arrange(windows, (screen_x, screen_y + strip_height,
+                                  screen_width, screen_height - strip_height))
+        if self.strip is None:
+            self.strip = self.renderer.create_strip()
+        self.strip.show(screen_x, screen_y, screen_width, strip_height, self.windows, self.vertical)
         
-        for i, window in enumerate(windows):
-            if i == 0:  # Chỉ hiển thị cửa sổ đầu tiên
-                window.set_geometry(screen_x, screen_y, screen_width, screen_height)
-                window.map()
-            else:
-                window.unmap()
+    def on_focus(self, window: Optional[Window]):
+        super().on_focus(window)
+        if self.strip:
+            self.strip.update()
+            
+    def on_title(self, window: Window):
+        if self.strip and window in self.windows:
+            self.strip.update()
+            
+    def deactivate(self):
+        if self.strip:
+            self.strip.hide()
 
-class StackLayout(Layout):
-    """Layout stack - tất cả cửa sổ chia đều theo chiều ngang"""
+class TreeLayout(Layout):
+    """Layout cây container kiểu i3: chỉ relayout cây con bị thay đổi"""
     
+    def __init__(self, xconn: XConnection, trees: Dict[Optional[int], ContainerTree]):
+        super().__init__(xconn)
+        self.trees = trees  # Cây theo workspace, dùng chung giữa các màn hình
+        
+    def signature_key(self, windows: List[Window]):
+        tree = self.trees.get(windows[0].workspace) if windows else None
+        return (tree.generation if tree else None, self.gap, self.border)
+        
     def arrange(self, windows: List[Window], screen_geometry: Tuple[int, int, int, int]):
-        """Sắp xếp cửa sổ theo stack layout"""
+        """Đồng bộ cây với danh sách cửa sổ rồi chỉ đặt geometry cho leaf có rect đổi"""
         if not windows:
             return
-            
-        screen_x, screen_y, screen_width, screen_height = screen_geometry
-        n = len(windows)
-        
-        window_width = screen_width // n
+        tree = self.trees.setdefault(windows[0].workspace, ContainerTree())
+        current = {w.window_id: w for w in windows}
+        for window_id in [wid for wid in tree.leaves if wid not in current]:
+            tree.remove(window_id)
+        for window in windows:
+            leaf = tree.leaves.get(window.window_id)
+            if leaf is None:
+                tree.insert(window.window_id, tree.focused)
+            elif window.geometry != self._inset(tree.nodes.rect[leaf]):
+                # Geometry bị layout khác/fullscreen đổi: đặt lại đúng leaf này
+                tree.mark_dirty(leaf)
+        tree.relayout(screen_geometry, lambda window_id, rect: current[window_id].set_geometry(*self._inset(rect)))
         
-        for i, window in enumerate(windows):
-            x_pos = screen_x + i * window_width
-            width = window_width if i < n - 1 else screen_width - x_pos
-            window.set_geometry(x_pos, screen_y, width, screen_height)
+    def _inset(self, rect: Optional[Tuple[int, int, int, int]]) -> Optional[Tuple[int, int, int, int]]:
+        """Rect của leaf trừ gap/viền (cây giữ rect chưa trừ để các leaf khít nhau)"""
+        return inset_rect(rect, self.gap, self.border) if rect else rect
 
-class LayoutManager:
-    """Quản lý các layout khác nhau"""
+class LayoutState:
+    """Trạng thái layout của một màn hình: layout đang dùng, khoảng bar, geometry lần trước"""
     
-    def __init__(self, xconn: XConnection):
-        self.xconn = xconn
-        self.current_layout = TilingLayout(xconn)
+    def __init__(self, xconn: XConnection, tabs: Optional[TabRenderer] = None,
+                 trees: Optional[Dict[Optional[int], ContainerTree]] = None):
         self.layouts = {
             'tiling': TilingLayout(xconn),
             'monocle': MonocleLayout(xconn),
-            'stack': StackLayout(xconn)
+            'stack': StackLayout(xconn),
+            'grid': GridLayout(xconn),
+            'spiral': SpiralLayout(xconn),
         }
+        if trees is not None:
+            self.layouts['tree'] = TreeLayout(xconn, trees)
+        if tabs:
+            self.layouts['tabbed'] = TabbedLayout(xconn, tabs)
+            self.layouts['stacking'] = TabbedLayout(xconn, tabs, vertical=True)
         self.current_layout_name = 'tiling'
+        # Khoảng dành cho bar/panel ở cạnh trên và dưới màn hình
+        self.reserved_top = 0
+        self.reserved_bottom = 0
+        # Bảng geometry của lần arrange gần nhất: window_id -> (x, y, w, h)
+        self.geometry_table: Dict[int, Tuple[int, int, int, int]] = {}
+        # Đầu vào của lần arrange gần nhất, giống hệt thì bỏ qua arrange
+        self.signature = None
         
-    def set_layout(self, layout_name: str):
+    @property
+    def current_layout(self) -> Layout:
+        return self.layouts[self.current_layout_name]
+        
+    def configure(self, options: dict):
+        for layout in self.layouts.values():
+            layout.configure(**options)
+
+class LayoutManager:
+    """Quản lý các layout khác nhau (mỗi màn hình có layout riêng)"""
+    
+    def __init__(self, xconn: XConnection, tabs: Optional[TabRenderer] = None):
+        self.xconn = xconn
+        self.tabs = tabs  # Renderer dùng chung cho layout tabbed/stacking
+        self.monitors = None  # MonitorManager, được WindowManager gán sau khi khởi tạo
+        # Trạng thái theo tên output, giữ lại khi rút/cắm lại màn hình
+        self.states: Dict[str, LayoutState] = {}
+        # Cây container của layout tree theo workspace
+        self.trees: Dict[Optional[int], ContainerTree] = {}
+        # Gap/viền cho mọi layout, ngưỡng NumPy cho các layout dùng kernel geometry
+        self.kernel_options = {'gap': 0, 'border': 0, 'threshold': 32, 'vectorize': True}
+        
+    def configure(self, config):
+        """Đọc tùy chọn geometry từ config (gọi khi khởi động và khi reload)"""
+        self.kernel_options = {
+            'gap': max(0, config.get("layout.gaps", 0)),
+            'border': config.get_border_width(),
+            'threshold': config.get("layout.vector_threshold", 32),
+            'vectorize': config.get("layout.vectorize", True),
+        }
+        for state in self.states.values():
+            state.configure(self.kernel_options)
+            
+    def get_state(self, monitor=None) -> LayoutState:
+        """Trạng thái layout của màn hình (mặc định là màn hình đang focus)"""
+        if monitor is None and self.monitors:
+            monitor = self.monitors.get_current()
+        name = monitor.name if monitor else None
+        state = self.states.get(name)
+        if state is None:
+            state = LayoutState(self.xconn, self.tabs, self.trees)
+            state.configure(self.kernel_options)
+            self.states[name] = state
+        return state
+        
+    @property
+    def layouts(self) -> Dict[str, Layout]:
+        return self.get_state().layouts
+        
+    @property
+    def current_layout(self) -> Layout:
+        return self.get_state().current_layout
+        
+    @property
+    def geometry_table(self) -> Dict[int, Tuple[int, int, int, int]]:
+        """Geometry của mọi cửa sổ tiling trên các màn hình đang bật"""
+        if self.monitors:
+            states = [self.get_state(monitor) for monitor in self.monitors.monitors]
+        else:
+            states = list(self.states.values())
+        table = {}
+        for state in states:
+            table.update(state.geometry_table)
+        return table
+        
+    def set_layout(self, layout_name: str, monitor=None):
         """Chuyển đổi layout"""
-        if layout_name in self.layouts:
-            self.current_layout = self.layouts[layout_name]
-            self.current_layout_name = layout_name
+        state = self.get_state(monitor)
+        if layout_name in state.layouts:
+            if layout_name != state.current_layout_name:
+                state.current_layout.deactivate()
+            state.current_layout_name = layout_name
             return True
         return False
         
-    def get_current_layout_name(self) -> str:
+    def get_current_layout_name(self, monitor=None) -> str:
         """Lấy tên layout hiện tại"""
-        return self.current_layout_name
+        return self.get_state(monitor).current_layout_name
         
-    def cycle_layout(self):
+    def cycle_layout(self, monitor=None):
         """Chuyển đổi layout theo vòng lặp"""
-        layout_names = list(self.layouts.keys())
-        current_index = layout_names.index(self.current_layout_name)
+        state = self.get_state(monitor)
+        layout_names = list(state.layouts.keys())
+        current_index = layout_names.index(state.current_layout_name)
         next_index = (current_index + 1) % len(layout_names)
-        self.set_layout(layout_names[next_index])
+        self.set_layout(layout_names[next_index], monitor)
         
-    def arrange_windows(self, windows: List[Window]):
-        """Sắp xếp các cửa sổ theo layout hiện tại"""
-        screen_width, screen_height = self.xconn.get_screen_geometry()
-        screen_geometry = (0, 0, screen_width, screen_height)
+    def set_reserved_space(self, top: int, bottom: int, monitor=None):
+        """Đặt khoảng dành riêng (bar) ở cạnh trên/dưới"""
+        state = self.get_state(monitor)
+        state.reserved_top = top
+        state.reserved_bottom = bottom
+        
+    def get_layout_area(self, monitor=None) -> Tuple[int, int, int, int]:
+        """Vùng dành cho layout (màn hình trừ đi bar)"""
+        state = self.get_state(monitor)
+        if monitor is None and self.monitors:
+            monitor = self.monitors.get_current()
+        if monitor:
+            x, y, width, height = monitor.geometry
+        else:
+            x, y = 0, 0
+            width, height = self.xconn.get_screen_geometry()
+        return (x, y + state.reserved_top, width,
+                height - state.reserved_top - state.reserved_bottom)
+        
+    def arrange_windows(self, windows: List[Window], monitor=None) -> bool:
+        """Sắp xếp các cửa sổ của một màn hình theo layout của nó, trả về True nếu geometry thay đổi"""
+        state = self.get_state(monitor)
+        screen_geometry = self.get_layout_area(monitor)
         
         # Chỉ arrange những cửa sổ không phải floating
         tiling_windows = [w for w in windows if not w.is_floating]
-        self.current_layout.arrange(tiling_windows, screen_geometry)
+        layout = state.current_layout
+        signature = (
+            state.current_layout_name, layout.signature_key(tiling_windows), screen_geometry,
+            [(w.window_id, w.geometry) for w in tiling_windows],
+        )
+        if signature == state.signature:
+            # Không có gì thay đổi trên màn hình này: không gửi request nào
+            return False
+        layout.arrange(tiling_windows, screen_geometry)
+        # Khóa của layout có thể đổi trong arrange (cây chèn cửa sổ mới)
+        state.signature = (signature[0], layout.signature_key(tiling_windows), signature[2],
+                           [(w.window_id, w.geometry) for w in tiling_windows])
+        
+        table = {w.window_id: w.geometry for w in tiling_windows if w.is_mapped and w.geometry}
+        if table == state.geometry_table:
+            return False
+        state.geometry_table = table
+        return True
+        
+    def on_focus(self, window: Optional[Window]):
+        """Báo focus thay đổi cho layout đang dùng trên mọi màn hình"""
+        if window is not None and window.workspace in self.trees:
+            self.trees[window.workspace].focused = window.window_id
+        for state in self.states.values():
+            state.current_layout.on_focus(window)
+            
+    def on_stack(self, window: Window):
+        for state in self.states.values():
+            state.current_layout.on_stack(window)
+            
+    def on_window(self, change: str, window: Window):
+        if change == 'title':
+            for state in self.states.values():
+                state.current_layout.on_title(window)
+        elif change in ('close', 'move'):
+            # Bỏ khỏi cây cũ ngay, để cây con còn lại relayout ở cuối batch
+            for tree in self.trees.values():
+                if window.window_id in tree.leaves:
+                    tree.remove(window.window_id)
+                    if tree.focused == window.window_id:
+                        tree.focused = None
+                    break
+                    
+    def on_swap(self, first: Window, second: Window):
+        """Hai cửa sổ tiling đổi chỗ: đổi hai leaf trong cây"""
+        tree = self.trees.get(first.workspace)
+        if tree:
+            tree.swap(first.window_id, second.window_id)
+            
+    def split(self, window: Window, layout: int) -> bool:
+        """Bọc cửa sổ vào container mới chia theo `layout` (SPLIT_H/SPLIT_V)"""
+        tree = self.trees.get(window.workspace)
+        if tree is None or window.window_id not in tree.leaves:
+            return False
+        tree.split(window.window_id, layout)
+        return True
+        
+    def toggle_split(self, window: Window) -> bool:
+        """Đổi hướng chia của container chứa cửa sổ"""
+        tree = self.trees.get(window.workspace)
+        if tree is None or window.window_id not in tree.leaves:
+            return False
+        tree.toggle_split(window.window_id)
+        return True
         
-    def adjust_master_ratio(self, delta: float):
-        """Điều chỉnh tỷ lệ master area (chỉ áp dụng cho tiling layout)"""
-        if isinstance(self.current_layout, TilingLayout):
-            self.current_layout.master_ratio = max(0.1, min(0.9, 
-                self.current_layout.master_ratio + delta))
+    def describe_tree(self, workspace: int) -> Optional[dict]:
+        tree = self.trees.get(workspace)
+        return tree.describe() if tree else None
+                
+    def adjust_master_ratio(self, delta: float, monitor=None, window: Optional[Window] = None):
+        """Điều chỉnh tỷ lệ master area (tiling) hoặc phần của cửa sổ trong container (tree)"""
+        layout = self.get_state(monitor).current_layout
+        if isinstance(layout, TreeLayout):
+            tree = self.trees.get(window.workspace) if window else None
+            if tree:
+                tree.resize(window.window_id, delta)
+        elif isinstance(layout, TilingLayout):
+            layout.master_ratio = max(0.1, min(0.9, 
+                layout.master_ratio + delta))
@@ -0,0 +1,278 @@
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, List, Optional
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVELS = {'debug': DEBUG, 'info': INFO, 'warning': WARNING, 'error': ERROR}
+LEVEL_NAMES = {value: name for name, value in LEVELS.items()}
+
+def default_log_path() -> str:
+    """File log mặc định: $XDG_STATE_HOME/iarde/iarde.log"""
+    state_dir = os.environ.get('XDG_STATE_HOME') or os.path.expanduser("~/.local/state")
+    return os.path.join(state_dir, "iarde", "iarde.log")
+
+def format_record(record: tuple) -> dict:
+    """Record (time, level, key, message, fields) thành dict để ghi JSON hoặc trả qua IPC"""
+    when, level, key, message, fields = record
+    info = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(when)) + f".{int(when * 1000) % 1000:03d}",
+        'level': LEVEL_NAMES.get(level, str(level)),
+        'key': key,
+        'message': message,
+    }
+    info.update(fields)
+    return info
+
+class Logger:
+    """Log có cấu trúc: main loop chỉ ghi vào ring buffer, thread nền ghi ra file xoay vòng và stderr"""
+    
+    def __init__(self, ring_size: int = 4096):
+        # Các record gần nhất (dump khi cần hoặc khi crash), record cũ tự bị đẩy ra
+        self.ring: deque = deque(maxlen=ring_size)
+        # Record chờ thread nền ghi; đầy thì record cũ nhất bị bỏ thay vì chặn event loop
+        self.outbox: deque = deque(maxlen=ring_size)
+        self.dumps: deque = deque()  # (đường dẫn, record) chờ thread nền ghi
+        self.level = INFO
+        self.console_level = WARNING
+        # Mỗi key tối đa rate_limit record trong rate_window giây
+        self.rate_limit = 10
+        self.rate_window = 10.0
+        self.buckets: Dict[str, list] = {}  # key -> [bắt đầu cửa sổ, số record, số bị chặn]
+        self.path: Optional[str] = None
+        self.max_bytes = 1048576
+        self.backups = 3
+        self.flush_interval = 1.0
+        self.wake = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self.file = None
+        self.previous_excepthook = None
+        self.written = 0
+        self.dropped = 0
+        self.suppressed = 0
+        self.write_errors = 0
+        
+    def configure(self, config):
+        """Đọc cấu hình log.* và chạy thread ghi file (gọi lại được khi reload config)"""
+        self.level = LEVELS.get(config.get("log.level", "info"), INFO)
+        self.console_level = LEVELS.get(config.get("log.console_level", "warning"), WARNING)
+        self.rate_limit = config.get("log.rate_limit", 10)
+        self.rate_window = config.get("log.rate_window", 10.0)
+        self.max_bytes = config.get("log.max_bytes", 1048576)
+        self.backups = config.get("log.backups", 3)
+        self.flush_interval = config.get("log.flush_interval", 1.0)
+        size = config.get("log.ring_size", 4096)
+        if size != self.ring.maxlen:
+            self.ring = deque(self.ring, maxlen=size)
+            self.outbox = deque(self.outbox, maxlen=size)
+        path = config.get("log.path")
+        self.path = default_log_path() if path is None else (os.path.expanduser(path) or None)
+        if config.get("log.crash_dump", True) and self.previous_excepthook is None:
+            self.previous_excepthook = sys.excepthook
+            sys.excepthook = self._excepthook
+        if not self.running:
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name="iarde-log", daemon=True)
+            self.thread.start()
+            
+    def stop(self):
+        """Ghi nốt record còn lại rồi dừng thread nền"""
+        if not self.running:
+            return
+        self.running = False
+        self.wake.set()
+        self.thread.join(self.flush_interval + 1.0)
+        self.thread = None
+        if self.previous_excepthook is not None:
+            sys.excepthook = self.previous_excepthook
+            self.previous_excepthook = None
+            
+    # Ghi log (main loop): không I/O, không chờ
+    def log(self, level: int, key: str, message: str, exc_info: bool = False, **fields):
+        """Ghi một record; key dùng để giới hạn tần suất (cùng loại lỗi lặp lại chỉ ghi rate_limit lần)"""
+        if level < self.level:
+            return
+        now = time.time()
+        bucket = self.buckets.get(key)
+        if bucket is None or now - bucket[0] >= self.rate_window:
+            if bucket and bucket[2]:
+                fields['suppressed'] = bucket[2]
+            bucket = self.buckets[key] = [now, 0, 0]
+        elif bucket[1] >= self.rate_limit:
+            bucket[2] += 1
+            self.suppressed += 1
+            return
+        bucket[1] += 1
+        if exc_info:
+            fields['traceback'] = traceback.format_exc()
+        record = (now, level, key, message, fields)
+        self.ring.append(record)
+        if not self.running:
+            # Chưa có thread nền (trước configure, công cụ dòng lệnh): in thẳng
+            if level >= self.console_level:
+                self._write_console([record])
+            return
+        if len(self.outbox) == self.outbox.maxlen:
+            self.dropped += 1
+        self.outbox.append(record)
+        if level >= self.console_level and not self.wake.is_set():
+            self.wake.set()
+            
+    def debug(self, key: str, message: str, **fields):
+        self.log(DEBUG, key, message, **fields)
+        
+    def info(self, key: str, message: str, **fields):
+        self.log(INFO, key, message, **fields)
+        
+    def warning(self, key: str, message: str, **fields):
+        self.log(WARNING, key, message, **fields)
+        
+    def error(self, key: str, message: str, **fields):
+        self.log(ERROR, key, message, **fields)
+        
+    def exception(self, key: str, message: str, **fields):
+        """Lỗi kèm traceback của exception đang xử lý (traceback chỉ được format nếu record không bị chặn)"""
+        self.log(ERROR, key, message, exc_info=True, **fields)
+        
+    def dump(self, path: Optional[str] = None) -> str:
+        """Ghi toàn bộ ring buffer ra file (thread nền ghi), trả về đường dẫn"""
+        path = path or f"{self.path or default_log_path()}.dump"
+        self.dumps.append((path, list(self.ring)))
+        if self.running:
+            self.wake.set()
+        else:
+            self._write_dumps()
+        return path
+        
+    def recent(self, limit: int = 100) -> List[dict]:
+        """Các record gần nhất (cho IPC)"""
+        records = list(self.ring)[-limit:] if limit else list(self.ring)
+        return [format_record(record) for record in records]
+        
+    def crash_dump(self) -> Optional[str]:
+        """Dump ring buffer ngay trên thread hiện tại (khi crash, không chờ thread nền)"""
+        path = f"{self.path or default_log_path()}.crash"
+        try:
+            self._write_file(path, list(self.ring), 'w')
+        except OSError:
+            return None
+        print(f"Crash log written to {path}", file=sys.stderr)
+        return path
+        
+    def _excepthook(self, exc_type, exc, tb):
+        """Exception không được bắt: ghi vào ring rồi dump"""
+        self.ring.append((time.time(), ERROR, 'crash', f"Unhandled {exc_type.__name__}: {exc}",
+                          {'traceback': ''.join(traceback.format_exception(exc_type, exc, tb))}))
+        self.crash_dump()
+        if self.previous_excepthook:
+            self.previous_excepthook(exc_type, exc, tb)
+            
+    # Thread nền: mọi I/O (file có thể chậm hoặc đầy, stderr có thể bị chặn) nằm ở đây
+    def _run(self):
+        while True:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            running = self.running
+            self._drain()
+            self._write_dumps()
+            if not running:
+                break
+        self._close()
+        
+    def _drain(self):
+        records = []
+        while self.outbox:
+            records.append(self.outbox.popleft())
+        if not records:
+            return
+        self._write_console([record for record in records if record[1] >= self.console_level])
+        if self.path:
+            try:
+                self._append(records)
+            except OSError:
+                # Đĩa đầy/lỗi: bỏ batch này, thử mở lại file ở lần sau
+                self.write_errors += 1
+                self._close()
+                
+    def _append(self, records: List[tuple]):
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.file = open(self.path, 'a', encoding='utf-8')
+        for record in records:
+            self.file.write(json.dumps(format_record(record), default=str) + '\n')
+        self.file.flush()
+        self.written += len(records)
+        if self.file.tell() >= self.max_bytes:
+            self._rotate()
+            
+    def _rotate(self):
+        """iarde.log -> iarde.log.1 -> ... -> iarde.log.<backups>"""
+        self._close()
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+            
+    def _close(self):
+        if self.file:
+            try:
+                self.file.close()
+            except OSError:
+                pass
+            self.file = None
+            
+    def _write_dumps(self):
+        while self.dumps:
+            path, records = self.dumps.popleft()
+            try:
+                self._write_file(path, records, 'w')
+            except OSError:
+                self.write_errors += 1
+                
+    @staticmethod
+    def _write_file(path: str, records: List[tuple], mode: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, mode, encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(format_record(record), default=str) + '\n')
+                
+    @staticmethod
+    def _write_console(records: List[tuple]):
+        for record in records:
+            _, level, key, message, fields = record
+            line = f"[{LEVEL_NAMES.get(level, level)}] {message}"
+            if 'suppressed' in fields:
+                line += f" ({fields['suppressed']} similar messages suppressed)"
+            try:
+                print(line, file=sys.stderr)
+            except (OSError, ValueError):
+                pass
+                
+    def get_info(self) -> dict:
+        return {
+            'path': self.path,
+            'level': LEVEL_NAMES.get(self.level),
+            'buffered': len(self.ring),
+            'pending': len(self.outbox),
+            'written': self.written,
+            'dropped': self.dropped,
+            'suppressed': self.suppressed,
+            'write_errors': self.write_errors,
+        }
+
+logger = Logger()
@@ -0,0 +1,118 @@
+import heapq
+import itertools
+import selectors
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+class Timer:
+    """Một callback được hẹn giờ trên EventLoop"""
+    
+    def __init__(self, when: float, seq: int, callback: Callable, args: tuple):
+        self.when = when
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        
+    def cancel(self):
+        """Hủy timer (timer bị bỏ qua khi đến hạn)"""
+        self.cancelled = True
+        
+    def __lt__(self, other: 'Timer') -> bool:
+        return (self.when, self.seq) < (other.when, other.seq)
+
+class EventLoop:
+    """Vòng lặp sự kiện dùng selectors cho X connection, socket IPC và timer"""
+    
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self._handlers: Dict[int, Tuple[Optional[Callable], Optional[Callable]]] = {}
+        self._timers: List[Timer] = []
+        self._seq = itertools.count()
+        
+    def _update(self, fd: int, reader: Optional[Callable], writer: Optional[Callable]):
+        """Cập nhật đăng ký của một file descriptor trong selector"""
+        events = 0
+        if reader:
+            events |= selectors.EVENT_READ
+        if writer:
+            events |= selectors.EVENT_WRITE
+            
+        registered = fd in self._handlers
+        if not events:
+            if registered:
+                self.selector.unregister(fd)
+                del self._handlers[fd]
+            return
+            
+        self._handlers[fd] = (reader, writer)
+        if registered:
+            self.selector.modify(fd, events)
+        else:
+            self.selector.register(fd, events)
+            
+    def add_reader(self, fd: int, callback: Callable):
+        """Gọi callback khi fd có dữ liệu để đọc"""
+        _, writer = self._handlers.get(fd, (None, None))
+        self._update(fd, callback, writer)
+        
+    def remove_reader(self, fd: int):
+        """Ngừng theo dõi fd để đọc"""
+        _, writer = self._handlers.get(fd, (None, None))
+        self._update(fd, None, writer)
+        
+    def add_writer(self, fd: int, callback: Callable):
+        """Gọi callback khi fd có thể ghi"""
+        reader, _ = self._handlers.get(fd, (None, None))
+        self._update(fd, reader, callback)
+        
+    def remove_writer(self, fd: int):
+        """Ngừng theo dõi fd để ghi"""
+        reader, _ = self._handlers.get(fd, (None, None))
+        self._update(fd, reader, None)
+        
+    def call_later(self, delay: float, callback: Callable, *args) -> Timer:
+        """Hẹn giờ gọi callback sau delay giây"""
+        return self.call_at(time.monotonic() + delay, callback, *args)
+        
+    def call_at(self, when: float, callback: Callable, *args) -> Timer:
+        """Hẹn giờ gọi callback tại thời điểm monotonic `when`"""
+        timer = Timer(when, next(self._seq), callback, args)
+        heapq.heappush(self._timers, timer)
+        return timer
+        
+    def _next_timeout(self, timeout: Optional[float]) -> Optional[float]:
+        """Tính thời gian chờ tối đa dựa trên timer gần nhất"""
+        while self._timers and self._timers[0].cancelled:
+            heapq.heappop(self._timers)
+        if not self._timers:
+            return timeout
+        delay = max(0.0, self._timers[0].when - time.monotonic())
+        return delay if timeout is None else min(delay, timeout)
+        
+    def _run_timers(self):
+        """Chạy các timer đã đến hạn"""
+        now = time.monotonic()
+        while self._timers and self._timers[0].when <= now:
+            timer = heapq.heappop(self._timers)
+            if not timer.cancelled:
+                timer.callback(*timer.args)
+                
+    def run_once(self, timeout: Optional[float] = None):
+        """Chờ một lượt I/O hoặc timer rồi gọi các callback tương ứng"""
+        ready = self.selector.select(self._next_timeout(timeout))
+        for key, mask in ready:
+            reader, writer = self._handlers.get(key.fd, (None, None))
+            if mask & selectors.EVENT_READ and reader:
+                reader()
+            # Reader có thể đã gỡ fd (ví dụ client IPC đóng kết nối)
+            reader, writer = self._handlers.get(key.fd, (None, None))
+            if mask & selectors.EVENT_WRITE and writer:
+                writer()
+        self._run_timers()
+        
+    def close(self):
+        """Giải phóng selector"""
+        self.selector.close()
+        self._handlers.clear()
+        self._timers.clear()
@@ -0,0 +1,285 @@
+import math
+import time
+import traceback
+from typing import Dict, List, Optional, Set
+from .log import logger
+
+class Histogram:
+    """Histogram log-linear kiểu HDR: bộ nhớ cố định, sai số tương đối ~1/2^SUB_BITS"""
+    
+    SUB_BITS = 5  # 32 bucket con cho mỗi lũy thừa 2 (sai số ~3%)
+    MAX_EXPONENT = 26  # Giá trị tối đa ~2^32 µs, lớn hơn thì dồn vào bucket cuối
+    BUCKETS = (MAX_EXPONENT + 2) << SUB_BITS
+    
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max = 0
+        
+    @classmethod
+    def _index(cls, value: int) -> int:
+        """Index bucket của một giá trị (µs)"""
+        exponent = value.bit_length() - cls.SUB_BITS - 1
+        if exponent <= 0:
+            # Giá trị nhỏ (< 2^(SUB_BITS+1)) được lưu chính xác
+            return value
+        if exponent > cls.MAX_EXPONENT:
+            return cls.BUCKETS - 1
+        return (exponent << cls.SUB_BITS) + (value >> exponent)
+        
+    @classmethod
+    def _upper_bound(cls, index: int) -> int:
+        """Giá trị lớn nhất thuộc bucket"""
+        exponent = max(0, (index >> cls.SUB_BITS) - 1)
+        sub = index - (exponent << cls.SUB_BITS)
+        return ((sub + 1) << exponent) - 1
+        
+    def record(self, value: int):
+        """Ghi một giá trị (µs)"""
+        value = max(0, int(value))
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+            
+    def percentile(self, p: float) -> int:
+        """Giá trị tại phân vị p (0-100), làm tròn lên theo bucket"""
+        if not self.count:
+            return 0
+        target = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count:
+                seen += count
+                if seen >= target:
+                    return min(self._upper_bound(index), self.max)
+        return self.max
+        
+    def merge(self, other: 'Histogram'):
+        """Cộng dồn một histogram khác vào histogram này"""
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+        
+    def get_info(self) -> dict:
+        """Tóm tắt dạng dict (µs)"""
+        return {
+            'count': self.count,
+            'mean': self.total // self.count if self.count else 0,
+            'min': self.min or 0,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+class ScopeStats:
+    """Thống kê của một scope (loại event, keybind, command...)"""
+    __slots__ = ('histogram', 'requests', 'flushes', 'round_trips')
+    
+    def __init__(self):
+        self.histogram = Histogram()
+        self.requests = 0
+        self.flushes = 0
+        self.round_trips = 0
+        
+    def get_info(self) -> dict:
+        info = self.histogram.get_info()
+        info.update({
+            'requests': self.requests,
+            'flushes': self.flushes,
+            'round_trips': self.round_trips,
+        })
+        return info
+
+class RoundTripBudgetExceeded(Exception):
+    """Scope chờ reply nhiều hơn ngân sách cho phép (strict mode)"""
+
+class Metrics:
+    """Đo latency theo scope và đếm request/flush/round-trip X (qua CountingConnection)"""
+    
+    def __init__(self, budgets: Optional[Dict[str, int]] = None, strict_action: str = "log"):
+        self.scopes: Dict[str, ScopeStats] = {}
+        # Bộ đếm toàn cục, CountingConnection tăng trực tiếp
+        self.requests = 0
+        self.flushes = 0
+        self.round_trips = 0
+        self.flushed_through = 0  # Request cuối cùng đã được gửi đi trong một lần chờ reply
+        self.started = time.monotonic()
+        
+        # Strict mode: số round-trip tối đa theo tên scope ("log" hoặc "raise" khi vượt)
+        self.budgets: Dict[str, int] = dict(budgets or {})
+        self.strict_action = strict_action
+        self.budget_frames: List[list] = []  # [tên scope, giới hạn, đã dùng]
+        self.violations: Dict[str, int] = {}
+        self.reported: Set[tuple] = set()  # Vị trí gọi đã in stack trace
+        
+    def begin(self, name: str) -> tuple:
+        """Bắt đầu đo một scope, trả về snapshot để truyền cho end()"""
+        limit = self.budgets.get(name)
+        if limit is not None:
+            self.budget_frames.append([name, limit, 0])
+        return (time.perf_counter_ns(), self.requests, self.flushes, self.round_trips, limit is not None)
+        
+    def end(self, name: str, start: tuple):
+        """Kết thúc scope: ghi latency và số request/flush/round-trip (gồm cả scope lồng bên trong)"""
+        if start[4]:
+            self.budget_frames.pop()
+        elapsed = (time.perf_counter_ns() - start[0]) // 1000
+        stats = self.scopes.get(name)
+        if stats is None:
+            stats = ScopeStats()
+            self.scopes[name] = stats
+        stats.histogram.record(elapsed)
+        stats.requests += self.requests - start[1]
+        stats.flushes += self.flushes - start[2]
+        stats.round_trips += self.round_trips - start[3]
+        
+    def round_trip(self):
+        """Ghi nhận một lần chờ reply, kiểm tra ngân sách của các scope đang mở"""
+        self.round_trips += 1
+        for frame in self.budget_frames:
+            frame[2] += 1
+            if frame[2] > frame[1]:
+                self._over_budget(frame)
+                
+    def _over_budget(self, frame: list):
+        """Xử lý scope vượt ngân sách: raise, hoặc in stack trace một lần cho mỗi vị trí gọi"""
+        name, limit, used = frame
+        self.violations[name] = self.violations.get(name, 0) + 1
+        message = f"Round-trip budget exceeded in {name}: {used} > {limit}"
+        if self.strict_action == "raise":
+            raise RoundTripBudgetExceeded(message)
+            
+        # Bỏ các frame của _over_budget, round_trip và cookie.reply()
+        stack = traceback.extract_stack()[:-3]
+        site = (name, stack[-1].filename, stack[-1].lineno) if stack else (name,)
+        if site not in self.reported:
+            self.reported.add(site)
+            logger.warning(f"budget:{name}", message, stack="".join(traceback.format_list(stack)))
+            
+    def reset(self):
+        """Xóa toàn bộ số liệu"""
+        self.scopes.clear()
+        self.requests = self.flushes = self.round_trips = 0
+        self.violations.clear()
+        self.reported.clear()
+        self.started = time.monotonic()
+        
+    def get_info(self) -> dict:
+        """Toàn bộ số liệu dạng dict (dùng cho IPC)"""
+        return {
+            'uptime': round(time.monotonic() - self.started, 3),
+            'requests': self.requests,
+            'flushes': self.flushes,
+            'round_trips': self.round_trips,
+            'scopes': {name: stats.get_info() for name, stats in self.scopes.items()},
+            'budgets': self.budgets,
+            'violations': self.violations,
+        }
+        
+    def summary(self, top: int = 10) -> List[str]:
+        """Các dòng tóm tắt, scope tốn nhiều thời gian nhất đứng đầu"""
+        lines = [
+            f"metrics: {self.requests} requests, {self.flushes} flushes, "
+            f"{self.round_trips} round trips in {time.monotonic() - self.started:.0f}s"
+        ]
+        if self.violations:
+            lines.append("  budget violations: " + ", ".join(
+                f"{name} x{count}" for name, count in sorted(self.violations.items())
+            ))
+        ranked = sorted(self.scopes.items(), key=lambda item: item[1].histogram.total, reverse=True)
+        for name, stats in ranked[:top]:
+            h = stats.histogram
+            lines.append(
+                f"  {name:<28} n={h.count:<7} p50={h.percentile(50) / 1000:.2f}ms "
+                f"p99={h.percentile(99) / 1000:.2f}ms max={h.max / 1000:.2f}ms "
+                f"req={stats.requests / h.count:.1f} rt={stats.round_trips / h.count:.2f}"
+            )
+        return lines
+
+class CountingCookie:
+    """Bọc cookie của xcffib, đếm các lần chờ reply (round-trip)"""
+    __slots__ = ('cookie', 'metrics', 'issued')
+    
+    def __init__(self, cookie, metrics: Metrics):
+        self.cookie = cookie
+        self.metrics = metrics
+        self.issued = metrics.requests  # Số thứ tự request theo bộ đếm metrics
+        
+    def _wait(self):
+        # Chờ reply sẽ flush mọi request đã gửi; reply của các request cùng đợt
+        # (pipeline) đến ngay sau nên chỉ lần chờ đầu tiên tính là một round-trip
+        metrics = self.metrics
+        if self.issued > metrics.flushed_through:
+            metrics.flushed_through = metrics.requests
+            metrics.round_trip()
+            
+    def reply(self):
+        self._wait()
+        return self.cookie.reply()
+        
+    def check(self):
+        self._wait()
+        return self.cookie.check()
+        
+    def discard_reply(self):
+        return self.cookie.discard_reply()
+        
+    def __getattr__(self, name):
+        return getattr(self.cookie, name)
+
+class CountingExtension:
+    """Bọc core/extension của xcffib, mỗi lời gọi request được đếm"""
+    
+    def __init__(self, extension, metrics: Metrics):
+        self.extension = extension
+        self.metrics = metrics
+        
+    def __getattr__(self, name):
+        attr = getattr(self.extension, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        metrics = self.metrics
+        
+        def request(*args, **kwargs):
+            metrics.requests += 1
+            cookie = attr(*args, **kwargs)
+            return CountingCookie(cookie, metrics) if cookie is not None else None
+            
+        # Cache để lần sau không đi qua __getattr__
+        self.__dict__[name] = request
+        return request
+
+class CountingConnection:
+    """Lớp mỏng bọc XConnection.conn: đếm request, flush và round-trip"""
+    
+    def __init__(self, conn, metrics: Metrics):
+        self.conn = conn
+        self.metrics = metrics
+        self.core = CountingExtension(conn.core, metrics)
+        self.extensions = {}
+        
+    def __call__(self, key):
+        extension = self.extensions.get(key)
+        if extension is None:
+            extension = CountingExtension(self.conn(key), self.metrics)
+            self.extensions[key] = extension
+        return extension
+        
+    def flush(self):
+        self.metrics.flushes += 1
+        self.conn.flush()
+        
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
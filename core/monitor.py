@@ -0,0 +1,231 @@
+import xcffib
+import xcffib.randr as randr
+from typing import Dict, List, Optional, Tuple
+from .conn import XConnection
+from .hooks import Hooks
+from .log import logger
+
+Rect = Tuple[int, int, int, int]
+
+class Monitor:
+    """Một màn hình (output đang bật, gắn với một CRTC)"""
+    
+    def __init__(self, index: int, name: str, crtc: int, x: int, y: int, width: int, height: int):
+        self.index = index
+        self.name = name
+        self.crtc = crtc
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.primary = False
+        self.workspace: Optional[int] = None  # Index workspace đang hiển thị
+        
+    @property
+    def geometry(self) -> Rect:
+        return (self.x, self.y, self.width, self.height)
+        
+    def contains(self, x: int, y: int) -> bool:
+        """Điểm (x, y) có nằm trong màn hình không"""
+        return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
+        
+    def get_info(self) -> dict:
+        """Thông tin màn hình dạng dict (dùng cho IPC)"""
+        return {
+            'index': self.index,
+            'name': self.name,
+            'primary': self.primary,
+            'geometry': list(self.geometry),
+            'workspace': self.workspace,
+        }
+
+class MonitorManager:
+    """Danh sách màn hình lấy qua RandR (một lần), cache và cập nhật tăng dần theo event"""
+    
+    SELECT_MASK = (randr.NotifyMask.ScreenChange | randr.NotifyMask.CrtcChange |
+                   randr.NotifyMask.OutputChange)
+                   
+    def __init__(self, xconn: XConnection, hooks: Hooks):
+        self.xconn = xconn
+        self.hooks = hooks
+        self.monitors: List[Monitor] = []
+        self.current = 0  # Index màn hình đang focus
+        self.randr = None
+        # Thay đổi chờ áp dụng ở cuối batch: crtc -> geometry mới (None = CRTC bị tắt)
+        self.pending_crtcs: Dict[int, Optional[Rect]] = {}
+        self.needs_reload = False
+        
+    def start(self, event_handler):
+        """Truy vấn output qua RandR và đăng ký nhận event thay đổi cấu hình"""
+        core = self.xconn.conn.core
+        try:
+            if core.QueryExtension(len("RANDR"), "RANDR").reply().present:
+                self.randr = self.xconn.conn(randr.key)
+                self.randr.QueryVersion(1, 2).reply()
+                self.randr.SelectInput(self.xconn.root, self.SELECT_MASK)
+        except xcffib.Error as e:
+            logger.warning('randr', f"RandR unavailable: {type(e).__name__}")
+            self.randr = None
+            
+        outputs = self._query_outputs()
+        # Lần đầu: màn hình primary đứng đầu, còn lại theo vị trí trái -> phải
+        outputs.sort(key=lambda o: (not o[6], o[2], o[3]))
+        self._apply(outputs)
+        
+        if self.randr:
+            event_handler.event_handlers.update({
+                randr.ScreenChangeNotifyEvent: self._handle_screen_change,
+                randr.NotifyEvent: self._handle_notify,
+            })
+            
+    def _fallback_outputs(self) -> List[tuple]:
+        """Không có RandR: coi cả root window là một màn hình"""
+        width, height = self.xconn.get_screen_geometry()
+        return [(0, "default", 0, 0, width, height, True)]
+        
+    def _query_outputs(self) -> List[tuple]:
+        """Lấy danh sách (crtc, tên, x, y, w, h, primary) của các CRTC đang bật"""
+        if self.randr is None:
+            return self._fallback_outputs()
+            
+        root = self.xconn.root
+        resources_cookie = self.randr.GetScreenResourcesCurrent(root)
+        primary_cookie = self.randr.GetOutputPrimary(root)
+        resources = resources_cookie.reply()
+        primary = primary_cookie.reply().output
+        
+        # Gửi hết GetCrtcInfo rồi mới chờ reply: một round-trip cho mọi CRTC
+        timestamp = resources.config_timestamp
+        cookies = [(crtc, self.randr.GetCrtcInfo(crtc, timestamp)) for crtc in resources.crtcs]
+        active = []
+        seen = set()
+        for crtc, cookie in cookies:
+            info = cookie.reply()
+            rect = (info.x, info.y, info.width, info.height)
+            if not info.mode or not info.num_outputs or not info.width or rect in seen:
+                # CRTC tắt hoặc mirror của màn hình đã có
+                continue
+            seen.add(rect)
+            active.append((crtc, info, list(info.outputs)))
+            
+        name_cookies = [self.randr.GetOutputInfo(outputs[0], timestamp) for _, _, outputs in active]
+        result = []
+        for (crtc, info, outputs), cookie in zip(active, name_cookies):
+            name = cookie.reply().name.buf().decode('latin-1')
+            result.append((crtc, name, info.x, info.y, info.width, info.height, primary in outputs))
+        return result or self._fallback_outputs()
+        
+    def _apply(self, outputs: List[tuple]) -> List[Monitor]:
+        """So sánh với cache, cập nhật và phát hook 'monitor'; trả về các màn hình thay đổi"""
+        if not outputs:
+            outputs = self._fallback_outputs()
+            
+        current = self.get_current()
+        primary_before = self.get_primary()
+        by_crtc = {monitor.crtc: monitor for monitor in self.monitors}
+        added, changed = [], []
+        for crtc, name, x, y, width, height, primary in outputs:
+            monitor = by_crtc.pop(crtc, None)
+            if monitor is None:
+                monitor = Monitor(len(self.monitors), name, crtc, x, y, width, height)
+                self.monitors.append(monitor)
+                added.append(monitor)
+            elif monitor.geometry != (x, y, width, height):
+                monitor.x, monitor.y, monitor.width, monitor.height = x, y, width, height
+                changed.append(monitor)
+            monitor.primary = primary
+            
+        # Những CRTC còn lại trong by_crtc đã bị tắt/rút ra
+        removed = list(by_crtc.values())
+        for monitor in removed:
+            self.monitors.remove(monitor)
+        for index, monitor in enumerate(self.monitors):
+            monitor.index = index
+        self.current = current.index if current in self.monitors else 0
+        
+        for monitor in removed:
+            self.hooks.emit('monitor', 'remove', monitor)
+        for monitor in added:
+            self.hooks.emit('monitor', 'add', monitor)
+        for monitor in changed:
+            self.hooks.emit('monitor', 'geometry', monitor)
+        primary = self.get_primary()
+        if primary is not primary_before and primary not in added:
+            # Primary đổi sang màn hình đã có (bar chuyển theo)
+            self.hooks.emit('monitor', 'primary', primary)
+        return added + changed
+        
+    def apply_pending(self) -> List[Monitor]:
+        """Áp dụng các thay đổi đã gom trong batch (gọi một lần cuối mỗi batch)"""
+        if self.needs_reload:
+            # Output được cắm/rút: cần truy vấn lại tên và danh sách CRTC
+            self.needs_reload = False
+            self.pending_crtcs.clear()
+            return self._apply(self._query_outputs())
+            
+        if not self.pending_crtcs:
+            return []
+        outputs = []
+        for monitor in self.monitors:
+            rect = self.pending_crtcs.get(monitor.crtc, monitor.geometry)
+            if rect is not None:
+                outputs.append((monitor.crtc, monitor.name) + tuple(rect) + (monitor.primary,))
+        self.pending_crtcs.clear()
+        return self._apply(outputs)
+        
+    def _handle_screen_change(self, event: randr.ScreenChangeNotifyEvent) -> bool:
+        """Kích thước root window thay đổi"""
+        width, height = event.width, event.height
+        if event.rotation & (randr.Rotation.Rotate_90 | randr.Rotation.Rotate_270):
+            width, height = height, width
+        self.xconn.screen_width = width
+        self.xconn.screen_height = height
+        return True
+        
+    def _handle_notify(self, event: randr.NotifyEvent) -> bool:
+        """CrtcChange cập nhật trực tiếp từ dữ liệu event, OutputChange thì truy vấn lại"""
+        if event.subCode == randr.Notify.CrtcChange:
+            change = event.u.cc
+            known = any(monitor.crtc == change.crtc for monitor in self.monitors)
+            if not change.mode or not change.width:
+                if known:
+                    self.pending_crtcs[change.crtc] = None
+            elif known:
+                width, height = change.width, change.height
+                if change.rotation & (randr.Rotation.Rotate_90 | randr.Rotation.Rotate_270):
+                    # Kích thước trong event là của mode (chưa xoay)
+                    width, height = height, width
+                self.pending_crtcs[change.crtc] = (change.x, change.y, width, height)
+            else:
+                # CRTC mới bật: cần tên output
+                self.needs_reload = True
+        elif event.subCode == randr.Notify.OutputChange:
+            self.needs_reload = True
+        return True
+        
+    def get_current(self) -> Optional[Monitor]:
+        """Màn hình đang focus"""
+        if 0 <= self.current < len(self.monitors):
+            return self.monitors[self.current]
+        return self.monitors[0] if self.monitors else None
+        
+    def get_primary(self) -> Optional[Monitor]:
+        """Màn hình primary (hoặc màn hình đầu tiên)"""
+        for monitor in self.monitors:
+            if monitor.primary:
+                return monitor
+        return self.monitors[0] if self.monitors else None
+        
+    def monitor_at(self, x: int, y: int) -> Optional[Monitor]:
+        """Màn hình chứa điểm (x, y)"""
+        for monitor in self.monitors:
+            if monitor.contains(x, y):
+                return monitor
+        return None
+        
+    def monitor_for_workspace(self, index: int) -> Optional[Monitor]:
+        """Màn hình đang hiển thị workspace (None nếu workspace đang ẩn)"""
+        for monitor in self.monitors:
+            if monitor.workspace == index:
+                return monitor
+        return None
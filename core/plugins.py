@@ -0,0 +1,168 @@
+import importlib
+import time
+from typing import Callable, Dict, List, Optional
+from .metrics import Histogram
+from .log import logger
+
+class Plugin:
+    """Plugin khai báo trong config: module chỉ được import khi hook/action đã khai báo được gọi lần đầu"""
+    
+    def __init__(self, name: str, manifest: dict, budget_ms: float):
+        self.name = name
+        self.module_name = manifest['module']
+        self.hooks: List[str] = list(manifest.get('hooks', []))
+        self.actions: List[str] = list(manifest.get('actions', []))
+        self.keybinds: Dict[str, str] = dict(manifest.get('keybinds', {}))
+        self.options: dict = manifest.get('options', {})
+        self.budget_us = int(manifest.get('budget_ms', budget_ms) * 1000)
+        self.instance = None
+        self.loaded = False
+        self.disabled: Optional[str] = None  # Lý do bị tắt
+        # Chi phí (µs): mỗi lần gọi và lần import/setup
+        self.latency = Histogram()
+        self.load_us = 0
+        self.violations = 0
+        self.errors = 0
+        
+    def get_info(self) -> dict:
+        info = {
+            'module': self.module_name,
+            'hooks': self.hooks,
+            'actions': self.actions,
+            'loaded': self.loaded,
+            'disabled': self.disabled,
+            'budget_ms': self.budget_us / 1000,
+            'load_ms': round(self.load_us / 1000, 3),
+            'violations': self.violations,
+            'errors': self.errors,
+        }
+        info.update(self.latency.get_info())
+        return info
+
+class PluginManager:
+    """Nạp plugin lười và chỉ gọi plugin cho đúng hook/action nó khai báo, đo thời gian từng plugin"""
+    
+    def __init__(self, wm):
+        self.wm = wm
+        self.plugins: Dict[str, Plugin] = {}
+        # Tên hook -> plugin đã khai báo hook đó (không phát cho mọi plugin)
+        self.by_hook: Dict[str, List[Plugin]] = {}
+        self.dispatchers: Dict[str, Callable] = {}
+        self.budget_action = "warn"
+        self.max_violations = 3
+        
+    def start(self):
+        """Đọc khai báo plugin từ config, đăng ký hook/action/keybind (chưa import module nào)"""
+        config = self.wm.config
+        self.budget_action = config.get("plugins.budget_action", "warn")
+        self.max_violations = config.get("plugins.max_violations", 3)
+        budget_ms = config.get("plugins.budget_ms", 5.0)
+        for name, manifest in config.get("plugins.modules", {}).items():
+            if not manifest.get('enabled', True):
+                continue
+            if 'module' not in manifest:
+                logger.warning('plugins', f"Plugin '{name}' has no module, skipped")
+                continue
+            plugin = Plugin(name, manifest, budget_ms)
+            self.plugins[name] = plugin
+            for hook in plugin.hooks:
+                self.by_hook.setdefault(hook, []).append(plugin)
+            for action in plugin.actions:
+                self.wm.actions[action] = lambda plugin=plugin, action=action: self.call(plugin, action)
+            for keybind, action in plugin.keybinds.items():
+                if action in plugin.actions:
+                    self.wm.keybind_manager.add_keybind(keybind, self.wm.actions[action])
+                    
+        for hook in self.by_hook:
+            dispatcher = lambda *args, hook=hook: self.dispatch(hook, *args)
+            self.dispatchers[hook] = dispatcher
+            self.wm.hooks.subscribe(hook, dispatcher)
+            
+    def stop(self):
+        """Gọi stop() của các plugin đã nạp (khi thoát WM)"""
+        for plugin in self.plugins.values():
+            if plugin.loaded and not plugin.disabled:
+                self.call(plugin, 'stop')
+                
+    def _load(self, plugin: Plugin) -> bool:
+        """Import module và gọi setup(wm, options) lần đầu plugin được cần tới"""
+        start = time.perf_counter_ns()
+        try:
+            module = importlib.import_module(plugin.module_name)
+            plugin.instance = module.setup(self.wm, plugin.options)
+        except Exception as e:
+            logger.exception(f"plugin:{plugin.name}", f"Failed to load plugin '{plugin.name}': {e}")
+            self.disable(plugin, f"load failed: {e}")
+            return False
+        finally:
+            plugin.load_us = (time.perf_counter_ns() - start) // 1000
+        plugin.loaded = True
+        return True
+        
+    def dispatch(self, hook: str, *args):
+        """Gọi on_<hook> của những plugin đã khai báo hook"""
+        # Copy vì plugin có thể bị tắt (và gỡ khỏi danh sách) trong lúc gọi
+        for plugin in list(self.by_hook.get(hook, ())):
+            self.call(plugin, f"on_{hook}", *args)
+            
+    def call(self, plugin: Plugin, method: str, *args):
+        """Gọi một method của plugin, đo thời gian và áp dụng ngân sách"""
+        if plugin.disabled:
+            return None
+        if not plugin.loaded and not self._load(plugin):
+            return None
+        callback = getattr(plugin.instance, method, None)
+        if callback is None:
+            return None
+        start = time.perf_counter_ns()
+        failed = False
+        try:
+            return callback(*args)
+        except Exception as e:
+            failed = True
+            plugin.errors += 1
+            logger.exception(f"plugin:{plugin.name}", f"Error in plugin '{plugin.name}' ({method}): {e}")
+            return None
+        finally:
+            elapsed = (time.perf_counter_ns() - start) // 1000
+            plugin.latency.record(elapsed)
+            # Mỗi lần gọi tính tối đa một vi phạm (vừa lỗi vừa chậm vẫn là một)
+            if failed:
+                self._violation(plugin, f"error in {method}")
+            elif elapsed > plugin.budget_us:
+                self._violation(plugin, f"{method} took {elapsed / 1000:.2f}ms > {plugin.budget_us / 1000:g}ms")
+                
+    def _violation(self, plugin: Plugin, reason: str):
+        """Plugin vượt ngân sách hoặc lỗi: cảnh báo lần đầu, tắt khi quá max_violations (budget_action=disable)"""
+        if plugin.disabled:
+            return
+        plugin.violations += 1
+        if self.budget_action == "disable" and plugin.violations >= self.max_violations:
+            logger.warning(f"plugin:{plugin.name}", f"Plugin '{plugin.name}' disabled: {reason}")
+            self.disable(plugin, reason)
+        elif plugin.violations == 1:
+            logger.warning(f"plugin:{plugin.name}", f"Plugin '{plugin.name}' over budget: {reason}")
+            
+    def disable(self, plugin: Plugin, reason: str = "disabled"):
+        """Tắt plugin: gỡ khỏi mọi hook, action của nó thành no-op"""
+        if plugin.disabled:
+            return
+        if plugin.loaded:
+            stop = getattr(plugin.instance, 'stop', None)
+            if stop:
+                try:
+                    stop()
+                except Exception as e:
+                    logger.exception(f"plugin:{plugin.name}", f"Error stopping plugin '{plugin.name}': {e}")
+        plugin.disabled = reason
+        for hook in plugin.hooks:
+            plugins = self.by_hook.get(hook)
+            if plugins and plugin in plugins:
+                plugins.remove(plugin)
+            if not plugins and hook in self.dispatchers:
+                # Không còn plugin nào nghe hook: bỏ dispatcher khỏi bus
+                self.wm.hooks.unsubscribe(hook, self.dispatchers.pop(hook))
+                self.by_hook.pop(hook, None)
+                
+    def get_info(self) -> dict:
+        return {name: plugin.get_info() for name, plugin in self.plugins.items()}
@@ -0,0 +1,246 @@
+import os
+import queue
+import threading
+import xcffib.xproto as xproto
+from array import array
+from collections import deque
+from typing import Dict, Optional, Tuple
+from .window import Window
+from .log import logger
+
+# Loại dữ liệu prefetch
+ICON = 'icon'
+PID = 'pid'
+TITLE = 'title'
+
+def decode_icon(data: array, size: int) -> Optional[tuple]:
+    """Chọn icon gần `size` nhất trong _NET_WM_ICON (ưu tiên icon lớn hơn) và scale về size x size"""
+    best = None
+    offset = 0
+    while offset + 2 <= len(data):
+        width, height = data[offset], data[offset + 1]
+        start = offset + 2
+        offset = start + width * height
+        if not width or not height or offset > len(data):
+            break
+        key = (max(width, height) < size, abs(max(width, height) - size))
+        if best is None or key < best[0]:
+            best = (key, width, height, start)
+    if best is None:
+        return None
+    _, width, height, start = best
+    # Nearest-neighbour, giữ tỷ lệ theo cạnh dài
+    scale = max(width, height)
+    out_width, out_height = max(1, width * size // scale), max(1, height * size // scale)
+    pixels = array('I', bytes(4 * out_width * out_height))
+    for y in range(out_height):
+        row = start + (y * height // out_height) * width
+        base = y * out_width
+        for x in range(out_width):
+            pixels[base + x] = data[row + x * width // out_width]
+    return (out_width, out_height, pixels)
+
+def read_process(pid: int) -> Optional[str]:
+    """Tên process từ /proc (chỉ có nghĩa với client chạy trên máy này)"""
+    try:
+        with open(f"/proc/{pid}/comm") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+class Prefetcher:
+    """Đọc icon, PID/process và tiêu đề dài trên kết nối X thứ hai ở thread riêng, không chặn main loop"""
+    
+    def __init__(self, wm):
+        self.wm = wm
+        self.xconn = wm.xconn
+        self.enabled = False
+        self.conn = None  # Kết nối X riêng của worker
+        self.thread: Optional[threading.Thread] = None
+        self.jobs: Optional[queue.Queue] = None
+        # Kết quả từ worker (deque thread-safe), main loop được đánh thức qua pipe
+        self.results = deque()
+        self.wake_read = self.wake_write = None
+        # (window_id, loại) -> số thứ tự của request mới nhất, kết quả cũ hơn bị bỏ
+        self.pending: Dict[Tuple[int, str], int] = {}
+        self.seq = 0
+        self.atoms: Dict[str, int] = {}
+        self.title_limit = 64
+        self.icon_size = 32
+        self.icon_limit = 262144
+        self.queued = 0
+        self.applied = 0
+        self.dropped = 0  # Hàng đợi đầy hoặc cửa sổ đã bị hủy
+        
+    def start(self):
+        """Mở kết nối X thứ hai và chạy worker (prefetch.enabled)"""
+        config = self.wm.config
+        if not config.get("prefetch.enabled", True):
+            return
+        self.title_limit = max(1, config.get("prefetch.title_limit", 256) // 4)
+        self.icon_size = config.get("prefetch.icon_size", 32)
+        self.icon_limit = config.get("prefetch.icon_limit", 1048576) // 4
+        # Atom được intern trên main thread, worker chỉ đọc
+        self.xconn.intern_atoms(['_NET_WM_ICON', '_NET_WM_PID', '_NET_WM_NAME', 'UTF8_STRING'])
+        self.atoms = {name: self.xconn.get_atom(name)
+                      for name in ('_NET_WM_ICON', '_NET_WM_PID', '_NET_WM_NAME', 'UTF8_STRING')}
+        try:
+            self.conn = self.xconn.backend.connect()
+        except Exception as e:
+            logger.error('prefetch', f"Failed to open prefetch connection: {e}")
+            return
+        self.wake_read, self.wake_write = os.pipe()
+        os.set_blocking(self.wake_read, False)
+        os.set_blocking(self.wake_write, False)
+        self.wm.loop.add_reader(self.wake_read, self.poll)
+        self.jobs = queue.Queue(config.get("prefetch.queue_size", 256))
+        self.thread = threading.Thread(target=self._run, name="iarde-prefetch", daemon=True)
+        self.thread.start()
+        self.enabled = True
+        self.wm.hooks.subscribe('window', self._on_window)
+        for window in self.wm.event_handler.get_all_windows():
+            self._on_window('new', window)
+            
+    def stop(self):
+        """Dừng worker và đóng kết nối thứ hai"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self.wm.hooks.unsubscribe('window', self._on_window)
+        # Bỏ job chưa làm để sentinel vào được hàng đợi
+        while True:
+            try:
+                self.jobs.get_nowait()
+            except queue.Empty:
+                break
+        self.jobs.put(None)
+        self.thread.join(1.0)
+        self.wm.loop.remove_reader(self.wake_read)
+        os.close(self.wake_read)
+        os.close(self.wake_write)
+        self.conn.disconnect()
+        self.pending.clear()
+        self.results.clear()
+        
+    def attach(self, window: Window):
+        """Cửa sổ mới: main loop chỉ đọc phần đầu tiêu đề (gọi trước load_hints)"""
+        if self.enabled:
+            window.title_limit = self.title_limit
+            
+    def _on_window(self, change: str, window: Window):
+        if change == 'new':
+            self.request(window, PID)
+            self.request(window, ICON)
+            if window.title_truncated:
+                self.request(window, TITLE)
+        elif change == 'title':
+            if window.title_truncated:
+                self.request(window, TITLE)
+        elif change == 'close':
+            for kind in (ICON, PID, TITLE):
+                self.pending.pop((window.window_id, kind), None)
+                
+    def request(self, window: Window, kind: str):
+        """Đưa một job vào hàng đợi (không chặn, bỏ nếu hàng đợi đầy)"""
+        if not self.enabled:
+            return
+        self.seq += 1
+        try:
+            self.jobs.put_nowait((window.window_id, kind, self.seq))
+        except queue.Full:
+            self.dropped += 1
+            return
+        self.pending[(window.window_id, kind)] = self.seq
+        self.queued += 1
+        
+    # Worker thread: chỉ dùng self.conn, không chạm vào state của WM
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            window_id, kind, seq = job
+            try:
+                value = getattr(self, f'_fetch_{kind}')(window_id)
+            except Exception:
+                # Cửa sổ đã bị hủy (BadWindow) hoặc property không hợp lệ
+                value = None
+            self.results.append((window_id, kind, seq, value))
+            try:
+                os.write(self.wake_write, b'\0')
+            except (BlockingIOError, OSError):
+                pass  # Pipe đầy: main loop đã được đánh thức
+                
+    def _get_property(self, window_id: int, atom: int, type_: int, length: int):
+        return self.conn.core.GetProperty(False, window_id, atom, type_, 0, length).reply()
+        
+    def _fetch_icon(self, window_id: int) -> Optional[tuple]:
+        reply = self._get_property(window_id, self.atoms['_NET_WM_ICON'], xproto.Atom.CARDINAL, self.icon_limit)
+        if reply.format != 32 or not reply.value_len:
+            return None
+        return decode_icon(array('I', reply.value.buf()), self.icon_size)
+        
+    def _fetch_pid(self, window_id: int) -> Optional[tuple]:
+        reply = self._get_property(window_id, self.atoms['_NET_WM_PID'], xproto.Atom.CARDINAL, 1)
+        if reply.format != 32 or not reply.value_len:
+            return None
+        pid = array('I', reply.value.buf())[0]
+        return (pid, read_process(pid))
+        
+    def _fetch_title(self, window_id: int) -> Optional[str]:
+        # Độ dài đầy đủ có trong bytes_after của request đầu, đọc tiếp một lần là đủ
+        for atom, type_, encoding in ((self.atoms['_NET_WM_NAME'], self.atoms['UTF8_STRING'], 'utf-8'),
+                                      (xproto.Atom.WM_NAME, xproto.Atom.STRING, 'latin-1')):
+            reply = self._get_property(window_id, atom, type_, 0)
+            if reply.bytes_after:
+                reply = self._get_property(window_id, atom, type_, (reply.bytes_after + 3) // 4)
+                return reply.value.buf().decode(encoding, 'replace')
+        return None
+        
+    # Main loop
+    def poll(self):
+        """Áp dụng kết quả worker gửi về lên Window (bỏ kết quả của cửa sổ đã hủy hoặc đã cũ)"""
+        try:
+            os.read(self.wake_read, 4096)
+        except BlockingIOError:
+            pass
+        event_handler = self.wm.event_handler
+        changed = False
+        while self.results:
+            window_id, kind, seq, value = self.results.popleft()
+            if self.pending.get((window_id, kind)) != seq:
+                self.dropped += 1
+                continue
+            del self.pending[(window_id, kind)]
+            window = event_handler.get_window(window_id)
+            if window is None or window.is_destroyed:
+                self.dropped += 1
+                continue
+            if value is None:
+                continue
+            self.applied += 1
+            if kind == TITLE:
+                window.title_truncated = False
+                if value != window.title:
+                    window.title = value
+                    self.wm.hooks.emit('window', 'title', window)
+                    changed = True
+            elif kind == PID:
+                window.pid, window.process = value
+                self.wm.hooks.emit('window', 'process', window)
+            else:
+                window.icon = value
+                self.wm.hooks.emit('window', 'icon', window)
+        if changed:
+            # Tiêu đề không ảnh hưởng layout: chỉ cho tab/frame/bar vẽ lại rồi flush
+            self.wm.hooks.emit('batch_end')
+        self.xconn.flush()
+            
+    def get_info(self) -> dict:
+        return {
+            'enabled': self.enabled,
+            'queued': self.queued,
+            'pending': len(self.pending),
+            'applied': self.applied,
+            'dropped': self.dropped,
+        }
@@ -0,0 +1,144 @@
+from typing import Dict, List, Optional, Tuple
+from .window import Window
+
+# Giá trị WM_STATE (ICCCM 4.1.3.1)
+NORMAL_STATE = 1
+ICONIC_STATE = 3
+
+# Lý do cửa sổ bị ẩn
+SCRATCHPAD = 'scratchpad'
+MINIMIZED = 'minimized'
+
+class Scratchpad:
+    """Scratchpad và minimize: cửa sổ ẩn vẫn được map và quản lý, chỉ bị đẩy ra ngoài màn hình"""
+    
+    def __init__(self, wm):
+        self.wm = wm
+        self.xconn = wm.xconn
+        # window_id -> (lý do, geometry trước khi ẩn)
+        self.hidden: Dict[int, Tuple[str, Optional[tuple]]] = {}
+        # Thứ tự ẩn của từng loại, ẩn gần nhất ở cuối
+        self.order: Dict[str, List[int]] = {SCRATCHPAD: [], MINIMIZED: []}
+        self.members: List[int] = []  # Cửa sổ thuộc scratchpad (đang ẩn hay đang hiện)
+        wm.hooks.subscribe('window', self._on_window)
+        
+    def _on_window(self, change: str, window: Window):
+        if change == 'close':
+            wid = window.window_id
+            kind, _ = self.hidden.pop(wid, (None, None))
+            if kind:
+                self.order[kind].remove(wid)
+            if wid in self.members:
+                self.members.remove(wid)
+                
+    def _set_hidden_state(self, window: Window, hidden: bool):
+        """WM_STATE Iconic/Normal và _NET_WM_STATE_HIDDEN cho pager/taskbar"""
+        window.set_wm_state(ICONIC_STATE if hidden else NORMAL_STATE)
+        atom = self.xconn.get_atom('_NET_WM_STATE_HIDDEN')
+        if hidden:
+            window.net_state.add(atom)
+        else:
+            window.net_state.discard(atom)
+        self.wm.hooks.emit('window', 'state', window)
+        
+    def hide(self, window: Window, kind: str = MINIMIZED):
+        """Đẩy cửa sổ ra ngoài màn hình (không unmap, client không phải vẽ lại khi hiện)"""
+        if window.is_hidden:
+            return
+        if window.is_fullscreen:
+            self.wm.set_fullscreen(window, False)
+        self.hidden[window.window_id] = (kind, window.geometry)
+        self.order[kind].append(window.window_id)
+        window.is_hidden = True
+        if window.geometry:
+            x, y, width, height = window.geometry
+            # Ngay bên trái vùng màn hình (RandR không dùng tọa độ âm)
+            window.set_geometry(-(width + 2 * window.border_width), y, width, height)
+        self._set_hidden_state(window, True)
+        
+        event_handler = self.wm.event_handler
+        if window is event_handler.get_focused_window():
+            event_handler.set_focused_window(
+                event_handler.focus_history.most_recent(self.wm.workspace_manager.current, exclude=window)
+            )
+        self.wm._update_layout()
+        
+    def show(self, window: Window):
+        """Đưa cửa sổ ẩn về workspace hiện tại với geometry đã lưu, rồi focus"""
+        kind, geometry = self.hidden.pop(window.window_id, (None, None))
+        if kind is None:
+            return
+        self.order[kind].remove(window.window_id)
+        window.is_hidden = False
+        workspaces = self.wm.workspace_manager
+        if window.workspace != workspaces.current:
+            workspaces.move_window(window, workspaces.current)
+        if not window.is_mapped:
+            window.map()
+        if window.is_floating:
+            window.set_geometry(*self._place(geometry))
+        self._set_hidden_state(window, False)
+        self.wm.focus_window(window)
+        self.wm._update_layout()
+        
+    def _place(self, geometry: Optional[tuple]) -> tuple:
+        """Giữ geometry cũ nếu nằm trên màn hình hiện tại, không thì đặt giữa màn hình đó"""
+        config = self.wm.config
+        area_x, area_y, area_width, area_height = self.wm.layout_manager.get_layout_area()
+        if geometry:
+            x, y, width, height = geometry
+            if area_x <= x < area_x + area_width and area_y <= y < area_y + area_height:
+                return geometry
+        else:
+            width = int(area_width * config.get("scratchpad.width", 0.5))
+            height = int(area_height * config.get("scratchpad.height", 0.6))
+        width, height = min(width, area_width), min(height, area_height)
+        return (area_x + (area_width - width) // 2, area_y + (area_height - height) // 2, width, height)
+        
+    # Scratchpad
+    def move_to_scratchpad(self, window: Window):
+        """Đưa cửa sổ vào scratchpad (thành floating) và ẩn nó"""
+        wid = window.window_id
+        if wid not in self.members:
+            self.members.append(wid)
+        if window.is_hidden:
+            # Đang minimize: chỉ chuyển sang danh sách scratchpad, giữ geometry đã lưu
+            kind, geometry = self.hidden[wid]
+            if kind != SCRATCHPAD:
+                self.order[kind].remove(wid)
+                self.order[SCRATCHPAD].append(wid)
+                self.hidden[wid] = (SCRATCHPAD, geometry if window.is_floating else None)
+                window.is_floating = True
+            return
+        if not window.is_floating:
+            window.is_floating = True
+            window.geometry = self._place(None)
+        self.hide(window, SCRATCHPAD)
+        
+    def toggle(self):
+        """Cửa sổ scratchpad đang focus thì ẩn, không thì hiện cửa sổ scratchpad ẩn gần nhất"""
+        focused = self.wm.event_handler.get_focused_window()
+        if focused and focused.window_id in self.members:
+            self.hide(focused, SCRATCHPAD)
+            return
+        order = self.order[SCRATCHPAD]
+        if order:
+            window = self.wm.event_handler.get_window(order[-1])
+            if window:
+                self.show(window)
+                
+    # Minimize
+    def restore_last(self):
+        """Hiện lại cửa sổ minimize gần nhất (ưu tiên cửa sổ của workspace hiện tại)"""
+        current = self.wm.workspace_manager.current
+        order = self.order[MINIMIZED]
+        candidates = [wid for wid in order if self.wm.event_handler.get_window(wid).workspace == current]
+        wid = (candidates or order or [None])[-1]
+        if wid is not None:
+            self.show(self.wm.event_handler.get_window(wid))
+            
+    def get_info(self) -> dict:
+        return {
+            'scratchpad': list(self.members),
+            'hidden': {kind: list(order) for kind, order in self.order.items()},
+        }
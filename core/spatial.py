@@ -0,0 +1,103 @@
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
+
+Rect = Tuple[int, int, int, int]
+
+# Sai số cho phép giữa hai cạnh kề nhau (border, gap làm tròn)
+EDGE_TOLERANCE = 4
+
+class SpatialIndex:
+    """Index không gian (danh sách cạnh đã sắp xếp theo từng hướng) cho focus/move theo hướng"""
+    
+    def __init__(self):
+        self.rects: Dict[int, Rect] = {}
+        self.floating: Set[int] = set()
+        self.valid = False
+        # Khóa đã sắp xếp cho từng hướng: khoảng cách tăng dần khi đi theo hướng đó
+        self._keys: Dict[str, List[int]] = {}
+        self._ids: Dict[str, List[int]] = {}
+        
+    def invalidate(self):
+        """Đánh dấu cần build lại (sau relayout hoặc thay đổi geometry)"""
+        self.valid = False
+        
+    def build(self, rects: Dict[int, Rect], floating: Set[int]):
+        """Build lại các danh sách cạnh từ bảng geometry"""
+        self.rects = rects
+        self.floating = floating
+        # right: sắp theo cạnh trái tăng dần; left: cạnh phải giảm dần (lưu số âm)
+        edges = {
+            'right': [(x, wid) for wid, (x, y, w, h) in rects.items()],
+            'left': [(-(x + w), wid) for wid, (x, y, w, h) in rects.items()],
+            'down': [(y, wid) for wid, (x, y, w, h) in rects.items()],
+            'up': [(-(y + h), wid) for wid, (x, y, w, h) in rects.items()],
+        }
+        for direction, items in edges.items():
+            items.sort()
+            self._keys[direction] = [key for key, _ in items]
+            self._ids[direction] = [wid for _, wid in items]
+        self.valid = True
+        
+    @staticmethod
+    def _axes(direction: str, rect: Rect) -> Tuple[int, int, int]:
+        """(cạnh xuất phát trên trục chính, đầu, cuối trên trục vuông góc) theo hướng"""
+        x, y, w, h = rect
+        if direction == 'right':
+            return x + w, y, y + h
+        if direction == 'left':
+            return -x, y, y + h
+        if direction == 'down':
+            return y + h, x, x + w
+        return -y, x, x + w
+        
+    def _span(self, direction: str, rect: Rect) -> Tuple[int, int]:
+        x, y, w, h = rect
+        if direction in ('left', 'right'):
+            return y, y + h
+        return x, x + w
+        
+    def _scan(self, window_id: int, direction: str, start_key: int,
+              origin: int, lo: int, hi: int, tiled_only: bool) -> Optional[int]:
+        """Duyệt ứng viên từ start_key theo thứ tự khoảng cách, chọn ứng viên tốt nhất"""
+        keys = self._keys[direction]
+        ids = self._ids[direction]
+        center = (lo + hi) / 2
+        best = None
+        best_key = None
+        
+        for i in range(bisect_left(keys, start_key), len(keys)):
+            gap = max(0, keys[i] - origin)
+            if best_key is not None and best_key[0] == 0 and gap > best_key[1]:
+                # Đã có ứng viên chồng lấn gần hơn, các ứng viên sau chỉ xa hơn
+                break
+            candidate = ids[i]
+            if candidate == window_id or (tiled_only and candidate in self.floating):
+                continue
+            c_lo, c_hi = self._span(direction, self.rects[candidate])
+            overlap = min(hi, c_hi) - max(lo, c_lo)
+            if overlap > 0:
+                key = (0, gap, -overlap, abs((c_lo + c_hi) / 2 - center))
+            else:
+                key = (1, gap - overlap, 0, 0)
+            if best_key is None or key < best_key:
+                best, best_key = candidate, key
+        return best
+        
+    def neighbor(self, window_id: int, direction: str, wrap: bool = False,
+                 tiled_only: bool = False) -> Optional[int]:
+        """Tìm cửa sổ gần nhất theo hướng (left/right/up/down)"""
+        rect = self.rects.get(window_id)
+        if rect is None or direction not in self._keys:
+            return None
+            
+        origin, lo, hi = self._axes(direction, rect)
+        found = self._scan(window_id, direction, origin - EDGE_TOLERANCE, origin, lo, hi, tiled_only)
+        if found is not None or not wrap:
+            return found
+            
+        # Wrap: lấy cửa sổ xa nhất ở phía ngược lại (đầu danh sách của hướng này)
+        keys = self._keys[direction]
+        if not keys:
+            return None
+        found = self._scan(window_id, direction, keys[0], keys[0], lo, hi, tiled_only)
+        return found
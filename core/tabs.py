@@ -0,0 +1,212 @@
+import xcffib.xproto as xproto
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from .conn import XConnection
+from .window import Window
+
+class TitleCache:
+    """Cache pixmap của ô tiêu đề đã render theo (title, width, focused), LRU"""
+    
+    def __init__(self, renderer: 'TabRenderer', max_entries: int = 128):
+        self.renderer = renderer
+        self.max_entries = max_entries
+        self.entries: 'OrderedDict[Tuple[str, int, bool], int]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        
+    def get(self, title: str, width: int, focused: bool) -> int:
+        """Pixmap của một ô tiêu đề, chỉ render khi chưa có trong cache"""
+        key = (title, width, focused)
+        pixmap = self.entries.get(key)
+        if pixmap is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return pixmap
+            
+        self.misses += 1
+        pixmap = self.renderer.render(title, width, focused)
+        self.entries[key] = pixmap
+        if len(self.entries) > self.max_entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.renderer.xconn.conn.core.FreePixmap(evicted)
+            self.renderer.xconn.release_id(evicted)
+        return pixmap
+        
+    def clear(self):
+        """Giải phóng toàn bộ pixmap"""
+        for pixmap in self.entries.values():
+            self.renderer.xconn.conn.core.FreePixmap(pixmap)
+            self.renderer.xconn.release_id(pixmap)
+        self.entries.clear()
+
+class TabRenderer:
+    """Font, GC và cache tiêu đề dùng chung cho mọi thanh tab (tạo khi cần lần đầu)"""
+    
+    PADDING = 6
+    FONT = "fixed"
+    
+    def __init__(self, xconn: XConnection, config):
+        self.xconn = xconn
+        self.height = config.get("layout.tab_height", 20)
+        self.colors = {
+            name: config.get(f"layout.tab_colors.{name}", default) & 0xffffff
+            for name, default in (('focused', 0xff005577), ('unfocused', 0xff222222),
+                                  ('text', 0xffffffff), ('text_unfocused', 0xff888888),
+                                  ('separator', 0xff333333))
+        }
+        self.cache = TitleCache(self, config.get("layout.tab_cache_size", 128))
+        self.event_handler = None  # Được WindowManager gán (đăng ký cửa sổ thanh tab)
+        self.focus_window = None  # Được WindowManager gán (click vào tab)
+        self.gc = None
+        self.font = None
+        self.char_width = 6
+        self.font_ascent = 10
+        self.font_descent = 3
+        
+    def _ensure_resources(self):
+        if self.gc:
+            return
+        core = self.xconn.conn.core
+        self.font = self.xconn.generate_id()
+        core.OpenFont(self.font, len(self.FONT), self.FONT)
+        font_info = core.QueryFont(self.font).reply()
+        self.char_width = font_info.max_bounds.character_width or self.char_width
+        self.font_ascent = font_info.font_ascent
+        self.font_descent = font_info.font_descent
+        self.gc = self.xconn.generate_id()
+        core.CreateGC(
+            self.gc, self.xconn.root,
+            xproto.GC.Foreground | xproto.GC.Background | xproto.GC.Font | xproto.GC.GraphicsExposures,
+            [0, 0, self.font, 0]
+        )
+        
+    def render(self, title: str, width: int, focused: bool) -> int:
+        """Render một ô tiêu đề vào pixmap mới"""
+        core = self.xconn.conn.core
+        bg = self.colors['focused' if focused else 'unfocused']
+        fg = self.colors['text' if focused else 'text_unfocused']
+        pixmap = self.xconn.generate_id()
+        core.CreatePixmap(self.xconn.screen_depth, pixmap, self.xconn.root, width, self.height)
+        core.ChangeGC(self.gc, xproto.GC.Foreground, [bg])
+        core.PolyFillRectangle(pixmap, self.gc, 1, [xproto.RECTANGLE.synthetic(0, 0, width, self.height)])
+        # Vạch ngăn ở cạnh phải mỗi ô
+        core.ChangeGC(self.gc, xproto.GC.Foreground, [self.colors['separator']])
+        core.PolyFillRectangle(pixmap, self.gc, 1, [xproto.RECTANGLE.synthetic(width - 1, 0, 1, self.height)])
+        
+        capacity = max(0, (width - 2 * self.PADDING) // self.char_width)
+        if len(title) > capacity:
+            title = title[:max(0, capacity - 1)] + '~' if capacity else ''
+        data = title[:255].encode('latin-1', 'replace')
+        if data:
+            core.ChangeGC(self.gc, xproto.GC.Foreground | xproto.GC.Background, [fg, bg])
+            baseline = (self.height + self.font_ascent - self.font_descent) // 2
+            core.ImageText8(len(data), pixmap, self.gc, self.PADDING, baseline, data)
+        return pixmap
+        
+    def create_strip(self) -> 'TabStrip':
+        self._ensure_resources()
+        return TabStrip(self)
+        
+    def get_info(self) -> dict:
+        cache = self.cache
+        return {'entries': len(cache.entries), 'hits': cache.hits, 'misses': cache.misses}
+
+class TabStrip:
+    """Cửa sổ thanh tab của một layout, chỉ vẽ lại những ô có nội dung thay đổi"""
+    
+    def __init__(self, renderer: TabRenderer):
+        self.renderer = renderer
+        self.xconn = renderer.xconn
+        self.window: Optional[int] = None
+        self.mapped = False
+        self.geometry = (0, 0, 0, 0)
+        self.vertical = False
+        self.tabs: List[Window] = []
+        # Vị trí ô -> (x, y, width, title, focused) đã vẽ lên cửa sổ
+        self.drawn: Dict[int, Tuple[int, int, int, str, bool]] = {}
+        
+    def _cells(self) -> List[Tuple[int, int, int]]:
+        """(x, y, width) của từng ô trong thanh tab"""
+        n = len(self.tabs)
+        width = self.geometry[2]
+        height = self.renderer.height
+        if self.vertical:
+            return [(0, i * height, width) for i in range(n)]
+        cell = width // n
+        return [(i * cell, 0, cell if i < n - 1 else width - i * cell) for i in range(n)]
+        
+    def show(self, x: int, y: int, width: int, height: int, tabs: List[Window], vertical: bool):
+        """Đặt vị trí/danh sách tab và vẽ những ô thay đổi"""
+        core = self.xconn.conn.core
+        if self.window is None:
+            self.window = self.xconn.generate_id()
+            core.CreateWindow(
+                self.xconn.screen_depth, self.window, self.xconn.root, x, y, width, height, 0,
+                xproto.WindowClass.InputOutput, self.xconn.screen.root_visual,
+                xproto.CW.BackPixel | xproto.CW.OverrideRedirect | xproto.CW.EventMask,
+                [self.renderer.colors['unfocused'], 1,
+                 xproto.EventMask.Exposure | xproto.EventMask.ButtonPress]
+            )
+            self.renderer.event_handler.register_internal_window(self.window, self)
+        if (x, y, width, height) != self.geometry:
+            self.xconn.note_crossing(core.ConfigureWindow(
+                self.window,
+                xproto.ConfigWindow.X | xproto.ConfigWindow.Y |
+                xproto.ConfigWindow.Width | xproto.ConfigWindow.Height,
+                [x, y, width, height]
+            ))
+            self.geometry = (x, y, width, height)
+        self.tabs = list(tabs)
+        self.vertical = vertical
+        if not self.mapped:
+            self.xconn.note_crossing(core.MapWindow(self.window))
+            self.mapped = True
+            self.drawn.clear()
+        self.update()
+        
+    def hide(self):
+        if self.mapped:
+            self.xconn.note_crossing(self.xconn.conn.core.UnmapWindow(self.window))
+            self.mapped = False
+            
+    def destroy(self):
+        if self.window is not None:
+            self.renderer.event_handler.unregister_internal_window(self.window)
+            self.xconn.conn.core.DestroyWindow(self.window)
+            self.xconn.release_id(self.window)
+            self.window = None
+            self.mapped = False
+            
+    def update(self):
+        """Vẽ lại những ô có (vị trí, tiêu đề, focus) khác lần vẽ trước"""
+        if not self.mapped or not self.tabs:
+            return
+        for index, (window, (x, y, width)) in enumerate(zip(self.tabs, self._cells())):
+            content = (x, y, width, window.get_title(), window.is_focused)
+            if self.drawn.get(index) != content:
+                self._draw(index, content)
+        for index in [i for i in self.drawn if i >= len(self.tabs)]:
+            del self.drawn[index]
+            
+    def _draw(self, index: int, content: Tuple[int, int, int, str, bool]):
+        x, y, width, title, focused = content
+        if width <= 0:
+            return
+        pixmap = self.renderer.cache.get(title, width, focused)
+        self.xconn.conn.core.CopyArea(
+            pixmap, self.window, self.renderer.gc, 0, 0, x, y, width, self.renderer.height
+        )
+        self.drawn[index] = content
+        
+    def handle_expose(self, event):
+        """Expose: vẽ lại mọi ô từ cache (chỉ là CopyArea)"""
+        self.drawn.clear()
+        self.update()
+        
+    def handle_button(self, event):
+        """Click vào một ô: focus cửa sổ tương ứng"""
+        for window, (x, y, width) in zip(self.tabs, self._cells()):
+            if x <= event.event_x < x + width and y <= event.event_y < y + self.renderer.height:
+                if self.renderer.focus_window:
+                    self.renderer.focus_window(window)
+                break
@@ -0,0 +1,222 @@
+import importlib
+import struct
+import time
+import xcffib
+import xcffib.xproto as xproto
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+from .metrics import Histogram
+
+# Định dạng file trace (little-endian):
+#   header: magic, version, root, width, height
+#   record: tag (u8), rồi tùy tag:
+#     TAG_CLASS: class_id (u8), độ dài tên (u8), tên "module.Class" (ví dụ "xproto.MapRequestEvent")
+#     TAG_EVENT: class_id (u8), thời gian từ event trước (u32 µs), độ dài (u16), bytes của event.pack()
+#     TAG_BATCH: kết thúc một batch (WM cập nhật layout và flush)
+MAGIC = b'IATR'
+VERSION = 1
+HEADER = struct.Struct('<4sBIHH')
+EVENT = struct.Struct('<BIH')
+TAG_CLASS = 0
+TAG_EVENT = 1
+TAG_BATCH = 2
+
+class TraceRecorder:
+    """Ghi luồng event X mà WindowManager nhận được ra file trace nhị phân"""
+    
+    def __init__(self, path: str, root: int, width: int, height: int):
+        self.path = path
+        self.file: BinaryIO = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, root, width, height))
+        self.class_ids: Dict[type, int] = {}
+        self.last = time.monotonic_ns()
+        self.count = 0
+        self.pending = False  # Có event trong batch hiện tại chưa
+        
+    def _class_id(self, cls: type) -> int:
+        class_id = self.class_ids.get(cls)
+        if class_id is None:
+            class_id = len(self.class_ids)
+            self.class_ids[cls] = class_id
+            name = f"{cls.__module__.rsplit('.', 1)[-1]}.{cls.__name__}".encode('ascii')
+            self.file.write(struct.pack('<BBB', TAG_CLASS, class_id, len(name)) + name)
+        return class_id
+        
+    def record(self, event):
+        """Ghi một event kèm khoảng thời gian từ event trước"""
+        try:
+            data = event.pack()
+        except Exception:
+            # Event không pack được (GenericEvent lạ...) thì bỏ qua
+            return
+        now = time.monotonic_ns()
+        delta = min((now - self.last) // 1000, 0xffffffff)
+        self.last = now
+        self.file.write(bytes((TAG_EVENT,)) + EVENT.pack(self._class_id(type(event)), delta, len(data)) + data)
+        self.count += 1
+        self.pending = True
+        
+    def end_batch(self):
+        """Đánh dấu kết thúc batch (WM vừa cập nhật layout)"""
+        if self.pending:
+            self.file.write(bytes((TAG_BATCH,)))
+            self.pending = False
+            
+    def close(self):
+        self.end_batch()
+        self.file.close()
+
+class TraceReader:
+    """Đọc file trace, trả về từng batch [(thời điểm µs từ đầu trace, event)]"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        magic, version, self.root, self.width, self.height = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not an IArDE trace (version {VERSION}): {path}")
+            
+    @staticmethod
+    def _load_class(name: str) -> type:
+        module, cls = name.rsplit('.', 1)
+        return getattr(importlib.import_module(f"xcffib.{module}"), cls)
+        
+    def batches(self) -> Iterator[List[Tuple[int, object]]]:
+        data = self.data
+        offset = HEADER.size
+        classes: Dict[int, type] = {}
+        timestamp = 0
+        batch = []
+        while offset < len(data):
+            tag = data[offset]
+            offset += 1
+            if tag == TAG_CLASS:
+                class_id, length = data[offset], data[offset + 1]
+                offset += 2
+                classes[class_id] = self._load_class(data[offset:offset + length].decode('ascii'))
+                offset += length
+            elif tag == TAG_EVENT:
+                class_id, delta, length = EVENT.unpack_from(data, offset)
+                offset += EVENT.size
+                payload = data[offset:offset + length]
+                offset += length
+                timestamp += delta
+                batch.append((timestamp, classes[class_id](xcffib.MemoryUnpacker(payload))))
+            elif tag == TAG_BATCH:
+                if batch:
+                    yield batch
+                batch = []
+            else:
+                raise ValueError(f"Corrupt trace at byte {offset - 1}: tag {tag}")
+        if batch:
+            yield batch
+
+class TraceReplayer:
+    """Đưa các batch trong trace vào WindowManager (tốc độ ghi hoặc nhanh nhất có thể) và đo"""
+    
+    def __init__(self, wm, speed: float = 0.0):
+        self.wm = wm
+        self.speed = speed  # 1.0 = tốc độ lúc ghi, 0 = nhanh nhất có thể
+        # Server giả (nếu chạy trên FakeBackend): tạo cửa sổ client mà trace nhắc tới
+        self.server = getattr(wm.xconn.backend, 'server', None)
+        
+    def _prepare_client(self, event):
+        """Dựng lại phía client trên server giả để request của WM đến đúng cửa sổ"""
+        server = self.server
+        if isinstance(event, xproto.CreateNotifyEvent):
+            if event.window not in server.windows:
+                server.create_client(event.x, event.y, event.width, event.height,
+                                     override_redirect=event.override_redirect, wid=event.window)
+        elif isinstance(event, (xproto.MapRequestEvent, xproto.ConfigureRequestEvent)):
+            if event.window not in server.windows:
+                server.create_client(wid=event.window)
+        elif isinstance(event, xproto.DestroyNotifyEvent):
+            if event.window in server.windows and not server.windows[event.window].wm_owned:
+                server.destroy_client(event.window)
+                
+    def replay(self, reader: TraceReader) -> dict:
+        """Chạy toàn bộ trace, trả về báo cáo (events/s, latency theo event, request X)"""
+        wm = self.wm
+        metrics = wm.metrics
+        per_event: Dict[str, Histogram] = {}
+        overall = Histogram()
+        batch_latency = Histogram()
+        requests_before = metrics.requests if metrics else 0
+        round_trips_before = metrics.round_trips if metrics else 0
+        errors = 0
+        events = 0
+        
+        wm.running = True
+        started = time.perf_counter()
+        for batch in reader.batches():
+            if self.speed > 0:
+                # Chờ đến thời điểm của event đầu batch (theo tỉ lệ speed)
+                delay = batch[0][0] / 1e6 / self.speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+                    
+            batch_start = time.perf_counter_ns()
+            for _, event in batch:
+                if self.server is not None:
+                    self._prepare_client(event)
+                start = time.perf_counter_ns()
+                try:
+                    wm._dispatch_event(event)
+                except xcffib.Error:
+                    errors += 1
+                elapsed = (time.perf_counter_ns() - start) // 1000
+                overall.record(elapsed)
+                name = type(event).__name__
+                histogram = per_event.get(name)
+                if histogram is None:
+                    histogram = per_event[name] = Histogram()
+                histogram.record(elapsed)
+                events += 1
+            wm._finish_batch()
+            batch_latency.record((time.perf_counter_ns() - batch_start) // 1000)
+            errors += self._drain()
+            
+        duration = time.perf_counter() - started
+        report = {
+            'trace': reader.path,
+            'events': events,
+            'duration': round(duration, 3),
+            'events_per_sec': round(events / duration, 1) if duration else 0,
+            'latency_us': overall.get_info(),
+            'batch_latency_us': batch_latency.get_info(),
+            'per_event_us': {name: h.get_info() for name, h in sorted(per_event.items())},
+            'x_errors': errors,
+        }
+        if metrics:
+            report['requests'] = metrics.requests - requests_before
+            report['round_trips'] = metrics.round_trips - round_trips_before
+        if self.server is not None:
+            report['server_requests'] = dict(sorted(self.server.request_counts.items()))
+        return report
+        
+    def _drain(self) -> int:
+        """Bỏ các event do chính request của WM sinh ra (trace đã chứa event thật), đếm lỗi X"""
+        errors = 0
+        while True:
+            try:
+                if self.wm.xconn.poll_for_event() is None:
+                    return errors
+            except xcffib.Error:
+                errors += 1
+
+def format_report(report: dict) -> List[str]:
+    """Báo cáo replay dạng dòng chữ"""
+    latency = report['latency_us']
+    lines = [
+        f"{report['trace']}: {report['events']} events in {report['duration']}s "
+        f"({report['events_per_sec']} events/s), {report['x_errors']} X errors",
+        f"  per event: p50={latency['p50']}us p90={latency['p90']}us "
+        f"p99={latency['p99']}us max={latency['max']}us",
+    ]
+    if 'requests' in report:
+        lines.append(f"  X requests: {report['requests']} "
+                     f"({report['requests'] / max(1, report['events']):.2f}/event), "
+                     f"round trips: {report['round_trips']}")
+    for name, info in report['per_event_us'].items():
+        lines.append(f"  {name:<28} n={info['count']:<7} p50={info['p50']}us p99={info['p99']}us")
+    return lines
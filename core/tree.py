@@ -0,0 +1,284 @@
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Layout của container
+SPLIT_H = 0  # Con xếp theo chiều ngang (trái -> phải)
+SPLIT_V = 1  # Con xếp theo chiều dọc (trên -> dưới)
+LAYOUT_NAMES = {SPLIT_H: 'splith', SPLIT_V: 'splitv'}
+
+NO_NODE = -1
+MIN_FRACTION = 0.05
+
+Rect = Tuple[int, int, int, int]
+
+class NodeStore:
+    """Node của cây container lưu theo các mảng song song, ID node là index, node đã xóa được cấp lại"""
+    
+    def __init__(self):
+        self.parent = array('i')
+        self.window = array('I')  # ID cửa sổ của leaf, 0 cho container
+        self.layout = array('B')
+        self.fraction = array('d')  # Tỷ lệ trong container cha (tổng các con = 1)
+        self.dirty = bytearray()  # 1 = rect của node (và cả cây con) cần tính lại
+        self.child_dirty = bytearray()  # 1 = có node dirty bên dưới
+        self.children: List[Optional[List[int]]] = []  # None cho leaf
+        self.rect: List[Optional[Rect]] = []  # Rect đã gán lần cuối
+        self.free: List[int] = []
+        
+    def alloc(self, parent: int, window: int = 0, layout: int = SPLIT_H) -> int:
+        children = None if window else []
+        if self.free:
+            node = self.free.pop()
+            self.parent[node] = parent
+            self.window[node] = window
+            self.layout[node] = layout
+            self.fraction[node] = 1.0
+            self.dirty[node] = 1
+            self.child_dirty[node] = 0
+            self.children[node] = children
+            self.rect[node] = None
+            return node
+        self.parent.append(parent)
+        self.window.append(window)
+        self.layout.append(layout)
+        self.fraction.append(1.0)
+        self.dirty.append(1)
+        self.child_dirty.append(0)
+        self.children.append(children)
+        self.rect.append(None)
+        return len(self.parent) - 1
+        
+    def release(self, node: int):
+        self.children[node] = None
+        self.rect[node] = None
+        self.window[node] = 0
+        self.parent[node] = NO_NODE
+        self.free.append(node)
+        
+    def __len__(self) -> int:
+        return len(self.parent) - len(self.free)
+
+class ContainerTree:
+    """Cây container kiểu i3 của một workspace: container chia ngang/dọc, leaf là cửa sổ"""
+    
+    def __init__(self):
+        self.nodes = NodeStore()
+        self.root = self.nodes.alloc(NO_NODE)
+        self.leaves: Dict[int, int] = {}  # ID cửa sổ -> node leaf
+        self.area: Optional[Rect] = None
+        self.focused: Optional[int] = None  # Cửa sổ focus gần nhất, cửa sổ mới được chèn sau nó
+        self.generation = 0  # Tăng sau mỗi thay đổi cấu trúc/tỷ lệ
+        self.visited = 0  # Số node đã duyệt trong lần relayout gần nhất
+        
+    # Đánh dấu thay đổi
+    def mark_dirty(self, node: int):
+        """Cây con của node cần tính lại; tổ tiên chỉ được đánh dấu để relayout đi xuống tới đây"""
+        nodes = self.nodes
+        nodes.dirty[node] = 1
+        node = nodes.parent[node]
+        while node != NO_NODE and not nodes.child_dirty[node]:
+            nodes.child_dirty[node] = 1
+            node = nodes.parent[node]
+            
+    def _changed(self, node: int):
+        self.generation += 1
+        self.mark_dirty(node)
+        
+    # Thay đổi cấu trúc
+    def insert(self, window_id: int, after: Optional[int] = None):
+        """Thêm cửa sổ ngay sau cửa sổ `after` trong container của nó (mặc định: cuối container gốc)"""
+        if window_id in self.leaves:
+            return
+        nodes = self.nodes
+        sibling = self.leaves.get(after) if after is not None else None
+        parent = nodes.parent[sibling] if sibling is not None else self.root
+        children = nodes.children[parent]
+        index = children.index(sibling) + 1 if sibling is not None else len(children)
+        
+        leaf = nodes.alloc(parent, window_id)
+        # Con mới lấy phần bằng nhau, các con cũ co lại theo tỷ lệ
+        share = 1.0 / (len(children) + 1)
+        for child in children:
+            nodes.fraction[child] *= 1.0 - share
+        nodes.fraction[leaf] = share if children else 1.0
+        children.insert(index, leaf)
+        self.leaves[window_id] = leaf
+        self._changed(parent)
+        
+    def remove(self, window_id: int):
+        """Bỏ cửa sổ; container rỗng bị xóa, container chỉ còn một con được thay bằng con đó"""
+        leaf = self.leaves.pop(window_id, None)
+        if leaf is None:
+            return
+        nodes = self.nodes
+        parent = nodes.parent[leaf]
+        self._detach(leaf)
+        nodes.release(leaf)
+        while parent != self.root and len(nodes.children[parent]) <= 1:
+            grandparent = nodes.parent[parent]
+            children = nodes.children[parent]
+            if children:
+                # Đưa con duy nhất lên thay chỗ container
+                only = children[0]
+                siblings = nodes.children[grandparent]
+                siblings[siblings.index(parent)] = only
+                nodes.parent[only] = grandparent
+                nodes.fraction[only] = nodes.fraction[parent]
+            else:
+                self._detach(parent)
+            nodes.release(parent)
+            parent = grandparent
+        children = nodes.children[self.root]
+        if len(children) == 1 and not nodes.window[children[0]]:
+            # Gốc chỉ còn một container: container đó thành gốc mới
+            old_root, self.root = self.root, children[0]
+            nodes.parent[self.root] = NO_NODE
+            nodes.fraction[self.root] = 1.0
+            nodes.release(old_root)
+            parent = self.root
+        self._changed(parent)
+        
+    def _detach(self, node: int):
+        """Gỡ node khỏi container cha, phần của nó chia lại cho các anh em"""
+        nodes = self.nodes
+        siblings = nodes.children[nodes.parent[node]]
+        siblings.remove(node)
+        remaining = 1.0 - nodes.fraction[node]
+        for sibling in siblings:
+            nodes.fraction[sibling] = nodes.fraction[sibling] / remaining if remaining > 0 else 1.0 / len(siblings)
+            
+    def split(self, window_id: int, layout: int):
+        """Bọc cửa sổ vào container mới theo hướng `layout`, cửa sổ mở sau nó sẽ vào container này"""
+        leaf = self.leaves.get(window_id)
+        if leaf is None:
+            return
+        nodes = self.nodes
+        parent = nodes.parent[leaf]
+        if len(nodes.children[parent]) == 1:
+            # Container chỉ có cửa sổ này: chỉ cần đổi hướng chia
+            self.set_layout(parent, layout)
+            return
+        container = nodes.alloc(parent, layout=layout)
+        siblings = nodes.children[parent]
+        siblings[siblings.index(leaf)] = container
+        nodes.fraction[container] = nodes.fraction[leaf]
+        nodes.children[container].append(leaf)
+        nodes.parent[leaf] = container
+        nodes.fraction[leaf] = 1.0
+        nodes.rect[container] = nodes.rect[leaf]
+        self._changed(container)
+        
+    def set_layout(self, node: int, layout: int):
+        nodes = self.nodes
+        if nodes.layout[node] != layout:
+            nodes.layout[node] = layout
+            self._changed(node)
+            
+    def container_of(self, window_id: int) -> Optional[int]:
+        leaf = self.leaves.get(window_id)
+        return self.nodes.parent[leaf] if leaf is not None else None
+        
+    def toggle_split(self, window_id: int):
+        """Đổi hướng chia của container chứa cửa sổ"""
+        container = self.container_of(window_id)
+        if container is not None:
+            self.set_layout(container, SPLIT_V if self.nodes.layout[container] == SPLIT_H else SPLIT_H)
+            
+    def resize(self, window_id: int, delta: float):
+        """Tăng/giảm phần của cửa sổ trong container, anh em co giãn theo tỷ lệ"""
+        leaf = self.leaves.get(window_id)
+        if leaf is None:
+            return
+        nodes = self.nodes
+        parent = nodes.parent[leaf]
+        siblings = nodes.children[parent]
+        if len(siblings) < 2:
+            return
+        old = nodes.fraction[leaf]
+        new = max(MIN_FRACTION, min(1.0 - MIN_FRACTION * (len(siblings) - 1), old + delta))
+        if new == old:
+            return
+        scale = (1.0 - new) / (1.0 - old)
+        for sibling in siblings:
+            nodes.fraction[sibling] = new if sibling == leaf else nodes.fraction[sibling] * scale
+        self._changed(parent)
+        
+    def swap(self, first: int, second: int):
+        """Đổi chỗ hai cửa sổ: chỉ hai leaf bị ảnh hưởng"""
+        a, b = self.leaves.get(first), self.leaves.get(second)
+        if a is None or b is None:
+            return
+        nodes = self.nodes
+        nodes.window[a], nodes.window[b] = second, first
+        self.leaves[first], self.leaves[second] = b, a
+        self._changed(a)
+        self._changed(b)
+        
+    # Relayout
+    def relayout(self, area: Rect, place: Callable[[int, Rect], None]):
+        """Tính lại rect chỉ cho các cây con dirty, gọi place(window_id, rect) cho leaf có rect đổi"""
+        if area != self.area:
+            self.area = area
+            self.mark_dirty(self.root)
+        self.visited = 0
+        nodes = self.nodes
+        if nodes.dirty[self.root]:
+            nodes.rect[self.root] = area
+        self._walk(self.root, place)
+        
+    def _walk(self, node: int, place: Callable[[int, Rect], None]):
+        nodes = self.nodes
+        self.visited += 1
+        if nodes.dirty[node]:
+            self._assign(node, nodes.rect[node], place)
+            return
+        if not nodes.child_dirty[node]:
+            return
+        nodes.child_dirty[node] = 0
+        # Node con dirty dùng lại rect đã gán lần trước (vị trí trong cha không đổi)
+        for child in nodes.children[node]:
+            if nodes.dirty[child] or nodes.child_dirty[child]:
+                self._walk(child, place)
+                
+    def _assign(self, node: int, rect: Optional[Rect], place: Callable[[int, Rect], None]):
+        """Gán rect cho node và toàn bộ cây con"""
+        nodes = self.nodes
+        self.visited += 1
+        nodes.dirty[node] = 0
+        nodes.child_dirty[node] = 0
+        if rect is None:
+            return
+        window = nodes.window[node]
+        if window:
+            nodes.rect[node] = rect
+            place(window, rect)
+            return
+        nodes.rect[node] = rect
+        children = nodes.children[node]
+        if not children:
+            return
+        x, y, width, height = rect
+        horizontal = nodes.layout[node] == SPLIT_H
+        total = width if horizontal else height
+        offset = 0
+        for i, child in enumerate(children):
+            size = total - offset if i == len(children) - 1 else int(total * nodes.fraction[child])
+            if horizontal:
+                child_rect = (x + offset, y, size, height)
+            else:
+                child_rect = (x, y + offset, width, size)
+            offset += size
+            if child_rect != nodes.rect[child] or nodes.dirty[child] or nodes.child_dirty[child]:
+                self._assign(child, child_rect, place)
+                
+    def describe(self, node: Optional[int] = None) -> dict:
+        """Cây dạng dict (dùng cho IPC/debug)"""
+        nodes = self.nodes
+        node = self.root if node is None else node
+        info = {'fraction': round(nodes.fraction[node], 4), 'rect': nodes.rect[node]}
+        if nodes.window[node]:
+            info['window'] = nodes.window[node]
+        else:
+            info['layout'] = LAYOUT_NAMES[nodes.layout[node]]
+            info['children'] = [self.describe(child) for child in nodes.children[node]]
+        return info
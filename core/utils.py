@@ -2,32 +2,39 @@
 
 import subprocess
 import os
+import xcffib
+import xcffib.xproto as xproto
 from typing import List, Tuple, Optional
+from .log import logger
+
+# Các process con đã spawn, chưa được reap (tránh zombie khi session chạy lâu)
+_children: List[subprocess.Popen] = []
 
 def spawn_process(command: str) -> bool:
     """Spawn một process mới"""
     try:
-        subprocess.Popen(command.split())
+        _children.append(subprocess.Popen(command.split()))
         return True
     except Exception as e:
-        print(f"Failed to spawn '{command}': {e}")
+        logger.error('spawn', f"Failed to spawn '{command}': {e}")
         return False
+        
+def reap_children() -> int:
+    """Reap các process con đã thoát, trả về số process còn đang chạy"""
+    _children[:] = [child for child in _children if child.poll() is None]
+    return len(_children)
 
-def get_screen_geometry() -> Tuple[int, int]:
-    """Lấy kích thước màn hình hiện tại"""
+def get_screen_geometry(xconn=None) -> Tuple[int, int]:
+    """Lấy kích thước màn hình hiện tại (đọc từ root window, không gọi xrandr)"""
     try:
-        # Sử dụng xrandr để lấy thông tin màn hình
-        result = subprocess.run(['xrandr'], capture_output=True, text=True)
-        lines = result.stdout.split('\\n')
-        
-        for line in lines:
-            if '*' in line:  # Dòng chứa resolution hiện tại
-                parts = line.split()
-                for part in parts:
-                    if 'x' in part and '+' in part:
-                        resolution = part.split('+')[0]
-                        width, height = map(int, resolution.split('x'))
-                        return width, height
+        if xconn is not None:
+            return xconn.get_screen_geometry()
+        conn = xcffib.connect()
+        try:
+            screen = conn.get_setup().roots[conn.pref_screen]
+            return screen.width_in_pixels, screen.height_in_pixels
+        finally:
+            conn.disconnect()
     except Exception:
         pass
     
@@ -70,29 +77,25 @@ def is_window_floating(window_class: str, window_name: str) -> bool:
 def get_window_class_and_name(window_id: int, xconn) -> Tuple[str, str]:
     """Lấy class và name của window"""
     try:
-        # Lấy WM_CLASS
-        reply = xconn.conn.core.GetProperty(
-            False, window_id,
-            xconn.conn.core.InternAtom(False, 32, 'WM_CLASS').reply().atom,
-            xconn.conn.core.InternAtom(False, 31, 'STRING').reply().atom,
-            0, 1024
-        ).reply()
+        # WM_CLASS, WM_NAME và STRING là atom định sẵn, không cần InternAtom.
+        # Gửi cả hai GetProperty rồi mới chờ reply: một round-trip thay vì sáu
+        core = xconn.conn.core
+        class_cookie = core.GetProperty(
+            False, window_id, xproto.Atom.WM_CLASS, xproto.Atom.STRING, 0, 1024
+        )
+        name_cookie = core.GetProperty(
+            False, window_id, xproto.Atom.WM_NAME, xproto.Atom.STRING, 0, 1024
+        )
         
         window_class = ""
-        if reply.value:
-            window_class = reply.value.decode('utf-8').split('\\0')[0]
-        
-        # Lấy WM_NAME
-        reply = xconn.conn.core.GetProperty(
-            False, window_id,
-            xconn.conn.core.InternAtom(False, 32, 'WM_NAME').reply().atom,
-            xconn.conn.core.InternAtom(False, 31, 'STRING').reply().atom,
-            0, 1024
-        ).reply()
+        reply = class_cookie.reply()
+        if reply.value_len:
+            window_class = reply.value.buf().decode('latin-1').split('\0')[0]
         
         window_name = ""
-        if reply.value:
-            window_name = reply.value.decode('utf-8')
+        reply = name_cookie.reply()
+        if reply.value_len:
+            window_name = reply.value.buf().decode('latin-1')
         
         return window_class, window_name
         
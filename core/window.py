@@ -1,7 +1,11 @@
+import struct
 import xcffib.xproto as xproto
-from typing import Optional, List
+from typing import Optional, List, Set
 from .conn import XConnection
 
+# Độ dài tối đa (đơn vị 32-bit) khi đọc tiêu đề trên main loop
+TITLE_LIMIT = 1024
+
 class Window:
     """Đại diện cho một cửa sổ được quản lý bởi WM"""
     
@@ -17,6 +21,26 @@ class Window:
         self.workspace = None
         self.parent = None
         self.children: List[int] = []
+        self.ignore_unmaps = 0  # Số UnmapNotify do chính WM gây ra
+        self.title: Optional[str] = None  # Cache tiêu đề, cập nhật khi PropertyNotify
+        self.title_limit = TITLE_LIMIT  # Prefetcher gán nhỏ hơn, phần còn lại đọc ở background
+        self.title_truncated = False  # Tiêu đề dài hơn title_limit, đang chờ bản đầy đủ
+        self.icon: Optional[tuple] = None  # (width, height, pixel ARGB) do Prefetcher decode
+        self.pid: Optional[int] = None  # _NET_WM_PID
+        self.process: Optional[str] = None  # Tên process từ /proc/<pid>/comm
+        self.wm_class: Optional[str] = None  # Cache WM_CLASS (không đổi trong vòng đời cửa sổ)
+        self.net_state: Set[int] = set()  # Atom _NET_WM_STATE hiện tại (WM là nguồn sự thật)
+        self.protocols: Set[int] = set()  # Cache WM_PROTOCOLS (WM_DELETE_WINDOW, WM_TAKE_FOCUS...)
+        self.is_fullscreen = False
+        self.fullscreen_restore = None  # (geometry, border_width) trước khi fullscreen
+        self.frame = None  # Frame bọc cửa sổ khi bật reparenting (FrameManager gán)
+        self.is_destroyed = False  # Đã nhận DestroyNotify
+        self.is_hidden = False  # Trong scratchpad/minimize: vẫn map nhưng nằm ngoài màn hình
+        
+    @property
+    def frame_id(self) -> int:
+        """Cửa sổ top-level trên root: frame nếu có, không thì chính client"""
+        return self.frame.window_id if self.frame else self.window_id
         
     def get_geometry(self) -> Optional[tuple]:
         """Lấy geometry hiện tại của cửa sổ"""
@@ -27,126 +51,220 @@ class Window:
             return None
             
     def set_geometry(self, x: int, y: int, width: int, height: int):
-        """Đặt vị trí và kích thước cửa sổ"""
+        """Đặt vị trí và kích thước cửa sổ (của frame nếu có, client nằm trong phần còn lại)"""
+        if self.frame:
+            self.frame.configure(x, y, width, height)
+        else:
+            self.xconn.note_crossing(self.xconn.conn.core.ConfigureWindow(
+                self.window_id,
+                xproto.ConfigWindow.X | xproto.ConfigWindow.Y | 
+                xproto.ConfigWindow.Width | xproto.ConfigWindow.Height,
+                [x, y, width, height]
+            ))
         self.geometry = (x, y, width, height)
-        self.xconn.conn.core.ConfigureWindow(
-            self.window_id,
-            xproto.ConfigWindow.X | xproto.ConfigWindow.Y | 
-            xproto.ConfigWindow.Width | xproto.ConfigWindow.Height,
-            [x, y, width, height]
-        )
         self.xconn.flush()
         
     def map(self):
         """Hiển thị cửa sổ"""
-        self.xconn.conn.core.MapWindow(self.window_id)
+        self.xconn.note_crossing(self.xconn.conn.core.MapWindow(self.frame_id))
         self.is_mapped = True
         self.xconn.flush()
         
     def unmap(self):
-        """Ẩn cửa sổ"""
-        self.xconn.conn.core.UnmapWindow(self.window_id)
+        """Ẩn cửa sổ (có frame thì chỉ unmap frame, client không nhận UnmapNotify)"""
+        if self.is_mapped and not self.frame:
+            self.ignore_unmaps += 1
+        self.xconn.note_crossing(self.xconn.conn.core.UnmapWindow(self.frame_id))
         self.is_mapped = False
         self.xconn.flush()
         
+    def raise_to_top(self):
+        """Đưa cửa sổ (frame nếu có) lên trên cùng, request được flush ở cuối batch"""
+        self.xconn.note_crossing(self.xconn.conn.core.ConfigureWindow(
+            self.frame_id, xproto.ConfigWindow.StackMode, [xproto.StackMode.Above]
+        ))
+        
     def focus(self):
-        """Focus cửa sổ"""
+        """Focus cửa sổ (request được flush ở cuối batch)"""
         self.xconn.conn.core.SetInputFocus(
             xproto.InputFocus.PointerRoot,
             self.window_id,
             xproto.Time.CurrentTime
         )
-        self.xconn.flush()
         
     def set_border_color(self, color: int):
-        """Đặt màu border"""
+        """Đặt màu border (request được flush ở cuối batch)"""
         self.xconn.conn.core.ChangeWindowAttributes(
-            self.window_id,
+            self.frame_id,
             xproto.CW.BorderPixel,
             [color]
         )
-        self.xconn.flush()
         
     def set_border_width(self, width: int):
         """Đặt độ dày border"""
         self.border_width = width
         self.xconn.conn.core.ConfigureWindow(
-            self.window_id,
+            self.frame_id,
             xproto.ConfigWindow.BorderWidth,
             [width]
         )
         self.xconn.flush()
         
-    def kill(self):
-        """Đóng cửa sổ"""
+    def load_hints(self):
+        """Đọc WM_PROTOCOLS, _NET_WM_STATE, tiêu đề và WM_CLASS một lần khi bắt đầu quản lý (một round-trip)"""
+        core = self.xconn.conn.core
+        cookies = [
+            core.GetProperty(False, self.window_id, self.xconn.get_atom(name), xproto.Atom.ATOM, 0, 64)
+            for name in ('WM_PROTOCOLS', '_NET_WM_STATE')
+        ]
+        title_cookies = self._title_cookies()
+        class_cookie = self._wm_class_cookie()
+        self.protocols, self.net_state = [self._read_atoms(cookie) for cookie in cookies]
+        self.title = self._read_title(*title_cookies)
+        self.wm_class = self._read_wm_class(class_cookie)
+        
+    def refresh_protocols(self):
+        """Đọc lại WM_PROTOCOLS sau PropertyNotify"""
+        self.protocols = self._read_atoms(self.xconn.conn.core.GetProperty(
+            False, self.window_id, self.xconn.get_atom('WM_PROTOCOLS'), xproto.Atom.ATOM, 0, 64
+        ))
+        
+    @staticmethod
+    def _read_atoms(cookie) -> Set[int]:
         try:
-            # Thử đóng một cách lịch sự trước
-            self.xconn.conn.core.SendEvent(
-                True, self.window_id, xproto.EventMask.NoEvent,
-                b'WM_DELETE_WINDOW'
-            )
-            # Nếu không được, force kill
-            self.xconn.conn.core.KillClient(self.window_id)
+            reply = cookie.reply()
+            if reply.format == 32 and reply.value_len:
+                return set(reply.value.to_atoms())
         except:
             pass
+        return set()
+        
+    def supports_protocol(self, name: str) -> bool:
+        """Cửa sổ có khai báo protocol trong WM_PROTOCOLS không (dùng cache)"""
+        return self.xconn.get_atom(name) in self.protocols
+        
+    def set_wm_state(self, state: int):
+        """Ghi WM_STATE (Normal/Iconic) cho client và pager"""
+        atom = self.xconn.get_atom('WM_STATE')
+        self.xconn.conn.core.ChangeProperty(
+            xproto.PropMode.Replace, self.window_id, atom, atom, 32, 2,
+            struct.pack('=II', state, xproto.Window._None)
+        )
+        
+    def close(self) -> bool:
+        """Yêu cầu đóng lịch sự bằng WM_DELETE_WINDOW, trả về False nếu cửa sổ không hỗ trợ"""
+        if not self.supports_protocol('WM_DELETE_WINDOW'):
+            return False
+        data = xproto.ClientMessageData.synthetic(
+            [self.xconn.get_atom('WM_DELETE_WINDOW'), xproto.Time.CurrentTime, 0, 0, 0], "5I"
+        )
+        event = xproto.ClientMessageEvent.synthetic(32, self.window_id, self.xconn.get_atom('WM_PROTOCOLS'), data)
+        self.xconn.conn.core.SendEvent(False, self.window_id, xproto.EventMask.NoEvent, event.pack())
+        self.xconn.flush()
+        return True
+        
+    def kill(self):
+        """Ngắt kết nối của client sở hữu cửa sổ (không cho client cơ hội lưu trạng thái)"""
+        self.xconn.conn.core.KillClient(self.window_id)
         self.xconn.flush()
         
+    def _title_cookies(self) -> tuple:
+        """Gửi cùng lúc request _NET_WM_NAME và WM_NAME (tối đa title_limit đơn vị)"""
+        core = self.xconn.conn.core
+        return (
+            core.GetProperty(False, self.window_id, self.xconn.get_atom('_NET_WM_NAME'),
+                             self.xconn.get_atom('UTF8_STRING'), 0, self.title_limit),
+            core.GetProperty(False, self.window_id, xproto.Atom.WM_NAME,
+                             xproto.Atom.STRING, 0, self.title_limit),
+        )
+        
+    def _read_title(self, net_cookie, name_cookie) -> str:
+        """Ưu tiên _NET_WM_NAME, fallback về WM_NAME; đánh dấu title_truncated nếu còn dữ liệu"""
+        for cookie, encoding in ((net_cookie, 'utf-8'), (name_cookie, 'latin-1')):
+            try:
+                reply = cookie.reply()
+            except:
+                continue
+            if reply.value_len:
+                self.title_truncated = reply.bytes_after > 0
+                return reply.value.buf().decode(encoding, 'replace')
+        self.title_truncated = False
+        return f"Window {self.window_id}"
+        
     def get_wm_name(self) -> str:
         """Lấy tên của cửa sổ"""
+        return self._read_title(*self._title_cookies())
+        
+    def get_title(self) -> str:
+        """Lấy tiêu đề từ cache (chỉ hỏi X server lần đầu)"""
+        if self.title is None:
+            self.title = self.get_wm_name()
+        return self.title
+        
+    def refresh_title(self) -> bool:
+        """Đọc lại tiêu đề sau PropertyNotify, trả về True nếu thay đổi"""
+        title = self.get_wm_name()
+        if title == self.title:
+            return False
+        self.title = title
+        return True
+        
+    def _wm_class_cookie(self):
+        return self.xconn.conn.core.GetProperty(
+            False, self.window_id, xproto.Atom.WM_CLASS, xproto.Atom.STRING, 0, 256
+        )
+        
+    @staticmethod
+    def _read_wm_class(cookie) -> str:
+        """Phần thứ hai của WM_CLASS (class), hoặc phần đầu nếu thiếu"""
         try:
-            # Thử lấy _NET_WM_NAME trước
-            reply = self.xconn.conn.core.GetProperty(
-                False, self.window_id,
-                xproto.Atom._NET_WM_NAME,
-                xproto.Atom._UTF8_STRING,
-                0, 1024
-            ).reply()
-            if reply.value:
-                return reply.value.decode('utf-8')
-        except:
-            pass
-            
-        try:
-            # Fallback về WM_NAME
-            reply = self.xconn.conn.core.GetProperty(
-                False, self.window_id,
-                xproto.Atom.WM_NAME,
-                xproto.Atom.STRING,
-                0, 1024
-            ).reply()
-            if reply.value:
-                return reply.value.decode('utf-8')
+            reply = cookie.reply()
+            if reply.value_len:
+                parts = reply.value.buf().decode('latin-1').split('\0')
+                return parts[1] if len(parts) > 1 and parts[1] else parts[0]
         except:
             pass
-            
-        return f"Window {self.window_id}"
+        return ""
+        
+    def get_wm_class(self) -> str:
+        """Lấy class của cửa sổ (phần thứ hai của WM_CLASS), có cache"""
+        if self.wm_class is None:
+            self.wm_class = self._read_wm_class(self._wm_class_cookie())
+        return self.wm_class
         
     def is_maximized(self) -> bool:
         """Kiểm tra xem cửa sổ có đang maximized không"""
-        try:
-            reply = self.xconn.conn.core.GetProperty(
-                False, self.window_id,
-                xproto.Atom._NET_WM_STATE,
-                xproto.Atom.ATOM,
-                0, 1024
-            ).reply()
-            if reply.value:
-                states = list(reply.value)
-                # Kiểm tra _NET_WM_STATE_MAXIMIZED_HORZ và _NET_WM_STATE_MAXIMIZED_VERT
-                return (xproto.Atom._NET_WM_STATE_MAXIMIZED_HORZ in states or
-                        xproto.Atom._NET_WM_STATE_MAXIMIZED_VERT in states)
-        except:
-            pass
-        return False
+        return (self.xconn.get_atom('_NET_WM_STATE_MAXIMIZED_HORZ') in self.net_state or
+                self.xconn.get_atom('_NET_WM_STATE_MAXIMIZED_VERT') in self.net_state)
         
-    def toggle_floating(self):
+    def toggle_floating(self, area: Optional[tuple] = None):
         """Chuyển đổi giữa floating và tiling"""
         self.is_floating = not self.is_floating
         if self.is_floating:
-            # Center cửa sổ khi chuyển sang floating
-            screen_width, screen_height = self.xconn.get_screen_geometry()
+            # Center cửa sổ (trên màn hình chứa nó) khi chuyển sang floating
+            if area:
+                area_x, area_y, screen_width, screen_height = area
+            else:
+                area_x, area_y = 0, 0
+                screen_width, screen_height = self.xconn.get_screen_geometry()
             if self.geometry:
                 width, height = self.geometry[2], self.geometry[3]
-                x = (screen_width - width) // 2
-                y = (screen_height - height) // 2
+                x = area_x + (screen_width - width) // 2
+                y = area_y + (screen_height - height) // 2
                 self.set_geometry(x, y, width, height)
+                
+    def get_info(self) -> dict:
+        """Thông tin cửa sổ dạng dict (dùng cho IPC)"""
+        return {
+            'id': self.window_id,
+            'name': self.get_title(),
+            'workspace': self.workspace,
+            'focused': self.is_focused,
+            'floating': self.is_floating,
+            'fullscreen': self.is_fullscreen,
+            'mapped': self.is_mapped,
+            'hidden': self.is_hidden,
+            'pid': self.pid,
+            'process': self.process,
+            'geometry': list(self.geometry) if self.geometry else None,
+        }
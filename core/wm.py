@@ -1,26 +1,123 @@
-import subprocess
+import xcffib
 import xcffib.xproto as xproto
 from typing import List, Optional
-from .conn import XConnection
+from .conn import Backend, XConnection
 from .window import Window
 from .layout import LayoutManager
+from .tabs import TabRenderer
+from .tree import SPLIT_H, SPLIT_V
 from .keybinds import KeybindManager
 from .events import EventHandler
+from .hooks import Hooks
+from .loop import EventLoop
+from .workspace import WorkspaceManager
+from .monitor import MonitorManager
+from .focus import FocusCycler, FocusFollowsMouse
+from .drag import DragManager
+from .eventmask import EventMaskManager
+from .ewmh import EWMHPublisher
+from .frame import FrameManager
+from .scratchpad import Scratchpad
+from .plugins import PluginManager
+from .prefetch import Prefetcher
+from .spatial import SpatialIndex
+from .ipc import IPCServer
+from .metrics import Metrics, CountingConnection
+from .trace import TraceRecorder
+from .log import logger
+from .utils import spawn_process, reap_children
 from config import config
 
 class WindowManager:
     """Window Manager chính - điều phối tất cả các module"""
     
-    def __init__(self):
-        # Khởi tạo các module chính
-        self.xconn = XConnection()
-        self.layout_manager = LayoutManager(self.xconn)
+    REAP_INTERVAL = 2.0  # Giây giữa các lần reap process con đã spawn
+    
+    def __init__(self, backend: Optional[Backend] = None):
+        # Khởi tạo các module chính (backend mặc định là X server thật)
+        self.xconn = XConnection(backend)
+        self.hooks = Hooks()
+        self.loop = EventLoop()
+        self.layout_manager = LayoutManager(self.xconn, TabRenderer(self.xconn, config))
+        self.layout_manager.configure(config)
         self.keybind_manager = KeybindManager(self.xconn)
-        self.event_handler = EventHandler(self.xconn)
+        self.event_handler = EventHandler(self.xconn, self.hooks)
+        # Event mask của root/client chỉ gồm những gì các tính năng đang bật cần
+        self.event_masks = EventMaskManager(self.xconn, self.hooks)
+        self.event_masks.event_handler = self.event_handler
+        self.event_handler.event_masks = self.event_masks
         
         # Cấu hình
         self.config = config
         self.running = False
+        # Log vào ring buffer, thread nền ghi ra file (main loop không bao giờ chờ I/O log)
+        logger.configure(config)
+        
+        # Instrumentation: bọc kết nối X để đếm request/flush/round-trip
+        self.metrics: Optional[Metrics] = None
+        strict = self.config.get("metrics.strict", False)
+        if self.config.get("metrics.enabled", False) or strict:
+            self.metrics = Metrics(
+                self.config.get("metrics.budgets", {}) if strict else None,
+                self.config.get("metrics.strict_action", "log"),
+            )
+            self.xconn.conn = CountingConnection(self.xconn.conn, self.metrics)
+            self.event_handler.metrics = self.metrics
+            self.keybind_manager.metrics = self.metrics
+            
+        # Ghi lại luồng event X ra file trace để replay/benchmark (rỗng = tắt)
+        self.recorder: Optional[TraceRecorder] = None
+        trace_path = self.config.get("trace.record", "")
+        if trace_path:
+            width, height = self.xconn.get_screen_geometry()
+            self.recorder = TraceRecorder(trace_path, self.xconn.root, width, height)
+            
+        self.monitor_manager = MonitorManager(self.xconn, self.hooks)
+        self.layout_manager.monitors = self.monitor_manager
+        self.workspace_manager = WorkspaceManager(
+            self.event_handler, self.hooks, self.config.get_workspace_names(),
+            self.monitor_manager
+        )
+        self.event_handler.workspace_manager = self.workspace_manager
+        # Layout chồng cửa sổ (monocle/tabbed) chỉ restack khi focus đổi, thanh tab vẽ lại ô thay đổi
+        self.layout_manager.tabs.event_handler = self.event_handler
+        self.layout_manager.tabs.focus_window = self.focus_window
+        self.hooks.subscribe('focus', self.layout_manager.on_focus)
+        self.hooks.subscribe('window', self.layout_manager.on_window)
+        self.hooks.subscribe('stack', self.layout_manager.on_stack)
+        self.actions = self._build_actions()
+        self.ipc_server: Optional[IPCServer] = None
+        self.taskbar = None
+        self.explorer = None
+        # Object đang giữ bàn phím (explorer, alt-tab...), nhận mọi KeyPress
+        self.key_grabber = None
+        self.focus_cycler = FocusCycler(self)
+        self.reap_timer = None
+        # Mod+kéo để di chuyển/đổi kích thước cửa sổ floating, áp dụng theo khung hình
+        self.drag_manager = DragManager(self)
+        self.event_handler.drag_manager = self.drag_manager
+        self.hooks.subscribe('batch_end', self.drag_manager.on_batch_end)
+        self.pointer_focus = FocusFollowsMouse(self)
+        self.event_handler.pointer_focus = self.pointer_focus
+        # Reparent client vào frame lấy từ pool (tùy chọn, frame.enabled)
+        self.frame_manager = FrameManager(self)
+        self.event_handler.frames = self.frame_manager
+        # Property EWMH trên root (client list, active window, desktop...) ghi theo batch
+        self.ewmh = EWMHPublisher(self)
+        self.event_handler.ewmh = self.ewmh
+        # Scratchpad/minimize: cửa sổ ẩn được đẩy ra ngoài màn hình thay vì unmap
+        self.scratchpad = Scratchpad(self)
+        # Icon, PID/process và tiêu đề dài đọc trên kết nối X thứ hai ở background
+        self.prefetcher = Prefetcher(self)
+        self.event_handler.prefetch = self.prefetcher
+        # Plugin khai báo trong config, chỉ import khi hook/action của nó được gọi lần đầu
+        self.plugins = PluginManager(self)
+        
+        # Index không gian cho focus/move theo hướng, build lại khi geometry đổi
+        self.spatial_index = SpatialIndex()
+        for hook in ('window', 'workspace', 'geometry', 'monitor'):
+            self.hooks.subscribe(hook, lambda *args: self.spatial_index.invalidate())
+        self.hooks.subscribe('monitor', self._on_monitor_change)
         
         # Khởi tạo WM
         self._initialize_wm()
@@ -31,133 +128,419 @@ class WindowManager:
             # Thiết lập root window
             self._setup_root_window()
             
+            # Màn hình (RandR) và workspace hiển thị trên mỗi màn hình
+            self.monitor_manager.start(self.event_handler)
+            self.workspace_manager.assign_monitors()
+            
+            # Frame (font, GC dùng chung cho thanh tiêu đề)
+            self.frame_manager.start()
+            
             # Thiết lập keybinds
             self.keybind_manager.setup_default_keybinds(self)
+            self.drag_manager.setup()
+            
+            # Khởi động IPC server
+            self._setup_ipc()
+            
+            # Status bar
+            self._setup_bar()
+            
+            # Window explorer
+            self._setup_explorer()
+            
+            # Prefetch ở background (kết nối X thứ hai)
+            self.prefetcher.start()
+            
+            # EWMH: sau bar để _NET_WORKAREA đã trừ vùng bar
+            self.ewmh.start()
+            self.xconn.flush()
+            
+            # Plugin: sau keybind và action mặc định để có thể thêm vào đó
+            self.plugins.start()
+            
+            # Tóm tắt metrics định kỳ
+            self._schedule_metrics_summary()
             
             print("IArDE Window Manager started successfully!")
             print("Press Super+Enter to open terminal")
             print("Press Super+Shift+q to quit")
             
         except Exception as e:
-            print(f"Failed to initialize window manager: {e}")
+            logger.exception('init', f"Failed to initialize window manager: {e}")
             raise
             
     def _setup_root_window(self):
-        """Thiết lập root window"""
-        mask = (xproto.CW.EventMask,)
-        values = [
-            xproto.EventMask.SubstructureRedirect |
-            xproto.EventMask.SubstructureNotify |
-            xproto.EventMask.KeyPress |
-            xproto.EventMask.KeyRelease |
-            xproto.EventMask.ButtonPress |
-            xproto.EventMask.ButtonRelease |
-            xproto.EventMask.PointerMotion |
-            xproto.EventMask.EnterWindow |
-            xproto.EventMask.LeaveWindow |
-            xproto.EventMask.FocusChange |
-            xproto.EventMask.PropertyChange
-        ]
-        
+        """Thiết lập root window (event mask tối thiểu theo tính năng đang bật)"""
+        self.event_masks.configure(self.config)
         try:
-            self.xconn.conn.core.ChangeWindowAttributesChecked(
-                self.xconn.root, mask, values
-            ).check()
+            self.event_masks.start()
         except xcffib.xproto.BadAccess:
             print("Another window manager is already running!")
             print("Please exit the current WM first.")
             exit(1)
+            
+    def _setup_ipc(self):
+        """Khởi động IPC server trên Unix socket"""
+        if not self.config.get("ipc.enabled", True):
+            return
+        try:
+            self.ipc_server = IPCServer(
+                self, self.loop,
+                self.config.get("ipc.socket_path"),
+                self.config.get("ipc.max_client_buffer", 1048576),
+            )
+            self.ipc_server.start()
+            print(f"IPC socket: {self.ipc_server.socket_path}")
+        except OSError as e:
+            logger.error('ipc', f"Failed to start IPC server: {e}")
+            self.ipc_server = None
+        
+    def _setup_bar(self):
+        """Tạo status bar nếu được bật trong config"""
+        if not self.config.get("bar.enabled", True):
+            return
+        from modules.taskbar import Taskbar
+        try:
+            self.taskbar = Taskbar(self)
+            self.taskbar.start()
+            self.layout_manager.set_reserved_space(
+                *self.taskbar.get_reserved_space(), self.taskbar.monitor
+            )
+        except Exception as e:
+            logger.exception('bar', f"Failed to start bar: {e}")
+            self.taskbar = None
+        
+    def _setup_explorer(self):
+        """Tạo window explorer nếu được bật trong config"""
+        if not self.config.get("explorer.enabled", True):
+            return
+        from modules.explore import WindowExplorer
+        try:
+            self.explorer = WindowExplorer(self)
+            self.explorer.start()
+        except Exception as e:
+            logger.exception('explorer', f"Failed to start explorer: {e}")
+            self.explorer = None
+            
+    def _schedule_metrics_summary(self):
+        """Hẹn giờ ghi tóm tắt metrics theo metrics.summary_interval"""
+        interval = self.config.get("metrics.summary_interval", 60)
+        if self.metrics and interval > 0:
+            self.loop.call_later(interval, self._periodic_metrics_summary)
+            
+    def _periodic_metrics_summary(self):
+        self.dump_metrics()
+        self._schedule_metrics_summary()
         
     def run(self):
         """Chạy window manager - main event loop"""
         self.running = True
+        self.loop.add_reader(self.xconn.get_file_descriptor(), self._process_x_events)
         
         while self.running:
             try:
-                event = self.xconn.wait_for_event()
-                
-                # Xử lý keypress trước
-                if isinstance(event, xproto.KeyPressEvent):
-                    if not self.keybind_manager.handle_keypress(event):
-                        # Nếu keybind không xử lý được, chuyển cho event handler
-                        self.event_handler.handle_event(event)
-                else:
-                    # Xử lý các event khác
-                    self.event_handler.handle_event(event)
+                # xcb có thể đã đọc sẵn event vào hàng đợi trong lúc chờ reply,
+                # nên luôn xử lý hàng đợi trước khi ngủ trong select()
+                self._process_x_events()
+                if self.running:
+                    self.loop.run_once()
                     
-                # Cập nhật layout nếu cần
-                self._update_layout()
-                
             except KeyboardInterrupt:
                 print("\\nReceived interrupt signal, shutting down...")
                 break
+            except xcffib.ConnectionException:
+                logger.error('connection', "Lost connection to X server")
+                break
             except Exception as e:
-                print(f"Error in main loop: {e}")
+                # Lỗi lặp lại mỗi vòng chỉ được ghi rate_limit lần
+                logger.exception('main_loop', f"Error in main loop: {e}")
                 continue
                 
         self.quit()
         
-    def _update_layout(self):
-        """Cập nhật layout của các cửa sổ"""
+    def _process_x_events(self):
+        """Xử lý tất cả event đang chờ, cập nhật layout một lần cho cả batch"""
+        handled = 0
+        while self.running:
+            try:
+                event = self.xconn.poll_for_event()
+            except xcffib.Error as e:
+                # Lỗi X (ví dụ BadWindow với cửa sổ vừa bị hủy) không dừng batch
+                logger.warning(f"x_error:{type(e).__name__}", f"X error: {type(e).__name__}",
+                               bad_value=getattr(e, 'bad_value', None))
+                continue
+            if event is None:
+                break
+            if self.recorder:
+                self.recorder.record(event)
+            self._dispatch_event(event)
+            handled += 1
+            
+        if handled:
+            self._finish_batch()
+        else:
+            self.xconn.flush()
+            
+    def _finish_batch(self):
+        """Cuối mỗi batch event: áp dụng thay đổi màn hình, cập nhật layout một lần rồi flush"""
+        # Thay đổi màn hình được gom lại và truy vấn tối đa một lần mỗi batch
+        self.monitor_manager.apply_pending()
+        start = self.metrics.begin("layout") if self.metrics else None
+        self._update_layout()
+        if start:
+            self.metrics.end("layout", start)
+        self.hooks.emit('batch_end')
+        if self.recorder:
+            self.recorder.end_batch()
+        self.xconn.flush()
+        
+    def _dispatch_event(self, event):
+        """Chuyển một event đến keybind manager hoặc event handler"""
+        # Xử lý keypress trước
+        if isinstance(event, xproto.KeyPressEvent):
+            if self.key_grabber:
+                self.key_grabber.handle_key(event)
+            elif not self.keybind_manager.handle_keypress(event):
+                # Nếu keybind không xử lý được, chuyển cho event handler
+                self.event_handler.handle_event(event)
+        elif isinstance(event, xproto.KeyReleaseEvent) and self.key_grabber:
+            if hasattr(self.key_grabber, 'handle_key_release'):
+                self.key_grabber.handle_key_release(event)
+        else:
+            # Xử lý các event khác
+            self.event_handler.handle_event(event)
+        
+    def _update_layout(self, monitors: Optional[list] = None):
+        """Cập nhật layout của các cửa sổ (mặc định trên mọi màn hình)"""
         tiling_windows = self.event_handler.get_tiling_windows()
-        self.layout_manager.arrange_windows(tiling_windows)
+        fullscreen = {w.workspace for w in self.event_handler.get_visible_windows() if w.is_fullscreen}
+        changed = False
+        for monitor in monitors if monitors is not None else self.monitor_manager.monitors:
+            if monitor.workspace in fullscreen:
+                # Cửa sổ fullscreen che cả màn hình: không cần tính toán tiling
+                continue
+            windows = [w for w in tiling_windows if w.workspace == monitor.workspace]
+            if self.layout_manager.arrange_windows(windows, monitor):
+                changed = True
+        if changed:
+            self.spatial_index.invalidate()
+            
+    def _on_monitor_change(self, change: str, monitor):
+        """Cắm/rút/đổi cấu hình màn hình: chỉ relayout màn hình bị ảnh hưởng"""
+        if change == 'add':
+            self.workspace_manager.assign_monitors()
+        elif change == 'remove':
+            self.workspace_manager.release_monitor(monitor)
+            return
+        self._update_layout([monitor])
+            
+    def _get_spatial_index(self) -> SpatialIndex:
+        """Lấy spatial index, build lại nếu đã có relayout/thay đổi geometry"""
+        index = self.spatial_index
+        if not index.valid:
+            rects = {}
+            floating = set()
+            for window in self.event_handler.get_visible_windows():
+                if window.is_floating:
+                    if window.geometry:
+                        rects[window.window_id] = window.geometry
+                        floating.add(window.window_id)
+            rects.update(self.layout_manager.geometry_table)
+            index.build(rects, floating)
+        return index
         
     # Window management methods
     def spawn_terminal(self):
         """Mở terminal"""
-        terminal_cmd = self.config.get_terminal_command()
-        try:
-            subprocess.Popen([terminal_cmd])
-        except Exception as e:
-            print(f"Failed to spawn terminal: {e}")
-            
+        self.spawn(self.config.get_terminal_command())
+        
     def spawn_dmenu(self):
         """Mở dmenu"""
-        dmenu_cmd = self.config.get("applications.dmenu", "dmenu_run")
-        try:
-            subprocess.Popen(dmenu_cmd.split())
-        except Exception as e:
-            print(f"Failed to spawn dmenu: {e}")
+        self.spawn(self.config.get("applications.dmenu", "dmenu_run"))
+        
+    def spawn(self, command: str) -> bool:
+        """Chạy một lệnh, hẹn giờ reap process con khi nó thoát"""
+        if not spawn_process(command):
+            return False
+        if not self.reap_timer:
+            self.reap_timer = self.loop.call_later(self.REAP_INTERVAL, self._reap_children)
+        return True
+        
+    def _reap_children(self):
+        """Reap process con đã thoát; chỉ hẹn giờ tiếp khi còn process đang chạy"""
+        self.reap_timer = None
+        if reap_children():
+            self.reap_timer = self.loop.call_later(self.REAP_INTERVAL, self._reap_children)
             
     def kill_focused_window(self):
         """Đóng cửa sổ đang focus"""
         focused = self.event_handler.get_focused_window()
         if focused:
-            focused.kill()
-            self.event_handler.unregister_window(focused.window_id)
+            self.close_window(focused)
+            
+    def close_window(self, window: Window):
+        """Đóng một cửa sổ: WM_DELETE_WINDOW nếu client hỗ trợ, KillClient khi hết hạn chờ"""
+        if window.close():
+            # Cửa sổ được hủy đăng ký khi client tự unmap/destroy
+            timeout = self.config.get("window.close_timeout", 3.0)
+            self.loop.call_later(timeout, self._force_kill, window)
+        else:
+            window.kill()
+            self.event_handler.unregister_window(window.window_id)
+            
+    def _force_kill(self, window: Window):
+        """Client không phản hồi WM_DELETE_WINDOW trong thời gian chờ"""
+        if self.event_handler.get_window(window.window_id) is window:
+            window.kill()
+            self.event_handler.unregister_window(window.window_id)
             
     def toggle_fullscreen(self):
         """Chuyển đổi fullscreen"""
         focused = self.event_handler.get_focused_window()
         if focused:
-            # TODO: Implement fullscreen toggle
-            pass
+            self.set_fullscreen(focused, not focused.is_fullscreen)
+            
+    def set_fullscreen(self, window: Window, enabled: bool):
+        """Fullscreen: phủ toàn màn hình (kể cả bar), layout của màn hình đó bị bỏ qua khi đang bật"""
+        if window.is_fullscreen == enabled:
+            return
+        window.is_fullscreen = enabled
+        fullscreen_atom = self.xconn.get_atom('_NET_WM_STATE_FULLSCREEN')
+        monitor = self.monitor_manager.monitor_for_workspace(window.workspace)
+        if enabled:
+            window.net_state.add(fullscreen_atom)
+            window.fullscreen_restore = (window.geometry, window.border_width)
+            if monitor:
+                x, y, width, height = monitor.geometry
+            else:
+                x, y = 0, 0
+                width, height = self.xconn.get_screen_geometry()
+            window.set_border_width(0)
+            window.set_geometry(x, y, width, height)
+            self.raise_window(window)
+        else:
+            window.net_state.discard(fullscreen_atom)
+            geometry, border_width = window.fullscreen_restore or (None, self.config.get_border_width())
+            window.fullscreen_restore = None
+            window.set_border_width(border_width)
+            if window.is_floating and geometry:
+                window.set_geometry(*geometry)
+        self.hooks.emit('window', 'state', window)
+        if monitor:
+            self._update_layout([monitor])
             
     def toggle_floating(self):
         """Chuyển đổi floating/tiling"""
         focused = self.event_handler.get_focused_window()
         if focused:
-            focused.toggle_floating()
+            focused.toggle_floating(self.layout_manager.get_layout_area())
             self._update_layout()
             
+    def minimize_window(self):
+        """Ẩn cửa sổ đang focus (vẫn được quản lý, hiện lại không cần map/vẽ lại)"""
+        focused = self.event_handler.get_focused_window()
+        if focused:
+            self.scratchpad.hide(focused)
+            
+    def restore_window(self):
+        """Hiện lại cửa sổ minimize gần nhất"""
+        self.scratchpad.restore_last()
+        
+    def move_to_scratchpad(self):
+        """Đưa cửa sổ đang focus vào scratchpad"""
+        focused = self.event_handler.get_focused_window()
+        if focused:
+            self.scratchpad.move_to_scratchpad(focused)
+            
+    def toggle_scratchpad(self):
+        """Ẩn/hiện cửa sổ scratchpad"""
+        self.scratchpad.toggle()
+        
+    def focus_window(self, window: Window):
+        """Focus một cửa sổ bất kỳ, chuyển workspace nếu cần (cửa sổ đang ẩn được hiện lại)"""
+        if window.is_hidden:
+            self.scratchpad.show(window)
+            return
+        if window.workspace != self.workspace_manager.current:
+            self.switch_workspace(window.workspace)
+        self.raise_window(window)
+        self.event_handler.set_focused_window(window)
+        
+    def raise_window(self, window: Window):
+        """Đưa cửa sổ lên trên cùng"""
+        window.raise_to_top()
+        self.hooks.emit('stack', window)
+        
+    def cycle_focus(self, direction: int = 1):
+        """Alt-tab: duyệt focus theo thứ tự MRU của workspace hiện tại"""
+        self.focus_cycler.step(direction)
+        
+    def focus_last(self):
+        """Focus lại cửa sổ được dùng gần nhất trước cửa sổ hiện tại"""
+        focused = self.event_handler.get_focused_window()
+        previous = self.event_handler.focus_history.most_recent(
+            self.workspace_manager.current, exclude=focused
+        )
+        if previous and previous is not focused:
+            self.focus_window(previous)
+        
+    def toggle_explorer(self):
+        """Mở/đóng window explorer"""
+        if self.explorer:
+            self.explorer.toggle()
+            
     # Layout methods
     def set_layout(self, layout_name: str):
         """Chuyển đổi layout"""
         if self.layout_manager.set_layout(layout_name):
             self._update_layout()
-            print(f"Layout changed to: {layout_name}")
+            self.hooks.emit('layout', layout_name)
+            logger.info('layout', f"Layout changed to: {layout_name}")
             
     def cycle_layout(self):
         """Chuyển đổi layout theo vòng lặp"""
         self.layout_manager.cycle_layout()
         self._update_layout()
-        print(f"Layout changed to: {self.layout_manager.get_current_layout_name()}")
+        layout_name = self.layout_manager.get_current_layout_name()
+        self.hooks.emit('layout', layout_name)
+        logger.info('layout', f"Layout changed to: {layout_name}")
         
     def adjust_master_ratio(self, delta: float):
-        """Điều chỉnh tỷ lệ master area"""
-        self.layout_manager.adjust_master_ratio(delta)
+        """Điều chỉnh tỷ lệ master area (layout tree: phần của cửa sổ đang focus)"""
+        self.layout_manager.adjust_master_ratio(delta, window=self.event_handler.get_focused_window())
         self._update_layout()
         
+    def split_horizontal(self):
+        """Cửa sổ mở tiếp theo nằm cạnh cửa sổ đang focus (layout tree)"""
+        self._split(SPLIT_H)
+        
+    def split_vertical(self):
+        """Cửa sổ mở tiếp theo nằm dưới cửa sổ đang focus (layout tree)"""
+        self._split(SPLIT_V)
+        
+    def _split(self, orientation: int):
+        focused = self.event_handler.get_focused_window()
+        if focused and not focused.is_floating and self.layout_manager.split(focused, orientation):
+            self._update_layout()
+            
+    def toggle_split(self):
+        """Đổi hướng chia của container chứa cửa sổ đang focus"""
+        focused = self.event_handler.get_focused_window()
+        if focused and self.layout_manager.toggle_split(focused):
+            self._update_layout()
+        
+    # Workspace methods
+    def switch_workspace(self, index: int):
+        """Chuyển sang workspace theo index"""
+        if self.workspace_manager.switch_to(index):
+            self._update_layout()
+            
+    def move_to_workspace(self, index: int):
+        """Chuyển cửa sổ đang focus sang workspace khác"""
+        focused = self.event_handler.get_focused_window()
+        if focused and self.workspace_manager.move_window(focused, index):
+            self._update_layout()
+            
     # Window focus methods (vim-like navigation)
     def focus_left(self):
         """Focus cửa sổ bên trái"""
@@ -177,10 +560,21 @@ class WindowManager:
         
     def _focus_direction(self, direction: str):
         """Focus theo hướng"""
-        # TODO: Implement window focus direction logic
-        # Cần implement logic để tìm cửa sổ gần nhất theo hướng
-        pass
-        
+        focused = self.event_handler.get_focused_window()
+        if not focused:
+            focused = self.event_handler.focus_history.most_recent(self.workspace_manager.current)
+            if focused:
+                self.event_handler.set_focused_window(focused)
+            return
+            
+        wrap = self.config.get("advanced.force_focus_wrapping", False)
+        target_id = self._get_spatial_index().neighbor(focused.window_id, direction, wrap)
+        target = self.event_handler.get_window(target_id) if target_id else None
+        if target:
+            if target.is_floating:
+                self.raise_window(target)
+            self.event_handler.set_focused_window(target)
+            
     # Window move methods
     def move_left(self):
         """Di chuyển cửa sổ sang trái"""
@@ -200,14 +594,37 @@ class WindowManager:
         
     def _move_direction(self, direction: str):
         """Di chuyển cửa sổ theo hướng"""
-        # TODO: Implement window move direction logic
-        pass
-        
+        focused = self.event_handler.get_focused_window()
+        if not focused:
+            return
+            
+        if focused.is_floating:
+            # Floating: dịch một bước theo hướng
+            if focused.geometry:
+                step = self.config.get("window.floating_move_step", 20)
+                dx, dy = {'left': (-step, 0), 'right': (step, 0), 'up': (0, -step), 'down': (0, step)}[direction]
+                x, y, width, height = focused.geometry
+                focused.set_geometry(x + dx, y + dy, width, height)
+            return
+            
+        # Tiling: đổi chỗ với cửa sổ tiling kề bên theo hướng đó
+        wrap = self.config.get("advanced.force_focus_wrapping", False)
+        target_id = self._get_spatial_index().neighbor(focused.window_id, direction, wrap, tiled_only=True)
+        target = self.event_handler.get_window(target_id) if target_id else None
+        if target:
+            self.event_handler.swap_windows(focused, target)
+            self.layout_manager.on_swap(focused, target)
+            self._update_layout()
+            
     # Utility methods
     def reload_config(self):
         """Reload cấu hình"""
         self.config.reload()
-        print("Configuration reloaded")
+        self.event_masks.configure(self.config)
+        self.layout_manager.configure(self.config)
+        self._update_layout()
+        logger.configure(self.config)
+        logger.info('config', "Configuration reloaded")
         
     def restart_wm(self):
         """Restart window manager"""
@@ -220,12 +637,30 @@ class WindowManager:
         print("Shutting down window manager...")
         self.running = False
         
+        if self.ipc_server:
+            self.ipc_server.stop()
+        if self.recorder:
+            self.recorder.close()
+            print(f"Recorded {self.recorder.count} events to {self.recorder.path}")
+            self.recorder = None
+        if self.explorer:
+            self.explorer.stop()
+            self.explorer = None
+        if self.taskbar:
+            self.taskbar.stop()
+            self.taskbar = None
+        self.plugins.stop()
+        self.prefetcher.stop()
+        self.ewmh.stop()
+        self.frame_manager.stop()
+            
         # Cleanup
         for window in self.event_handler.get_all_windows():
             window.unmap()
             
         self.xconn.flush()
         print("Window manager stopped.")
+        logger.stop()
         
     def get_status_info(self) -> dict:
         """Lấy thông tin trạng thái"""
@@ -237,5 +672,177 @@ class WindowManager:
             'tiling_windows': len(self.event_handler.get_tiling_windows()),
             'floating_windows': len(self.event_handler.get_floating_windows()),
             'current_layout': self.layout_manager.get_current_layout_name(),
-            'focused_window': focused.get_wm_name() if focused else None,
+            'current_workspace': self.workspace_manager.get_current().name,
+            'outputs': len(self.monitor_manager.monitors),
+            'event_masks': self.event_masks.get_info(),
+            'tab_cache': self.layout_manager.tabs.get_info(),
+            'frames': self.frame_manager.get_info(),
+            'scratchpad': self.scratchpad.get_info(),
+            'plugins': self.plugins.get_info(),
+            'prefetch': self.prefetcher.get_info(),
+            'log': logger.get_info(),
+            'focused_window': focused.get_title() if focused else None,
+        }
+        
+    # IPC
+    def _build_actions(self) -> dict:
+        """Bảng action theo tên (giống tên action trong config keybinds)"""
+        return {
+            'spawn_terminal': self.spawn_terminal,
+            'spawn_dmenu': self.spawn_dmenu,
+            'kill_focused': self.kill_focused_window,
+            'toggle_fullscreen': self.toggle_fullscreen,
+            'toggle_floating': self.toggle_floating,
+            'minimize': self.minimize_window,
+            'restore': self.restore_window,
+            'move_to_scratchpad': self.move_to_scratchpad,
+            'scratchpad_show': self.toggle_scratchpad,
+            'window_explorer': self.toggle_explorer,
+            'dump_metrics': self.dump_metrics,
+            'dump_log': self.dump_log,
+            'focus_last': self.focus_last,
+            'layout_stack': lambda: self.set_layout('stack'),
+            'layout_tiling': lambda: self.set_layout('tiling'),
+            'layout_monocle': lambda: self.set_layout('monocle'),
+            'layout_tabbed': lambda: self.set_layout('tabbed'),
+            'layout_stacking': lambda: self.set_layout('stacking'),
+            'layout_tree': lambda: self.set_layout('tree'),
+            'layout_grid': lambda: self.set_layout('grid'),
+            'layout_spiral': lambda: self.set_layout('spiral'),
+            'split_horizontal': self.split_horizontal,
+            'split_vertical': self.split_vertical,
+            'toggle_split': self.toggle_split,
+            'cycle_layout': self.cycle_layout,
+            'focus_left': self.focus_left,
+            'focus_right': self.focus_right,
+            'focus_up': self.focus_up,
+            'focus_down': self.focus_down,
+            'move_left': self.move_left,
+            'move_right': self.move_right,
+            'move_up': self.move_up,
+            'move_down': self.move_down,
+            'master_grow_left': lambda: self.adjust_master_ratio(-0.05),
+            'master_grow_right': lambda: self.adjust_master_ratio(0.05),
+            'reload_config': self.reload_config,
+            'restart_wm': self.restart_wm,
+            'quit': self.quit,
         }
+        
+    def _resolve_workspace(self, name: str) -> Optional[int]:
+        """Tìm index workspace theo tên"""
+        workspace = self.workspace_manager.find_by_name(name)
+        return workspace.index if workspace else None
+        
+    def run_command(self, command: str) -> dict:
+        """Chạy một lệnh dạng chuỗi (ví dụ 'workspace 2', 'layout tiling', 'focus_left')"""
+        parts = command.strip().split(None, 1)
+        if not parts:
+            return {'success': False, 'error': 'Empty command'}
+        name, arg = parts[0], parts[1].strip() if len(parts) > 1 else ''
+        
+        start = self.metrics.begin(f"command:{name}") if self.metrics else None
+        try:
+            if name in self.actions and not arg:
+                self.actions[name]()
+            elif name == 'exec' and arg:
+                if not self.spawn(arg):
+                    return {'success': False, 'error': f"Failed to spawn '{arg}'"}
+            elif name == 'layout' and arg:
+                if arg not in self.layout_manager.layouts:
+                    return {'success': False, 'error': f"Unknown layout '{arg}'"}
+                self.set_layout(arg)
+            elif name in ('workspace', 'move_to_workspace') and arg:
+                index = self._resolve_workspace(arg)
+                if index is None:
+                    return {'success': False, 'error': f"Unknown workspace '{arg}'"}
+                if name == 'workspace':
+                    self.switch_workspace(index)
+                else:
+                    self.move_to_workspace(index)
+            else:
+                return {'success': False, 'error': f"Unknown command '{command}'"}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+        finally:
+            if start:
+                self.metrics.end(f"command:{name}", start)
+                
+        self.hooks.emit('batch_end')
+        self.xconn.flush()
+        return {'success': True}
+        
+    def get_windows(self) -> List[dict]:
+        """Danh sách tất cả cửa sổ đang được quản lý"""
+        return [window.get_info() for window in self.event_handler.get_all_windows()]
+        
+    def get_workspaces(self) -> List[dict]:
+        """Danh sách workspace và số cửa sổ trên mỗi workspace"""
+        counts = {}
+        for window in self.event_handler.get_all_windows():
+            counts[window.workspace] = counts.get(window.workspace, 0) + 1
+            
+        current = self.workspace_manager.current
+        workspaces = []
+        for workspace in self.workspace_manager.workspaces:
+            info = workspace.get_info()
+            info['focused'] = workspace.index == current
+            info['windows'] = counts.get(workspace.index, 0)
+            monitor = self.monitor_manager.monitor_for_workspace(workspace.index)
+            info['visible'] = monitor is not None
+            info['output'] = monitor.name if monitor else None
+            workspaces.append(info)
+        return workspaces
+        
+    def get_tree(self) -> dict:
+        """Cây trạng thái: workspace -> cửa sổ"""
+        current = self.workspace_manager.current
+        workspaces = []
+        for workspace in self.workspace_manager.workspaces:
+            info = workspace.get_info()
+            info['focused'] = workspace.index == current
+            info['windows'] = [w.get_info() for w in self.workspace_manager.get_windows(workspace.index)]
+            info['containers'] = self.layout_manager.describe_tree(workspace.index)
+            workspaces.append(info)
+            
+        return {
+            'layout': self.layout_manager.get_current_layout_name(),
+            'outputs': self.get_outputs(),
+            'workspaces': workspaces,
+        }
+        
+    def get_metrics(self) -> dict:
+        """Số liệu latency/round-trip (rỗng nếu metrics bị tắt)"""
+        if not self.metrics:
+            return {'enabled': False}
+        info = self.metrics.get_info()
+        info['enabled'] = True
+        return info
+        
+    def get_log(self) -> dict:
+        """Trạng thái log và các record gần nhất trong ring buffer"""
+        info = logger.get_info()
+        info['records'] = logger.recent(self.config.get("log.ipc_records", 200))
+        return info
+        
+    def dump_log(self):
+        """Ghi toàn bộ ring buffer log ra file <log.path>.dump (thread nền ghi)"""
+        path = logger.dump()
+        logger.info('dump', f"Log ring buffer dumped to {path}")
+        
+    def dump_metrics(self):
+        """Ghi tóm tắt metrics vào log (một record, thread nền ghi file)"""
+        if not self.metrics:
+            logger.warning('metrics', "Metrics are disabled (set metrics.enabled in config)")
+            return
+        lines = self.metrics.summary(self.config.get("metrics.summary_top", 10))
+        logger.info('metrics', '\n'.join(lines))
+            
+    def get_outputs(self) -> List[dict]:
+        """Danh sách màn hình kèm layout và workspace đang hiển thị"""
+        outputs = []
+        for monitor in self.monitor_manager.monitors:
+            info = monitor.get_info()
+            info['focused'] = monitor.index == self.monitor_manager.current
+            info['layout'] = self.layout_manager.get_current_layout_name(monitor)
+            outputs.append(info)
+        return outputs
@@ -0,0 +1,141 @@
+from typing import List, Optional
+from .window import Window
+
+class Workspace:
+    """Một workspace (desktop ảo)"""
+    
+    def __init__(self, index: int, name: str):
+        self.index = index
+        self.name = name
+        
+    def get_info(self) -> dict:
+        """Thông tin workspace dạng dict (dùng cho IPC)"""
+        return {'index': self.index, 'name': self.name}
+
+class WorkspaceManager:
+    """Quản lý các workspace và việc chuyển đổi giữa chúng (mỗi màn hình hiện một workspace)"""
+    
+    def __init__(self, event_handler, hooks, names: List[str], monitors=None):
+        self.event_handler = event_handler
+        self.hooks = hooks
+        self.monitors = monitors  # MonitorManager
+        self.workspaces = [Workspace(i, name) for i, name in enumerate(names or ["1"])]
+        self.current = 0
+        self.hooks.subscribe('focus', self._on_focus)
+        
+    def get_current(self) -> Workspace:
+        """Lấy workspace hiện tại"""
+        return self.workspaces[self.current]
+        
+    def get_workspace(self, index: int) -> Optional[Workspace]:
+        """Lấy workspace theo index"""
+        if 0 <= index < len(self.workspaces):
+            return self.workspaces[index]
+        return None
+        
+    def find_by_name(self, name: str) -> Optional[Workspace]:
+        """Tìm workspace theo tên"""
+        for workspace in self.workspaces:
+            if workspace.name == name:
+                return workspace
+        return None
+        
+    def get_windows(self, index: int) -> List[Window]:
+        """Lấy các cửa sổ thuộc một workspace (theo thứ tự MRU)"""
+        return self.event_handler.focus_history.get_windows(index)
+        
+    def _toggled_windows(self, index: int) -> List[Window]:
+        """Cửa sổ được map/unmap theo workspace (cửa sổ scratchpad/minimize luôn map, nằm ngoài màn hình)"""
+        return [window for window in self.get_windows(index) if not window.is_hidden]
+        
+    def is_visible(self, index: int) -> bool:
+        """Workspace có đang hiển thị trên màn hình nào không"""
+        if not self.monitors:
+            return index == self.current
+        return self.monitors.monitor_for_workspace(index) is not None
+        
+    def assign_monitors(self):
+        """Gán workspace đang ẩn cho các màn hình chưa có workspace (khởi động, cắm màn hình)"""
+        for monitor in self.monitors.monitors:
+            if monitor.workspace is not None:
+                continue
+            for workspace in self.workspaces:
+                if not self.is_visible(workspace.index):
+                    monitor.workspace = workspace.index
+                    for window in self._toggled_windows(workspace.index):
+                        window.map()
+                    break
+        current = self.monitors.get_current()
+        if current and current.workspace is not None:
+            self.current = current.workspace
+            
+    def release_monitor(self, monitor):
+        """Màn hình bị rút: ẩn workspace của nó, focus chuyển sang màn hình còn lại"""
+        index, monitor.workspace = monitor.workspace, None
+        if index is None:
+            return
+        for window in self._toggled_windows(index):
+            window.unmap()
+        if index == self.current:
+            current = self.monitors.get_current()
+            if current and current.workspace is not None:
+                self.current = current.workspace
+                history = self.event_handler.focus_history
+                self.event_handler.set_focused_window(history.most_recent(self.current))
+                self.hooks.emit('workspace', 'focus', self.workspaces[self.current], self.workspaces[index])
+                
+    def switch_to(self, index: int) -> bool:
+        """Chuyển sang workspace khác"""
+        if index == self.current or not self.get_workspace(index):
+            return False
+            
+        old = self.current
+        monitor = self.monitors.monitor_for_workspace(index) if self.monitors else None
+        if monitor is not None:
+            # Workspace đang hiện trên màn hình khác: chỉ chuyển focus sang màn hình đó
+            self.monitors.current = monitor.index
+        else:
+            # Hiện cửa sổ của workspace mới trước để tránh nháy nền
+            for window in self._toggled_windows(index):
+                window.map()
+            for window in self._toggled_windows(old):
+                window.unmap()
+            if self.monitors:
+                self.monitors.get_current().workspace = index
+        self.current = index
+            
+        # Focus lại cửa sổ dùng gần nhất của workspace mới
+        history = self.event_handler.focus_history
+        self.event_handler.set_focused_window(history.most_recent(index))
+        
+        self.hooks.emit('workspace', 'focus', self.workspaces[index], self.workspaces[old])
+        return True
+        
+    def move_window(self, window: Window, index: int) -> bool:
+        """Chuyển cửa sổ sang workspace khác"""
+        if index == window.workspace or not self.get_workspace(index):
+            return False
+            
+        window.workspace = index
+        history = self.event_handler.focus_history
+        history.move(window)
+        if index != self.current:
+            if not self.is_visible(index) and not window.is_hidden:
+                window.unmap()
+            if window is self.event_handler.get_focused_window():
+                self.event_handler.set_focused_window(history.most_recent(self.current))
+                
+        self.hooks.emit('window', 'move', window)
+        return True
+        
+    def _on_focus(self, window: Optional[Window]):
+        """Focus sang cửa sổ trên màn hình khác (click, focus theo hướng) thì đổi màn hình hiện tại"""
+        if not window or window.workspace == self.current or not self.monitors:
+            return
+        monitor = self.monitors.monitor_for_workspace(window.workspace)
+        if monitor is None:
+            return
+        old = self.current
+        self.current = window.workspace
+        self.monitors.current = monitor.index
+        self.hooks.emit('workspace', 'focus', self.workspaces[self.current], self.workspaces[old])
@@ -0,0 +1,371 @@
+import argparse
+import json
+import os
+import select
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import xcffib
+import xcffib.xproto as xproto
+import xcffib.xtest as xtest
+from typing import Callable, Dict, List, Optional
+from config import config
+from core.ipc import IPCClient
+from core.keybinds import KeybindManager
+from core.metrics import Histogram
+
+# Ngưỡng mặc định: chậm hơn baseline quá 10% (và quá 50µs) thì coi là regression
+DEFAULT_THRESHOLD = 0.10
+NOISE_FLOOR_US = 50
+# Loại input cho XTEST FakeInput (giống mã event KeyPress/KeyRelease)
+KEY_PRESS = 2
+KEY_RELEASE = 3
+
+class Xvfb:
+    """Xvfb trên display riêng (số display do Xvfb tự chọn qua -displayfd)"""
+    
+    def __init__(self, width: int = 1920, height: int = 1080):
+        self.width = width
+        self.height = height
+        self.process: Optional[subprocess.Popen] = None
+        self.display: Optional[str] = None
+        
+    def start(self, timeout: float = 10.0):
+        if not shutil.which("Xvfb"):
+            raise RuntimeError("Xvfb not found in PATH")
+        reader, writer = os.pipe()
+        self.process = subprocess.Popen(
+            ["Xvfb", "-displayfd", str(writer), "-screen", "0", f"{self.width}x{self.height}x24",
+             "-nolisten", "tcp", "-noreset"],
+            pass_fds=(writer,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        os.close(writer)
+        ready, _, _ = select.select([reader], [], [], timeout)
+        number = os.read(reader, 16).decode().strip() if ready else ""
+        os.close(reader)
+        if not number:
+            self.stop()
+            raise RuntimeError("Xvfb did not start")
+        self.display = f":{number}"
+        
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait(5)
+        self.process = None
+
+class WMProcess:
+    """IArDE chạy như tiến trình con trên display của Xvfb, với config riêng (bật metrics)"""
+    
+    def __init__(self, display: str):
+        self.display = display
+        self.home = tempfile.mkdtemp(prefix="iarde-bench-")
+        self.process: Optional[subprocess.Popen] = None
+        self.ipc: Optional[IPCClient] = None
+        self.env = dict(os.environ, DISPLAY=display, HOME=self.home, XDG_RUNTIME_DIR=self.home)
+        self.socket_path = os.path.join(self.home, f"iarde-ipc{display.replace('/', '_')}.sock")
+        
+    def start(self, timeout: float = 10.0) -> float:
+        """Khởi động WM, trả về thời gian đến khi IPC trả lời (startup-to-ready, µs)"""
+        os.makedirs(os.path.join(self.home, ".config", "iarde"))
+        with open(os.path.join(self.home, ".config", "iarde", "config.json"), 'w') as f:
+            json.dump({"metrics": {"enabled": True, "summary_interval": 0}}, f)
+            
+        main = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        start = time.perf_counter_ns()
+        self.process = subprocess.Popen(
+            [sys.executable, main], env=self.env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"IArDE exited with code {self.process.returncode}")
+            try:
+                self.ipc = IPCClient(self.socket_path)
+                self.ipc.query('status')
+                return (time.perf_counter_ns() - start) // 1000
+            except OSError:
+                self.ipc = None
+                time.sleep(0.005)
+        raise RuntimeError("IArDE did not become ready")
+        
+    def stop(self):
+        if self.ipc:
+            try:
+                self.ipc.command("quit")
+            except OSError:
+                pass
+            self.ipc.close()
+            self.ipc = None
+        if self.process:
+            try:
+                self.process.wait(5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+        shutil.rmtree(self.home, ignore_errors=True)
+
+class BenchClient:
+    """Client X tổng hợp: tạo/map cửa sổ, gửi phím qua XTEST và chờ event"""
+    
+    EVENT_MASK = xproto.EventMask.StructureNotify | xproto.EventMask.FocusChange
+    
+    def __init__(self, display: str):
+        self.conn = xcffib.connect(display=display)
+        self.screen = self.conn.get_setup().roots[self.conn.pref_screen]
+        self.root = self.screen.root
+        self.xtest = self.conn(xtest.key)
+        self.windows: List[int] = []
+        
+    def create_window(self) -> int:
+        wid = self.conn.generate_id()
+        self.conn.core.CreateWindow(
+            self.screen.root_depth, wid, self.root, 0, 0, 100, 100, 0,
+            xproto.WindowClass.InputOutput, self.screen.root_visual,
+            xproto.CW.EventMask, [self.EVENT_MASK]
+        )
+        self.windows.append(wid)
+        return wid
+        
+    def map_windows(self, count: int, timeout: float = 30.0) -> List[int]:
+        """Tạo và map `count` cửa sổ, chờ WM map hết"""
+        windows = [self.create_window() for _ in range(count)]
+        for wid in windows:
+            self.conn.core.MapWindow(wid)
+        self.conn.flush()
+        pending = set(windows)
+        
+        def mapped(event):
+            if isinstance(event, xproto.MapNotifyEvent):
+                pending.discard(event.window)
+            return not pending
+            
+        self.wait(mapped, timeout)
+        self.settle()
+        return windows
+        
+    def destroy_all(self):
+        for wid in self.windows:
+            self.conn.core.DestroyWindow(wid)
+        self.windows.clear()
+        self.conn.flush()
+        self.settle()
+        
+    def wait(self, predicate: Callable[[object], bool], timeout: float = 5.0) -> bool:
+        """Chờ đến khi có event thỏa predicate"""
+        deadline = time.monotonic() + timeout
+        fd = self.conn.get_file_descriptor()
+        while True:
+            try:
+                event = self.conn.poll_for_event()
+            except xcffib.Error:
+                continue
+            if event is not None:
+                if predicate(event):
+                    return True
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            select.select([fd], [], [], remaining)
+            
+    def settle(self, quiet: float = 0.05):
+        """Bỏ event cho đến khi không có gì mới trong `quiet` giây"""
+        while self.wait(lambda e: True, quiet):
+            pass
+            
+    def sync(self):
+        """Round-trip tới X server (đảm bảo request trước đó đã được xử lý)"""
+        self.conn.core.GetInputFocus().reply()
+        
+    def modifier_keycode(self, mask: int) -> int:
+        """Keycode đầu tiên gắn với modifier mask (ví dụ Mod4 -> Super_L)"""
+        mapping = self.conn.core.GetModifierMapping().reply()
+        index = mask.bit_length() - 1
+        per = mapping.keycodes_per_modifier
+        return next(code for code in mapping.keycodes[index * per:(index + 1) * per] if code)
+        
+    def press(self, keycodes: List[int]):
+        """Nhấn rồi nhả một tổ hợp phím qua XTEST"""
+        for code in keycodes:
+            self.xtest.FakeInput(KEY_PRESS, code, 0, self.root, 0, 0, 0)
+        for code in reversed(keycodes):
+            self.xtest.FakeInput(KEY_RELEASE, code, 0, self.root, 0, 0, 0)
+        self.conn.flush()
+        
+    def close(self):
+        self.conn.disconnect()
+
+class Suite:
+    """Các benchmark end-to-end, kết quả là histogram latency (µs) theo tên"""
+    
+    def __init__(self, samples: int, window_counts: List[int]):
+        self.samples = samples
+        self.window_counts = window_counts
+        self.results: Dict[str, Histogram] = {}
+        self.wm_metrics: Dict[str, dict] = {}
+        
+    def _histogram(self, name: str) -> Histogram:
+        histogram = self.results.get(name)
+        if histogram is None:
+            histogram = self.results[name] = Histogram()
+        return histogram
+        
+    def run(self, xvfb: Xvfb):
+        wm = WMProcess(xvfb.display)
+        self._histogram("startup").record(wm.start())
+        client = BenchClient(xvfb.display)
+        try:
+            self.bench_map(client)
+            self.bench_focus(client)
+            self.bench_layout_switch(client, wm)
+            self.bench_relayout(client, wm)
+            self.wm_metrics = wm.ipc.query('metrics').get('scopes', {})
+        finally:
+            client.close()
+            wm.stop()
+            
+    def bench_map(self, client: BenchClient):
+        """MapWindow của client -> cửa sổ được WM map và cấu hình (MapNotify + ConfigureNotify)"""
+        histogram = self._histogram("map_to_configured")
+        for _ in range(self.samples):
+            wid = client.create_window()
+            client.conn.flush()
+            client.sync()
+            seen = set()
+            start = time.perf_counter_ns()
+            client.conn.core.MapWindow(wid)
+            client.conn.flush()
+            
+            def done(event):
+                if getattr(event, 'window', None) == wid:
+                    if isinstance(event, xproto.MapNotifyEvent):
+                        seen.add('map')
+                    elif isinstance(event, xproto.ConfigureNotifyEvent):
+                        seen.add('configure')
+                return len(seen) == 2
+                
+            if client.wait(done):
+                histogram.record((time.perf_counter_ns() - start) // 1000)
+            client.settle(0.01)
+        client.destroy_all()
+        
+    def bench_focus(self, client: BenchClient):
+        """Keypress (focus_right/focus_left qua XTEST) -> FocusIn trên cửa sổ đích"""
+        histogram = self._histogram("keypress_to_focus")
+        left, right = client.map_windows(2)
+        keybinds = KeybindManager(None)
+        mod_mask, key_right = keybinds.parse_keybind(config.get_keybind("focus_right"))
+        _, key_left = keybinds.parse_keybind(config.get_keybind("focus_left"))
+        modifiers = [client.modifier_keycode(bit) for bit in (1 << i for i in range(8)) if mod_mask & bit]
+        
+        for i in range(self.samples):
+            target, key = (right, key_right) if i % 2 == 0 else (left, key_left)
+            start = time.perf_counter_ns()
+            client.press(modifiers + [key])
+            if client.wait(lambda e: isinstance(e, xproto.FocusInEvent) and e.event == target and
+                           e.detail != xproto.NotifyDetail.Pointer):
+                histogram.record((time.perf_counter_ns() - start) // 1000)
+            client.settle(0.01)
+        client.destroy_all()
+        
+    def bench_layout_switch(self, client: BenchClient, wm: WMProcess):
+        """Lệnh 'layout ...' qua IPC (10 cửa sổ) -> X server đã nhận các ConfigureWindow"""
+        histogram = self._histogram("layout_switch")
+        client.map_windows(10)
+        layouts = ["stack", "tiling"]
+        for i in range(self.samples):
+            start = time.perf_counter_ns()
+            wm.ipc.command(f"layout {layouts[i % 2]}")
+            client.sync()
+            histogram.record((time.perf_counter_ns() - start) // 1000)
+            client.settle(0.01)
+        wm.ipc.command("layout tiling")
+        client.destroy_all()
+        
+    def bench_relayout(self, client: BenchClient, wm: WMProcess):
+        """Đổi master ratio qua IPC -> X server đã nhận geometry mới, với 1/10/100/1000 cửa sổ"""
+        for count in self.window_counts:
+            histogram = self._histogram(f"relayout_{count}")
+            client.map_windows(count, timeout=60.0)
+            for i in range(self.samples):
+                start = time.perf_counter_ns()
+                wm.ipc.command("master_grow_right" if i % 2 == 0 else "master_grow_left")
+                client.sync()
+                histogram.record((time.perf_counter_ns() - start) // 1000)
+                client.settle(0.01)
+            client.destroy_all()
+            
+    def get_info(self) -> dict:
+        return {name: histogram.get_info() for name, histogram in self.results.items()}
+
+def compare(results: dict, baseline: dict, threshold: float) -> dict:
+    """So sánh p50/p99 với baseline, đánh dấu regression"""
+    comparison = {}
+    for name, info in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        entry = {}
+        for key in ('p50', 'p99'):
+            old, new = base.get(key, 0), info[key]
+            ratio = new / old if old else None
+            regressed = new > old * (1 + threshold) and new - old > NOISE_FLOOR_US
+            entry[key] = {'baseline': old, 'current': new,
+                          'ratio': round(ratio, 3) if ratio else None, 'regression': regressed}
+        comparison[name] = entry
+    return comparison
+
+def main():
+    """Benchmark end-to-end IArDE trên Xvfb, kết quả JSON"""
+    parser = argparse.ArgumentParser(description="IArDE Xvfb end-to-end benchmarks")
+    parser.add_argument('-n', '--samples', type=int, default=20, help="Số mẫu cho mỗi benchmark")
+    parser.add_argument('--windows', default="1,10,100,1000", help="Số cửa sổ cho relayout")
+    parser.add_argument('-o', '--output', help="Ghi kết quả JSON ra file (mặc định stdout)")
+    parser.add_argument('-b', '--baseline', help="File JSON kết quả trước đó để so sánh")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Tỉ lệ chậm hơn baseline được coi là regression")
+    args = parser.parse_args()
+    
+    suite = Suite(args.samples, [int(n) for n in args.windows.split(',') if n])
+    xvfb = Xvfb()
+    try:
+        xvfb.start()
+        suite.run(xvfb)
+    except RuntimeError as e:
+        print(f"Benchmark failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        xvfb.stop()
+        
+    output = {
+        'timestamp': int(time.time()),
+        'python': sys.version.split()[0],
+        'samples': args.samples,
+        'unit': 'us',
+        'results': suite.get_info(),
+        'wm_metrics': suite.wm_metrics,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            output['comparison'] = compare(output['results'], json.load(f), args.threshold)
+        regressions = [name for name, entry in output['comparison'].items()
+                       if any(value['regression'] for value in entry.values())]
+        output['regressions'] = regressions
+        
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if regressions:
+        print(f"Regressions: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import argparse
+import json
+import sys
+from core.ipc import IPCClient, Codec, QUERY_NAMES, EVENT_NAMES
+
+def main():
+    """Gửi lệnh/truy vấn đến IArDE qua IPC socket"""
+    parser = argparse.ArgumentParser(description="IArDE IPC client")
+    parser.add_argument('-s', '--socket', help="Đường dẫn IPC socket (mặc định: $IARDE_SOCK)")
+    parser.add_argument('-t', '--type', default='command',
+                        choices=['command', 'subscribe'] + list(QUERY_NAMES),
+                        help="Loại message")
+    parser.add_argument('--binary', action='store_true', help="Dùng encoding nhị phân")
+    parser.add_argument('args', nargs='*', help="Lệnh hoặc danh sách event")
+    args = parser.parse_args()
+    
+    try:
+        client = IPCClient(args.socket, Codec.BINARY if args.binary else Codec.JSON)
+    except OSError as e:
+        print(f"Cannot connect to IArDE: {e}", file=sys.stderr)
+        sys.exit(1)
+        
+    try:
+        if args.type == 'command':
+            reply = client.command(' '.join(args.args))
+            print(json.dumps(reply))
+            sys.exit(0 if reply.get('success') else 2)
+        elif args.type == 'subscribe':
+            events = args.args or list(EVENT_NAMES)
+            client.subscribe(events)
+            while True:
+                name, payload = client.read_event()
+                print(json.dumps({'event': name, 'payload': payload}), flush=True)
+        else:
+            print(json.dumps(client.query(args.type), indent=2))
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    main()
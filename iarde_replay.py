@@ -0,0 +1,48 @@
+import argparse
+import contextlib
+import json
+import sys
+from config import config
+from core.conn import XcffibBackend
+from core.fake import FakeBackend, FakeServer
+from core.trace import TraceReader, TraceReplayer, format_report
+from core.wm import WindowManager
+
+def main():
+    """Replay một file trace vào IArDE và báo cáo throughput/latency"""
+    parser = argparse.ArgumentParser(description="IArDE trace replayer")
+    parser.add_argument('trace', help="File trace (ghi bằng trace.record)")
+    parser.add_argument('--speed', type=float, default=0.0,
+                        help="Tỉ lệ tốc độ so với lúc ghi (1 = như thật, 0 = nhanh nhất có thể)")
+    parser.add_argument('-d', '--display',
+                        help="Chạy trên X server (ví dụ Xvfb :99) thay vì server giả")
+    parser.add_argument('--json', action='store_true', help="In báo cáo dạng JSON")
+    args = parser.parse_args()
+    
+    try:
+        reader = TraceReader(args.trace)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read trace: {e}", file=sys.stderr)
+        sys.exit(1)
+        
+    # Không mở IPC socket, bật đếm request X cho báo cáo
+    config.set("ipc.enabled", False)
+    config.set("metrics.enabled", True)
+    config.set("metrics.summary_interval", 0)
+    config.set("trace.record", "")
+    if args.display:
+        backend = XcffibBackend(args.display)
+    else:
+        backend = FakeBackend(FakeServer(reader.width, reader.height, root=reader.root, record=False))
+        
+    # Log của WM ra stderr để stdout chỉ chứa báo cáo
+    with contextlib.redirect_stdout(sys.stderr):
+        wm = WindowManager(backend)
+        report = TraceReplayer(wm, args.speed).replay(reader)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print("\n".join(format_report(report)))
+
+if __name__ == "__main__":
+    main()
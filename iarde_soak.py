@@ -0,0 +1,218 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+import xcffib
+import xcffib.xproto as xproto
+from typing import Dict, List
+from config import config
+from core.conn import XcffibBackend
+from core.fake import FakeBackend, FakeServer
+from core.utils import reap_children
+from core.wm import WindowManager
+
+# Tăng trưởng tối thiểu (từ mẫu đầu đến mẫu cuối sau warmup) để coi là leak
+TOLERANCE = {
+    'heap_bytes': 256 * 1024,
+    'fds': 0,
+    'windows': 0,
+    'focus_history': 0,
+    'children': 0,
+    'zombies': 0,
+}
+
+class FakeClients:
+    """Client mô phỏng trên server giả"""
+    
+    def __init__(self, server: FakeServer):
+        self.server = server
+        
+    def create(self, title: str) -> int:
+        wid = self.server.create_client(title=title, wm_class="Soak")
+        self.server.map_client(wid)
+        return wid
+        
+    def unmap(self, wid: int):
+        self.server.unmap_client(wid)
+        
+    def destroy(self, wid: int):
+        if wid in self.server.windows:
+            self.server.destroy_client(wid)
+            
+    def window_count(self) -> int:
+        return len(self.server.windows)
+
+class XClients:
+    """Client thật qua một kết nối xcffib riêng (Xvfb)"""
+    
+    def __init__(self, display: str):
+        self.conn = xcffib.connect(display=display)
+        self.screen = self.conn.get_setup().roots[self.conn.pref_screen]
+        
+    def create(self, title: str) -> int:
+        wid = self.conn.generate_id()
+        self.conn.core.CreateWindow(
+            self.screen.root_depth, wid, self.screen.root, 0, 0, 200, 200, 0,
+            xproto.WindowClass.InputOutput, self.screen.root_visual, 0, []
+        )
+        self.conn.core.ChangeProperty(xproto.PropMode.Replace, wid, xproto.Atom.WM_NAME,
+                                      xproto.Atom.STRING, 8, len(title), title)
+        self.conn.core.MapWindow(wid)
+        self.conn.flush()
+        return wid
+        
+    def unmap(self, wid: int):
+        self.conn.core.UnmapWindow(wid)
+        self.conn.flush()
+        
+    def destroy(self, wid: int):
+        self.conn.core.DestroyWindow(wid)
+        self.conn.flush()
+        
+    def window_count(self) -> int:
+        return len(self.conn.core.QueryTree(self.screen.root).reply().children)
+
+def count_fds() -> int:
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        return 0
+
+def count_zombies() -> int:
+    """Số process con ở trạng thái zombie (chỉ Linux)"""
+    pid = str(os.getpid())
+    zombies = 0
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return 0
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if fields[0] == 'Z' and fields[1] == pid:
+            zombies += 1
+    return zombies
+
+class Soak:
+    """Tạo/map/unmap/hủy cửa sổ liên tục, lấy mẫu tài nguyên định kỳ và phát hiện tăng trưởng đơn điệu"""
+    
+    def __init__(self, wm: WindowManager, clients, batch: int, spawn: str):
+        self.wm = wm
+        self.clients = clients
+        self.batch = batch
+        self.spawn = spawn
+        self.samples: List[Dict[str, int]] = []
+        
+    def pump(self, timeout: float = 0.0):
+        """Cho WM xử lý event và timer đang chờ"""
+        self.wm.loop.run_once(timeout)
+        self.wm._process_x_events()
+        
+    def cycle(self, number: int):
+        """Một vòng: tạo và map `batch` cửa sổ, client tự unmap một nửa, rồi hủy tất cả"""
+        windows = [self.clients.create(f"soak {number}.{i}") for i in range(self.batch)]
+        self.pump()
+        # Đổi focus/workspace để đi qua các đường focus history, layout, MRU
+        self.wm.run_command("focus_right")
+        self.wm.run_command("cycle_layout")
+        for wid in windows[::2]:
+            self.clients.unmap(wid)
+        self.pump()
+        for wid in windows:
+            self.clients.destroy(wid)
+        if self.spawn:
+            self.wm.run_command(f"exec {self.spawn}")
+        self.pump()
+        
+    def sample(self, cycle: int):
+        gc.collect()
+        reap_children()
+        current, _ = tracemalloc.get_traced_memory()
+        self.samples.append({
+            'cycle': cycle,
+            'heap_bytes': current,
+            'fds': count_fds(),
+            'windows': len(self.wm.event_handler.get_all_windows()),
+            'focus_history': len(self.wm.event_handler.focus_history.nodes),
+            'server_windows': self.clients.window_count(),
+            'children': reap_children(),
+            'zombies': count_zombies(),
+        })
+        
+    def run(self, cycles: int, interval: int, duration: float):
+        deadline = time.monotonic() + duration if duration else None
+        cycle = 0
+        self.sample(cycle)
+        while cycle < cycles or (deadline and time.monotonic() < deadline):
+            cycle += 1
+            self.cycle(cycle)
+            if cycle % interval == 0:
+                # Chờ process con thoát và timer reap chạy trước khi lấy mẫu
+                self.pump(0.05)
+                self.sample(cycle)
+            if deadline and time.monotonic() >= deadline:
+                break
+                
+    def check(self, warmup: int) -> List[str]:
+        """Các chỉ số tăng đơn điệu qua mọi mẫu sau warmup và vượt ngưỡng cho phép"""
+        samples = self.samples[warmup:]
+        if len(samples) < 3:
+            return []
+        leaks = []
+        for key, tolerance in TOLERANCE.items():
+            series = [sample[key] for sample in samples]
+            growing = all(b >= a for a, b in zip(series, series[1:]))
+            if growing and series[-1] - series[0] > tolerance:
+                leaks.append(f"{key}: {series[0]} -> {series[-1]}")
+        return leaks
+
+def main():
+    """Soak test: churn cửa sổ hàng nghìn lần, thất bại nếu tài nguyên tăng đơn điệu"""
+    parser = argparse.ArgumentParser(description="IArDE soak test")
+    parser.add_argument('-c', '--cycles', type=int, default=2000, help="Số vòng tạo/hủy cửa sổ")
+    parser.add_argument('--duration', type=float, default=0, help="Chạy ít nhất N giây (0 = theo số vòng)")
+    parser.add_argument('--batch', type=int, default=8, help="Số cửa sổ mỗi vòng")
+    parser.add_argument('--interval', type=int, default=100, help="Lấy mẫu sau mỗi N vòng")
+    parser.add_argument('--warmup', type=int, default=2, help="Bỏ qua N mẫu đầu (cache, import...)")
+    parser.add_argument('--spawn', default="true", help="Lệnh spawn mỗi vòng để kiểm tra reap ('' = tắt)")
+    parser.add_argument('-d', '--display', help="Chạy trên X server (ví dụ Xvfb :99) thay vì server giả")
+    parser.add_argument('--json', action='store_true', help="In các mẫu dạng JSON")
+    args = parser.parse_args()
+    
+    config.set("ipc.enabled", False)
+    config.set("metrics.summary_interval", 0)
+    config.set("trace.record", "")
+    tracemalloc.start()
+    if args.display:
+        wm = WindowManager(XcffibBackend(args.display))
+        clients = XClients(args.display)
+    else:
+        backend = FakeBackend(FakeServer(record=False))
+        wm = WindowManager(backend)
+        clients = FakeClients(backend.server)
+    wm.running = True
+    
+    soak = Soak(wm, clients, args.batch, args.spawn)
+    soak.run(args.cycles, args.interval, args.duration)
+    leaks = soak.check(args.warmup)
+    wm.quit()
+    
+    if args.json:
+        print(json.dumps({'samples': soak.samples, 'leaks': leaks}, indent=2))
+    else:
+        for sample in soak.samples:
+            print(" ".join(f"{key}={value}" for key, value in sample.items()))
+    if leaks:
+        print("Monotonic growth detected: " + "; ".join(leaks), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import sys
 import os
 import signal
 from core.wm import WindowManager
+from core.log import logger
 
 def signal_handler(signum, frame):
     """Xử lý signal để shutdown graceful"""
@@ -23,6 +24,8 @@ def main():
         print("\\nReceived keyboard interrupt")
     except Exception as e:
         print(f"Fatal error: {e}")
+        logger.exception('fatal', f"Fatal error: {e}")
+        logger.crash_dump()
         sys.exit(1)
     finally:
         print("IArDE window manager stopped.")
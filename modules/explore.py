@@ -0,0 +1,380 @@
+import xcffib.xproto as xproto
+from typing import Dict, List, Optional, Tuple
+
+# Ký tự ngăn cách từ, match ngay sau các ký tự này được cộng điểm
+WORD_SEPARATORS = ' -_./:'
+
+def fuzzy_score(query: str, text: str) -> Optional[int]:
+    """Chấm điểm fuzzy (subsequence) của query trong text, None nếu không khớp"""
+    score = 0
+    pos = 0
+    prev = -2
+    for ch in query:
+        idx = text.find(ch, pos)
+        if idx < 0:
+            return None
+        if idx == prev + 1:
+            score += 6  # Ký tự liên tiếp
+        elif idx == 0 or text[idx - 1] in WORD_SEPARATORS:
+            score += 8  # Đầu từ
+        else:
+            score -= min(idx - pos, 4)  # Phạt khoảng cách
+        score += 1
+        prev = idx
+        pos = idx + 1
+        
+    if text.startswith(query):
+        score += 15
+    elif query in text:
+        score += 10
+    return score
+
+class SearchEntry:
+    """Dữ liệu tìm kiếm của một cửa sổ"""
+    __slots__ = ('window_id', 'title', 'wm_class', 'workspace', 'process', 'haystack')
+    
+    def __init__(self, window_id: int, title: str, wm_class: str, workspace: str, process: str = ""):
+        self.window_id = window_id
+        self.title = title
+        self.wm_class = wm_class
+        self.workspace = workspace
+        self.process = process
+        self.haystack = f"{title} {wm_class} {workspace} {process}".lower()
+
+class SearchIndex:
+    """Index tìm kiếm cập nhật tăng dần theo event, không rebuild khi mở explorer"""
+    
+    MRU_BOOST = 30
+    
+    def __init__(self):
+        self.entries: Dict[int, SearchEntry] = {}
+        self.focus_stamps: Dict[int, int] = {}
+        self.focus_counter = 0
+        # Kết quả của query trước, dùng lọc tiếp khi người dùng gõ thêm ký tự
+        self._last_query: Optional[str] = None
+        self._last_candidates: List[int] = []
+        
+    def _invalidate(self):
+        self._last_query = None
+        self._last_candidates = []
+        
+    def add(self, window_id: int, title: str, wm_class: str, workspace: str, process: str = ""):
+        """Thêm hoặc thay thế entry của một cửa sổ"""
+        self.entries[window_id] = SearchEntry(window_id, title, wm_class, workspace, process)
+        self._invalidate()
+        
+    def update(self, window_id: int, title: Optional[str] = None, workspace: Optional[str] = None,
+               process: Optional[str] = None):
+        """Cập nhật title/workspace/process của entry"""
+        entry = self.entries.get(window_id)
+        if not entry:
+            return
+        self.add(
+            window_id,
+            entry.title if title is None else title,
+            entry.wm_class,
+            entry.workspace if workspace is None else workspace,
+            entry.process if process is None else process,
+        )
+        
+    def remove(self, window_id: int):
+        """Xóa entry khi cửa sổ bị hủy"""
+        if self.entries.pop(window_id, None):
+            self.focus_stamps.pop(window_id, None)
+            self._invalidate()
+            
+    def touch(self, window_id: int):
+        """Ghi nhận cửa sổ vừa được focus (cho MRU boost)"""
+        self.focus_counter += 1
+        self.focus_stamps[window_id] = self.focus_counter
+        
+    def _mru_boost(self, window_id: int) -> int:
+        stamp = self.focus_stamps.get(window_id)
+        if not stamp:
+            return 0
+        return self.MRU_BOOST * stamp // self.focus_counter
+        
+    def search(self, query: str, limit: int = 20) -> List[SearchEntry]:
+        """Tìm các cửa sổ khớp query, sắp xếp theo điểm + MRU"""
+        query = query.lower()
+        if not query:
+            # Không có query: thứ tự MRU giống alt-tab
+            entries = sorted(
+                self.entries.values(),
+                key=lambda e: self.focus_stamps.get(e.window_id, 0),
+                reverse=True
+            )
+            self._invalidate()
+            return entries[:limit]
+            
+        # Query mở rộng từ query trước -> chỉ cần lọc lại tập ứng viên cũ
+        if self._last_query is not None and query.startswith(self._last_query):
+            candidates = self._last_candidates
+        else:
+            candidates = self.entries.keys()
+            
+        scored: List[Tuple[int, int]] = []
+        matched: List[int] = []
+        for window_id in candidates:
+            entry = self.entries.get(window_id)
+            if entry is None:
+                continue
+            score = fuzzy_score(query, entry.haystack)
+            if score is None:
+                continue
+            matched.append(window_id)
+            scored.append((score + self._mru_boost(window_id), window_id))
+            
+        self._last_query = query
+        self._last_candidates = matched
+        
+        scored.sort(reverse=True)
+        return [self.entries[window_id] for _, window_id in scored[:limit]]
+
+class WindowExplorer:
+    """Window switcher trong WM (thay alt-tab / rofi -show window)"""
+    
+    FONT = "fixed"
+    WIDTH = 640
+    PADDING = 6
+    
+    def __init__(self, wm):
+        self.wm = wm
+        self.xconn = wm.xconn
+        self.config = wm.config
+        self.max_results = self.config.get("explorer.max_results", 12)
+        self.index = SearchIndex()
+        self.active = False
+        self.query = ""
+        self.results: List[SearchEntry] = []
+        self.selected = 0
+        
+        self.window = None
+        self.gc = None
+        self.font = None
+        self.char_width = 6
+        self.font_ascent = 10
+        self.font_descent = 3
+        self.row_height = 16
+        self.height = 0
+        self.keymap: Dict[int, str] = {}
+        
+    def _color(self, name: str, default: int) -> int:
+        return self.config.get(f"colors.{name}", default) & 0xffffff
+        
+    def start(self):
+        """Tạo cửa sổ explorer (chưa map), đăng ký hook và index các cửa sổ sẵn có"""
+        core = self.xconn.conn.core
+        
+        self.font = self.xconn.generate_id()
+        core.OpenFont(self.font, len(self.FONT), self.FONT)
+        font_info = core.QueryFont(self.font).reply()
+        self.char_width = font_info.max_bounds.character_width or self.char_width
+        self.font_ascent = font_info.font_ascent
+        self.font_descent = font_info.font_descent
+        self.row_height = self.font_ascent + self.font_descent + 4
+        self.height = self.row_height * (self.max_results + 1) + 2 * self.PADDING
+        
+        x = (self.xconn.screen_width - self.WIDTH) // 2
+        y = (self.xconn.screen_height - self.height) // 3
+        background = self._color("background", 0x000000)
+        self.window = self.xconn.generate_id()
+        core.CreateWindow(
+            self.xconn.screen_depth, self.window, self.xconn.root,
+            x, y, self.WIDTH, self.height, 1,
+            xproto.WindowClass.InputOutput, self.xconn.screen.root_visual,
+            xproto.CW.BackPixel | xproto.CW.BorderPixel | xproto.CW.OverrideRedirect | xproto.CW.EventMask,
+            [background, self._color("focused", 0x005577), 1, xproto.EventMask.Exposure]
+        )
+        self.gc = self.xconn.generate_id()
+        core.CreateGC(
+            self.gc, self.window,
+            xproto.GC.Foreground | xproto.GC.Background | xproto.GC.Font | xproto.GC.GraphicsExposures,
+            [background, background, self.font, 0]
+        )
+        
+        # Bảng keycode -> ký tự theo keyboard mapping của server (KeybindManager đã đọc)
+        self.keymap = dict(self.wm.keybind_manager.key_chars)
+        
+        self.wm.event_handler.register_internal_window(self.window, self)
+        hooks = self.wm.hooks
+        hooks.subscribe('window', self._on_window)
+        hooks.subscribe('focus', self._on_focus)
+        # Index tìm kiếm theo tiêu đề cần PropertyNotify từ client
+        self.wm.event_masks.set_feature('explorer', client=xproto.EventMask.PropertyChange)
+        
+        for window in self.wm.event_handler.get_all_windows():
+            self._index_window(window)
+            
+    def stop(self):
+        """Giải phóng tài nguyên X"""
+        if self.window is None:
+            return
+        if self.active:
+            self.close()
+        core = self.xconn.conn.core
+        self.wm.event_handler.unregister_internal_window(self.window)
+        self.wm.event_masks.clear_feature('explorer')
+        core.FreeGC(self.gc)
+        core.DestroyWindow(self.window)
+        core.CloseFont(self.font)
+        self.window = None
+        
+    def _workspace_name(self, index) -> str:
+        workspace = self.wm.workspace_manager.get_workspace(index) if index is not None else None
+        return workspace.name if workspace else ""
+        
+    def _index_window(self, window):
+        self.index.add(
+            window.window_id, window.get_title(),
+            window.get_wm_class(), self._workspace_name(window.workspace), window.process or ""
+        )
+        
+    # Hook listeners - giữ index luôn cập nhật
+    def _on_window(self, change: str, window):
+        if change == 'new':
+            self._index_window(window)
+        elif change == 'close':
+            self.index.remove(window.window_id)
+        elif change == 'title':
+            self.index.update(window.window_id, title=window.get_title())
+        elif change == 'move':
+            self.index.update(window.window_id, workspace=self._workspace_name(window.workspace))
+        elif change == 'process':
+            # Tên process do Prefetcher đọc từ _NET_WM_PID
+            self.index.update(window.window_id, process=window.process or "")
+        else:
+            return
+        if self.active:
+            self._refresh_results()
+            
+    def _on_focus(self, window):
+        if window:
+            self.index.touch(window.window_id)
+            
+    # Mở / đóng
+    def toggle(self):
+        """Mở hoặc đóng explorer"""
+        if self.active:
+            self.close()
+        else:
+            self.open()
+            
+    def open(self):
+        """Hiện explorer và grab bàn phím (không truy vấn thêm dữ liệu từ X)"""
+        if self.active or self.window is None:
+            return
+        core = self.xconn.conn.core
+        self.active = True
+        self.query = ""
+        self.selected = 0
+        self._refresh_results()
+        
+        # Hiện ở giữa màn hình đang focus
+        monitor = self.wm.monitor_manager.get_current()
+        if monitor:
+            x = monitor.x + (monitor.width - self.WIDTH) // 2
+            y = monitor.y + (monitor.height - self.height) // 3
+            core.ConfigureWindow(self.window, xproto.ConfigWindow.X | xproto.ConfigWindow.Y, [x, y])
+        core.ConfigureWindow(self.window, xproto.ConfigWindow.StackMode, [xproto.StackMode.Above])
+        self.xconn.note_crossing(core.MapWindow(self.window))
+        # Không chờ reply của GrabKeyboard để tránh round-trip khi mở
+        core.GrabKeyboardUnchecked(
+            False, self.xconn.root, xproto.Time.CurrentTime,
+            xproto.GrabMode.Async, xproto.GrabMode.Async
+        ).discard_reply()
+        self.wm.key_grabber = self
+        self._redraw()
+        
+    def close(self):
+        """Ẩn explorer và trả lại bàn phím"""
+        if not self.active:
+            return
+        core = self.xconn.conn.core
+        self.active = False
+        core.UngrabKeyboard(xproto.Time.CurrentTime)
+        self.xconn.note_crossing(core.UnmapWindow(self.window))
+        if self.wm.key_grabber is self:
+            self.wm.key_grabber = None
+            
+    def _refresh_results(self):
+        self.results = self.index.search(self.query, self.max_results)
+        self.selected = min(self.selected, max(0, len(self.results) - 1))
+        
+    def handle_key(self, event: xproto.KeyPressEvent):
+        """Xử lý phím khi explorer đang mở"""
+        keys = self.wm.keybind_manager.key_symbols
+        keycode = event.detail
+        
+        if keycode == keys['Escape']:
+            self.close()
+            return
+        if keycode == keys['Return']:
+            self._activate()
+            return
+        if keycode in (keys['Down'], keys['Tab']):
+            if self.results:
+                self.selected = (self.selected + 1) % len(self.results)
+        elif keycode == keys['Up']:
+            if self.results:
+                self.selected = (self.selected - 1) % len(self.results)
+        elif keycode == keys['BackSpace']:
+            if self.query:
+                self.query = self.query[:-1]
+                self.selected = 0
+                self._refresh_results()
+        elif keycode in self.keymap:
+            self.query += self.keymap[keycode]
+            self.selected = 0
+            self._refresh_results()
+        else:
+            return
+        self._redraw()
+        
+    def _activate(self):
+        """Focus cửa sổ đang được chọn"""
+        entry = self.results[self.selected] if self.results else None
+        self.close()
+        if entry:
+            window = self.wm.event_handler.get_window(entry.window_id)
+            if window:
+                self.wm.focus_window(window)
+                
+    # Rendering
+    def _draw_row(self, row: int, text: str, fg: int, bg: int):
+        core = self.xconn.conn.core
+        y = self.PADDING + row * self.row_height
+        core.ChangeGC(self.gc, xproto.GC.Foreground, [bg])
+        core.PolyFillRectangle(self.window, self.gc, 1, [
+            xproto.RECTANGLE.synthetic(0, y, self.WIDTH, self.row_height)
+        ])
+        capacity = min(255, (self.WIDTH - 2 * self.PADDING) // self.char_width)
+        data = text[:capacity].encode('latin-1', 'replace')
+        if data:
+            core.ChangeGC(self.gc, xproto.GC.Foreground | xproto.GC.Background, [fg, bg])
+            core.ImageText8(len(data), self.window, self.gc, self.PADDING, y + 2 + self.font_ascent, data)
+            
+    def _redraw(self):
+        """Vẽ lại ô query và danh sách kết quả"""
+        if not self.active:
+            return
+        fg = self.config.get("bar.colors.text", 0xdddddd) & 0xffffff
+        background = self._color("background", 0x000000)
+        highlight = self._color("focused", 0x005577)
+        
+        self._draw_row(0, f"> {self.query}_", fg, background)
+        for row in range(self.max_results):
+            if row < len(self.results):
+                entry = self.results[row]
+                text = f"[{entry.workspace}] {entry.title}  ({entry.wm_class})"
+                self._draw_row(row + 1, text, fg, highlight if row == self.selected else background)
+            else:
+                self._draw_row(row + 1, "", fg, background)
+                
+    def handle_expose(self, event):
+        """Vẽ lại khi cửa sổ explorer bị che rồi hiện lại"""
+        self._redraw()
+        
+    def handle_button(self, event):
+        """Explorer chỉ điều khiển bằng bàn phím"""
+        pass
@@ -0,0 +1,345 @@
+import xcffib.xproto as xproto
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+class Segment:
+    """Một vùng của bar (ô workspace, title, layout) với nội dung riêng"""
+    
+    def __init__(self, name: str, x: int, width: int, align: str = 'left'):
+        self.name = name
+        self.x = x
+        self.width = width
+        self.align = align
+        self.content: Optional[Tuple[str, int, int]] = None  # (text, fg, bg)
+        self.dirty = True
+        
+    def update(self, text: str, fg: int, bg: int):
+        """Đặt nội dung mới, chỉ đánh dấu dirty nếu thực sự thay đổi"""
+        content = (text, fg, bg)
+        if content != self.content:
+            self.content = content
+            self.dirty = True
+
+class TextCache:
+    """Cache pixmap đã render sẵn của các đoạn text theo (text, fg, bg), LRU"""
+    
+    def __init__(self, taskbar, max_entries: int = 256):
+        self.taskbar = taskbar
+        self.max_entries = max_entries
+        self.entries: 'OrderedDict[Tuple[str, int, int], Tuple[int, int]]' = OrderedDict()
+        
+    def get(self, text: str, fg: int, bg: int) -> Tuple[int, int]:
+        """Trả về (pixmap, width) của đoạn text, render nếu chưa có trong cache"""
+        key = (text, fg, bg)
+        entry = self.entries.get(key)
+        if entry:
+            self.entries.move_to_end(key)
+            return entry
+            
+        entry = self.taskbar.render_text(text, fg, bg)
+        self.entries[key] = entry
+        if len(self.entries) > self.max_entries:
+            _, (pixmap, _) = self.entries.popitem(last=False)
+            self.taskbar.xconn.conn.core.FreePixmap(pixmap)
+            self.taskbar.xconn.release_id(pixmap)
+        return entry
+        
+    def clear(self):
+        """Giải phóng toàn bộ pixmap"""
+        for pixmap, _ in self.entries.values():
+            self.taskbar.xconn.conn.core.FreePixmap(pixmap)
+            self.taskbar.xconn.release_id(pixmap)
+        self.entries.clear()
+
+class Taskbar:
+    """Status bar: workspaces, title cửa sổ đang focus và layout (vẽ lại theo segment)"""
+    
+    PADDING = 6
+    FONT = "fixed"
+    
+    def __init__(self, wm):
+        self.wm = wm
+        self.xconn = wm.xconn
+        self.config = wm.config
+        self.height = self.config.get("bar.height", 24)
+        self.position = self.config.get("bar.position", "bottom")
+        self.monitor = None
+        self.x = self.y = self.width = 0
+        self._place()
+        
+        self.window = None
+        self.pixmap = None
+        self.gc = None
+        self.font = None
+        self.char_width = 6
+        self.font_ascent = 10
+        self.font_descent = 3
+        
+        self.workspace_segments: List[Segment] = []
+        self.title_segment: Optional[Segment] = None
+        self.layout_segment: Optional[Segment] = None
+        self.segments: List[Segment] = []
+        self.workspace_counts: Dict[int, int] = {}
+        self.text_cache = TextCache(self)
+        
+    def _place(self):
+        """Bar nằm trên màn hình primary (tính lại khi màn hình thay đổi)"""
+        self.monitor = self.wm.monitor_manager.get_primary()
+        if self.monitor:
+            self.x, monitor_y, self.width, monitor_height = self.monitor.geometry
+        else:
+            self.x, monitor_y = 0, 0
+            self.width, monitor_height = self.xconn.get_screen_geometry()
+        self.y = monitor_y + monitor_height - self.height if self.position == "bottom" else monitor_y
+        
+    def _color(self, name: str, default: int) -> int:
+        """Lấy màu của bar (bỏ byte alpha)"""
+        return self.config.get(f"bar.colors.{name}", default) & 0xffffff
+        
+    def start(self):
+        """Tạo cửa sổ bar, pixmap, GC và đăng ký hook"""
+        core = self.xconn.conn.core
+        background = self._color("background", 0x000000)
+        
+        self.font = self.xconn.generate_id()
+        core.OpenFont(self.font, len(self.FONT), self.FONT)
+        font_info = core.QueryFont(self.font).reply()
+        self.char_width = font_info.max_bounds.character_width or self.char_width
+        self.font_ascent = font_info.font_ascent
+        self.font_descent = font_info.font_descent
+        
+        self.window = self.xconn.generate_id()
+        core.CreateWindow(
+            self.xconn.screen_depth, self.window, self.xconn.root,
+            self.x, self.y, self.width, self.height, 0,
+            xproto.WindowClass.InputOutput, self.xconn.screen.root_visual,
+            xproto.CW.BackPixel | xproto.CW.OverrideRedirect | xproto.CW.EventMask,
+            [background, 1, xproto.EventMask.Exposure | xproto.EventMask.ButtonPress]
+        )
+        
+        self.pixmap = self.xconn.generate_id()
+        core.CreatePixmap(self.xconn.screen_depth, self.pixmap, self.window, self.width, self.height)
+        
+        self.gc = self.xconn.generate_id()
+        core.CreateGC(
+            self.gc, self.pixmap,
+            xproto.GC.Foreground | xproto.GC.Background | xproto.GC.Font | xproto.GC.GraphicsExposures,
+            [background, background, self.font, 0]
+        )
+        
+        self._create_segments()
+        self._fill(0, self.width, background)
+        self._refresh_all()
+        
+        self.wm.event_handler.register_internal_window(self.window, self)
+        hooks = self.wm.hooks
+        hooks.subscribe('focus', self._on_focus)
+        hooks.subscribe('window', self._on_window)
+        hooks.subscribe('layout', self._on_layout)
+        hooks.subscribe('workspace', self._on_workspace)
+        hooks.subscribe('batch_end', self.render)
+        hooks.subscribe('monitor', self._on_monitor)
+        # Tiêu đề cửa sổ trên bar cần PropertyNotify từ client
+        self.wm.event_masks.set_feature('bar', client=xproto.EventMask.PropertyChange)
+        
+        core.MapWindow(self.window)
+        self.render()
+        
+    def stop(self):
+        """Giải phóng tài nguyên X của bar"""
+        if self.window is None:
+            return
+        core = self.xconn.conn.core
+        self.wm.event_handler.unregister_internal_window(self.window)
+        self.wm.event_masks.clear_feature('bar')
+        self.text_cache.clear()
+        core.FreeGC(self.gc)
+        core.FreePixmap(self.pixmap)
+        core.DestroyWindow(self.window)
+        core.CloseFont(self.font)
+        self.window = None
+        
+    def get_reserved_space(self) -> Tuple[int, int]:
+        """Khoảng (top, bottom) bar chiếm, được trừ khỏi vùng layout"""
+        if self.position == "bottom":
+            return 0, self.height
+        return self.height, 0
+        
+    def _text_width(self, text: str) -> int:
+        """Độ rộng text (font "fixed" là monospace)"""
+        return len(text) * self.char_width
+        
+    def _create_segments(self):
+        """Chia bar thành các segment có vị trí cố định"""
+        self.workspace_segments = []
+        x = 0
+        for workspace in self.wm.workspace_manager.workspaces:
+            width = self._text_width(workspace.name) + 2 * self.PADDING
+            self.workspace_segments.append(Segment(f"ws:{workspace.index}", x, width, 'center'))
+            x += width
+            
+        layout_names = self.wm.layout_manager.layouts.keys()
+        layout_width = max(self._text_width(name) for name in layout_names) + 2 * self.PADDING
+        self.layout_segment = Segment("layout", self.width - layout_width, layout_width, 'right')
+        self.title_segment = Segment("title", x, max(0, self.layout_segment.x - x))
+        
+        self.segments = self.workspace_segments + [self.title_segment, self.layout_segment]
+        
+    def _refresh_all(self):
+        """Tính lại nội dung của mọi segment (khi khởi động hoặc chuyển cửa sổ giữa workspace)"""
+        self.workspace_counts = {}
+        for window in self.wm.event_handler.get_all_windows():
+            self.workspace_counts[window.workspace] = self.workspace_counts.get(window.workspace, 0) + 1
+        for index in range(len(self.workspace_segments)):
+            self._update_workspace_segment(index)
+        self._on_focus(self.wm.event_handler.get_focused_window())
+        self._on_layout(self.wm.layout_manager.get_current_layout_name())
+        
+    def _update_workspace_segment(self, index: int):
+        """Cập nhật nội dung ô workspace theo trạng thái hiện tại"""
+        if not 0 <= index < len(self.workspace_segments):
+            return
+        workspace = self.wm.workspace_manager.workspaces[index]
+        if index == self.wm.workspace_manager.current:
+            bg = self._color("focused_workspace", 0x005577)
+        elif self.workspace_counts.get(index):
+            bg = self._color("active_workspace", 0x333333)
+        else:
+            bg = self._color("inactive_workspace", 0x222222)
+        self.workspace_segments[index].update(workspace.name, self._color("text", 0xdddddd), bg)
+        
+    # Hook listeners
+    def _on_focus(self, window):
+        title = window.get_title() if window else ""
+        self.title_segment.update(title, self._color("text", 0xdddddd), self._color("background", 0x000000))
+        
+    def _on_window(self, change: str, window):
+        if change == 'title':
+            if window is self.wm.event_handler.get_focused_window():
+                self._on_focus(window)
+            return
+            
+        if change in ('new', 'close'):
+            delta = 1 if change == 'new' else -1
+            self.workspace_counts[window.workspace] = self.workspace_counts.get(window.workspace, 0) + delta
+            self._update_workspace_segment(window.workspace)
+        elif change == 'move':
+            self._refresh_all()
+            
+    def _on_layout(self, layout_name: str):
+        self.layout_segment.update(layout_name, self._color("text", 0xdddddd), self._color("statusline", 0x333333))
+        
+    def _on_workspace(self, change: str, current, old):
+        if old:
+            self._update_workspace_segment(old.index)
+        if current:
+            self._update_workspace_segment(current.index)
+        # Mỗi màn hình có layout riêng
+        self._on_layout(self.wm.layout_manager.get_current_layout_name())
+            
+    def _on_monitor(self, change: str, monitor):
+        """Đổi độ phân giải hoặc primary bị rút/đổi: đặt lại bar và khoảng dành riêng trên primary mới"""
+        if self.window is None:
+            return
+        old_monitor, old_rect = self.monitor, (self.x, self.y, self.width)
+        self._place()
+        if self.monitor is old_monitor and (self.x, self.y, self.width) == old_rect:
+            return
+        core = self.xconn.conn.core
+        core.ConfigureWindow(
+            self.window, xproto.ConfigWindow.X | xproto.ConfigWindow.Y | xproto.ConfigWindow.Width,
+            [self.x, self.y, self.width]
+        )
+        if self.width != old_rect[2]:
+            # Pixmap theo độ rộng bar: tạo lại, segment title/layout đổi vị trí
+            core.FreePixmap(self.pixmap)
+            core.CreatePixmap(self.xconn.screen_depth, self.pixmap, self.window, self.width, self.height)
+            self._create_segments()
+            self._fill(0, self.width, self._color("background", 0x000000))
+            self._refresh_all()
+        for segment in self.segments:
+            segment.dirty = True
+        if self.monitor is not old_monitor:
+            # Layout của mọi màn hình được tính lại ở cuối batch với khoảng dành riêng mới
+            layout_manager = self.wm.layout_manager
+            if old_monitor is not None:
+                layout_manager.set_reserved_space(0, 0, old_monitor)
+            if self.monitor is not None:
+                layout_manager.set_reserved_space(*self.get_reserved_space(), self.monitor)
+                
+    # Rendering
+    def _fill(self, x: int, width: int, color: int):
+        """Tô một vùng của pixmap"""
+        core = self.xconn.conn.core
+        core.ChangeGC(self.gc, xproto.GC.Foreground, [color])
+        core.PolyFillRectangle(self.pixmap, self.gc, 1, [xproto.RECTANGLE.synthetic(x, 0, width, self.height)])
+        
+    def render_text(self, text: str, fg: int, bg: int) -> Tuple[int, int]:
+        """Render một đoạn text vào pixmap riêng, trả về (pixmap, width)"""
+        core = self.xconn.conn.core
+        data = text.encode('latin-1', 'replace')
+        width = max(1, self._text_width(text))
+        
+        pixmap = self.xconn.generate_id()
+        core.CreatePixmap(self.xconn.screen_depth, pixmap, self.window, width, self.height)
+        core.ChangeGC(self.gc, xproto.GC.Foreground, [bg])
+        core.PolyFillRectangle(pixmap, self.gc, 1, [xproto.RECTANGLE.synthetic(0, 0, width, self.height)])
+        core.ChangeGC(self.gc, xproto.GC.Foreground | xproto.GC.Background, [fg, bg])
+        baseline = (self.height + self.font_ascent - self.font_descent) // 2
+        core.ImageText8(len(data), pixmap, self.gc, 0, baseline, data)
+        return pixmap, width
+        
+    def _draw_segment(self, segment: Segment):
+        """Vẽ lại một segment vào pixmap off-screen"""
+        text, fg, bg = segment.content
+        self._fill(segment.x, segment.width, bg)
+        
+        capacity = max(0, (segment.width - 2 * self.PADDING) // self.char_width)
+        if len(text) > capacity:
+            text = text[:max(0, capacity - 1)] + '~' if capacity else ''
+        text = text[:255]  # Giới hạn của ImageText8
+        if not text:
+            return
+            
+        pixmap, width = self.text_cache.get(text, fg, bg)
+        if segment.align == 'center':
+            offset = (segment.width - width) // 2
+        elif segment.align == 'right':
+            offset = segment.width - width - self.PADDING
+        else:
+            offset = self.PADDING
+        self.xconn.conn.core.CopyArea(
+            pixmap, self.pixmap, self.gc,
+            0, 0, segment.x + offset, 0, width, self.height
+        )
+        
+    def render(self):
+        """Vẽ lại các segment dirty và copy đúng vùng đó lên cửa sổ bar"""
+        if self.window is None:
+            return
+        core = self.xconn.conn.core
+        for segment in self.segments:
+            if not segment.dirty or segment.content is None:
+                continue
+            segment.dirty = False
+            if segment.width <= 0:
+                continue
+            self._draw_segment(segment)
+            core.CopyArea(
+                self.pixmap, self.window, self.gc,
+                segment.x, 0, segment.x, 0, segment.width, self.height
+            )
+            
+    def handle_expose(self, event):
+        """Expose chỉ cần copy lại vùng bị che từ pixmap"""
+        self.xconn.conn.core.CopyArea(
+            self.pixmap, self.window, self.gc,
+            event.x, event.y, event.x, event.y, event.width, event.height
+        )
+        
+    def handle_button(self, event):
+        """Click vào ô workspace để chuyển workspace"""
+        for index, segment in enumerate(self.workspace_segments):
+            if segment.x <= event.event_x < segment.x + segment.width:
+                self.wm.switch_workspace(index)
+                return